@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_write_db
 from app.models.user import User
 from app.utils.auth import create_access_token
-from app.utils import helpers
+from app.utils import passwords
 from pydantic import BaseModel
 from typing import Annotated
 from fastapi.security import OAuth2PasswordRequestForm
@@ -11,30 +12,48 @@ from fastapi.security import OAuth2PasswordRequestForm
 router = APIRouter()
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(background_tasks: BackgroundTasks, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_write_db)):
     """
     Xử lý đăng nhập, tạo và trả về JWT token
     """
     # Tìm người dùng trong cơ sở dữ liệu
-    user = db.query(User).filter(User.username == form_data.username).first()
+    result = await db.execute(select(User).where(User.username == form_data.username))
+    user = result.scalars().first()
+
+    # Kiểm tra mật khẩu (KDF chạy trong process pool riêng); quá tải thì trả 503 để client thử lại sau
+    # User không tồn tại (hoặc còn hash cũ không có KDF) vẫn chạy KDF trên hash giả: thời gian phản hồi
+    # không lộ username nào có thật
+    ok, needs_rehash = False, False
+    try:
+        if user:
+            ok, needs_rehash = await passwords.verify_password(form_data.password, user.password)
+        if not user or not passwords.uses_kdf(user.password):
+            await passwords.verify_dummy(form_data.password)
+    except passwords.PasswordQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"})
 
     # Kiểm tra nếu không tìm thấy user hoặc mật khẩu sai
-    if not user or not helpers.verify_password(form_data.password, user.password):
+    if not ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Sai tên đăng nhập hoặc mật khẩu",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Hash cũ (SHA-256, cost cũ): hash lại bằng scheme hiện tại sau khi đã trả token
+    if needs_rehash:
+        background_tasks.add_task(passwords.rehash, user.user_id, form_data.password, user.password)
+
     # Tạo JWT token với thông tin người dùng
     token = create_access_token({
         "user_id": user.user_id,
         "username": user.username,
         "email": user.email,
         "fullname": user.fullname,
-        "role_code": user.role_code
+        "role_code": user.role_code,
+        "ver": user.token_version or 0
     })
 
     return {"access_token": token, "token_type": "bearer"} # Lưu ý phải trả đúng kiểu này cho framework
 
-    
+
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, BackgroundTasks, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ConfigDict, computed_field
+from typing import Optional, List, ClassVar, Literal
 import uuid
-from datetime import date
+from datetime import date, datetime
 import os
 
 from app.models.candidates import Candidate
-from app.db.database import get_db
+from app.models.candidate_import import CandidateImport, CandidateImportError
+from app.models.recruitment_proposal import RecruitmentProposal
+from app.db.database import get_read_db, get_write_db, read_session_factory
+from app.db import bulk
 from app.utils import helpers
 from app.utils.auth import get_current_user
 from app.models.user import User
+from app.utils import uploads, cv_storage, cv_text, ranking, summary, candidate_import, export
+from app import config
 
-UPLOAD_DIR = "uploads\cv"
+UPLOAD_DIR = config.CV_UPLOAD_DIR
 
 # Pydantic Schema
 class CandidateModel(BaseModel):
@@ -25,9 +31,29 @@ class CandidateModel(BaseModel):
 
 router = APIRouter()
 
+def cv_url(candidate_id: str) -> str:
+    """Link tải CV qua API (có kiểm tra đăng nhập), không public qua /static"""
+    return f"/v1/candidate/{candidate_id}/cv"
+
+class CandidateOut(CandidateModel):
+    model_config = ConfigDict(from_attributes=True)
+    candidate_id: str
+    cv_file: Optional[str] = None
+    field_dependencies: ClassVar[dict] = {"cv_url": ["candidate_id", "cv_file"]}
+
+    @computed_field
+    @property
+    def cv_url(self) -> Optional[str]:
+        return cv_url(self.candidate_id) if self.cv_file else None
+
+class ScoredCandidateOut(CandidateOut):
+    """Ứng viên kèm điểm (tìm kiếm, xếp hạng): gán thuộc tính `score` cho object trước khi serialize"""
+    score: float
+
 # Create Candidate
 @router.post("/candidate")
-def create_candidate(    
+async def create_candidate(    
+    background_tasks: BackgroundTasks,
     full_name: str = Form(...),
     email: str = Form(...),
     phone: Optional[str] = Form(None),
@@ -35,8 +61,9 @@ def create_candidate(
     date_of_birth: Optional[date] = Form(None),
     recruitment_proposal_id: str = Form(...),
     cv_file: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_current_user)):
+    stored = None
     try:
         # Lưu file nếu có
         filename = None
@@ -50,11 +77,10 @@ def create_candidate(
                     status="Error"
                 )
 
-            filename = f"{uuid.uuid4().hex}{ext}"
-            filepath = os.path.join(UPLOAD_DIR, filename)
-            os.makedirs(UPLOAD_DIR, exist_ok=True)
-            with open(filepath, "wb") as buffer:
-                buffer.write(cv_file.file.read())
+            # Ghi theo từng chunk ra file tạm (kiểm tra magic bytes + dung lượng),
+            # sau đó lưu theo hash nội dung: file trùng chỉ lưu 1 lần
+            stored = await uploads.save_upload(cv_file, UPLOAD_DIR, config.CV_MAX_BYTES)
+            filename = await cv_storage.store(db, stored)
 
         # Tạo ứng viên
         new_candidate = Candidate(
@@ -68,99 +94,249 @@ def create_candidate(
             cv_file=filename
         )
         db.add(new_candidate)
-        db.commit()
+        await summary.candidates_changed(db, added=[recruitment_proposal_id])
+        await db.commit()
+        if filename:
+            # Trích xuất text trong CV để tìm kiếm, chạy sau khi đã trả response
+            background_tasks.add_task(cv_text.index_blob, filename)
+            background_tasks.add_task(ranking.add_candidates, [new_candidate.candidate_id])
         return helpers.response(data={"id": new_candidate.candidate_id}, message="Tạo ứng viên thành công")
+    except uploads.UploadError as e:
+        return helpers.response(data=None, message=e.message, code=e.code, status="Error")
+    except Exception as e:
+        # File tạm chưa được chuyển thành blob thì xóa; blob đã đặt mà không commit được sẽ do `gc` dọn
+        if stored:
+            await uploads.discard_upload(stored)
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+async def insert_candidates(db: AsyncSession, items: List[dict]) -> list:
+    """
+    Validate và INSERT một batch ứng viên (dùng chung cho bulk và import), không commit.
+    Kiểm tra đề xuất tuyển dụng tồn tại bằng 1 truy vấn cho cả batch; trả về kết quả theo index trong batch.
+    """
+    valid, results = bulk.validate_items(items, CandidateModel)
+    proposal_ids = await bulk.find_existing(
+        db, RecruitmentProposal.recruitment_proposal_id, [c.recruitment_proposal_id for _, c in valid]
+    )
+    kept = []
+    for index, candidate in valid:
+        if candidate.recruitment_proposal_id in proposal_ids:
+            kept.append((index, candidate))
+        else:
+            results.append(bulk.item_error(index, "Đề xuất tuyển dụng không tồn tại", "G604"))
+
+    rows = [{"candidate_id": str(uuid.uuid4()), **c.dict()} for _, c in kept]
+    await bulk.insert_many(db, Candidate, rows)
+    await summary.candidates_changed(db, added=[row["recruitment_proposal_id"] for row in rows])
+    results += [bulk.item_created(index, row["candidate_id"]) for (index, _), row in zip(kept, rows)]
+    return results
+
+# Bulk create Candidates (không kèm CV, CV upload riêng qua API tạo/sửa ứng viên)
+@router.post("/candidate/bulk")
+async def create_candidates_bulk(items: List[dict], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    """Tạo nhiều ứng viên trong 1 transaction"""
+    try:
+        if len(items) > bulk.MAX_ITEMS:
+            return helpers.response(data=None, message=f"Tối đa {bulk.MAX_ITEMS} bản ghi mỗi lần", code="G605", status="Error")
+        results = await insert_candidates(db, items)
+        await db.commit()
+        return helpers.response(data=bulk.summary(results), message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+class CandidateImportOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    import_id: str
+    filename: Optional[str] = None
+    file_format: str
+    status: str
+    total_rows: Optional[int] = None
+    processed_rows: int
+    created_rows: int
+    failed_rows: int
+    progress: int
+    message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class CandidateImportErrorOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    row_number: int
+    code: str
+    message: str
+
+# Import Candidates từ file CSV/XLSX (cột trùng tên trường của CandidateModel, dòng đầu là tiêu đề)
+@router.post("/candidate/import")
+async def import_candidates(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_write_db),
+    current_user: User = Depends(get_current_user)):
+    """Lưu file rồi import ở background; theo dõi tiến độ qua GET /candidate/import/{import_id}"""
+    stored = None
+    try:
+        fmt = candidate_import.file_format(file.filename)
+        if fmt is None:
+            return helpers.response(data=None, message="Vui lòng chọn file CSV hoặc XLSX.", code="G601", status="Error")
+        stored = await uploads.save_upload(
+            file, config.CANDIDATE_IMPORT_DIR, config.CANDIDATE_IMPORT_MAX_BYTES,
+            magic=candidate_import.MAGIC[fmt], type_message="Vui lòng chọn file CSV hoặc XLSX.",
+        )
+        import_id = str(uuid.uuid4())
+        candidate_import.add(db, import_id, file.filename, fmt, current_user.user_id)
+        await db.commit()
+        background_tasks.add_task(candidate_import.run, import_id, stored.temp_path, fmt, CandidateModel, insert_candidates)
+        return helpers.response(data={"import_id": import_id, "status": "pending"}, message="Đã nhận file, đang import")
+    except uploads.UploadError as e:
+        return helpers.response(data=None, message=e.message, code=e.code, status="Error")
+    except Exception as e:
+        if stored:
+            await uploads.discard_upload(stored)
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Tiến độ import
+@router.get("/candidate/import/{import_id}")
+async def get_candidate_import(import_id: str, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    # Đọc từ primary: tiến độ do background task ghi, replica có thể trễ
+    try:
+        job = await db.get(CandidateImport, import_id)
+        if not job:
+            return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
+        return helpers.response(data=helpers.serialize(CandidateImportOut, job), message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Lỗi theo dòng của lần import (theo thứ tự dòng trong file)
+@router.get("/candidate/import/{import_id}/errors")
+async def get_candidate_import_errors(import_id: str, limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    try:
+        query = select(CandidateImportError).where(CandidateImportError.import_id == import_id)
+        errors, next_cursor = await helpers.paginate(db, query, [CandidateImportError.row_number], limit, after)
+        return helpers.page_response(data=helpers.serialize(CandidateImportErrorOut, errors), next_cursor=next_cursor, message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Get All Candidates
 @router.get("/candidate")
-def get_all_candidates(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_candidates(limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        candidates = db.query(Candidate).all()
-        result = [
-            {
-                **candidate.__dict__,
-                "cv_url": f"/static/cv/{candidate.cv_file}" if candidate.cv_file else None
-            }
-            for candidate in candidates
-        ]
-
-        return helpers.response(data=result, message="Thành công")
+        schema, columns = helpers.fieldset(CandidateOut, fields)
+        query = select(Candidate).options(helpers.load_columns(Candidate, columns))
+        candidates, next_cursor = await helpers.paginate(db, query, [Candidate.candidate_id], limit, after)
+        return helpers.page_response(data=helpers.serialize(schema, candidates), next_cursor=next_cursor, message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Export Candidates (stream CSV/NDJSON, không giới hạn số dòng)
+@router.get("/candidate/export")
+async def export_candidates(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    recruitment_proposal_ids: Optional[str] = Query(None, description="Danh sách recruitment_proposal_id, phân cách bằng dấu ','"),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_user)):
+    try:
+        schema, columns = helpers.fieldset(CandidateOut, fields)
+        query = export.query(Candidate, columns, [Candidate.candidate_id])
+        if recruitment_proposal_ids:
+            query = query.where(Candidate.recruitment_proposal_id.in_(recruitment_proposal_ids.split(",")))
+        return export.response(read_session_factory(request), query, schema, format, "candidates")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.get("/candidates/by-proposals")
-def get_candidates_by_proposals(
+async def get_candidates_by_proposals(
     recruitment_proposal_ids: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
         ids = recruitment_proposal_ids.split(',')
-        candidates = db.query(Candidate).filter(Candidate.recruitment_proposal_id.in_(ids)).all()
-        for c in candidates:
-            if c.cv_file:
-                c.cv_url = f"/static/cv/{c.cv_file}"
-
-        return helpers.response(data=candidates, message="Thành công")
+        schema, columns = helpers.fieldset(CandidateOut, fields)
+        candidates = (await db.execute(
+            select(Candidate).options(helpers.load_columns(Candidate, columns)).where(Candidate.recruitment_proposal_id.in_(ids))
+        )).scalars().all()
+        return helpers.response(data=helpers.serialize(schema, candidates), message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Get Candidate by ID
 @router.get("/candidate/{candidate_id}")
-def get_candidate_by_id(candidate_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_candidate_by_id(candidate_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
+        schema, columns = helpers.fieldset(CandidateOut, fields)
+        candidate = (await db.execute(
+            select(Candidate).options(helpers.load_columns(Candidate, columns)).where(Candidate.candidate_id == candidate_id)
+        )).scalars().first()
         if not candidate:
             return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
 
-        # Nếu có file CV thì tạo đường dẫn công khai
-        if candidate.cv_file:
-            candidate.cv_url = f"/static/cv/{candidate.cv_file}"
+        # cv_url: đường dẫn tải CV (None nếu không có file)
+        return helpers.response(data=helpers.serialize(schema, candidate), message="Lấy thông tin ứng viên thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
-        return helpers.response(data=candidate, message="Lấy thông tin ứng viên thành công")
+# Download CV
+@router.api_route("/candidate/{candidate_id}/cv", methods=["GET", "HEAD"])
+async def download_cv(candidate_id: str, request: Request, db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    try:
+        cv_file = (await db.execute(select(Candidate.cv_file).where(Candidate.candidate_id == candidate_id))).scalar_one_or_none()
+        if not cv_file:
+            return helpers.response(data=None, message="Ứng viên không có CV!", code="G604", status="Error")
+        return await cv_storage.file_response(cv_file, request, download_name=f"cv_{candidate_id}.pdf")
+    except FileNotFoundError:
+        return helpers.response(data=None, message="File CV không tồn tại!", code="G604", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Candidate
 @router.delete("/candidate/{candidate_id}")
-def delete_candidate(candidate_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    candidate = db.query(Candidate).filter(Candidate.candidate_id == candidate_id).first()
-    if not candidate:
-        return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
+async def delete_candidate(candidate_id: str, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        # Xoá file CV nếu tồn tại
-        if candidate.cv_file:
-            file_path = os.path.join(UPLOAD_DIR, candidate.cv_file)
-            if os.path.exists(file_path):
-                os.remove(file_path)
-
-        db.delete(candidate)
-        db.commit()
+        deleted = await bulk.delete_returning(db, Candidate.candidate_id, [candidate_id], Candidate.cv_file, Candidate.recruitment_proposal_id)
+        if not deleted:
+            return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
+
+        # Giảm tham chiếu tới file CV, file không còn ai dùng sẽ được dọn sau khi trả response
+        released = await cv_storage.release(db, [row.cv_file for row in deleted])
+        await summary.candidates_changed(db, removed=[row.recruitment_proposal_id for row in deleted])
+        await db.commit()
+        ranking.remove_candidates([candidate_id])
+        background_tasks.add_task(cv_storage.collect_garbage, released)
         return helpers.response(data={"id": candidate_id}, message="Xóa thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Multiple Candidates
 @router.delete("/candidate")
-def delete_candidates(candidate_ids: List[str], db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_candidates(candidate_ids: List[str], background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         if not candidate_ids:
             return helpers.response(data=None, message="Danh sách candidate_id không hợp lệ!", code="G604", status="Error")
 
-        candidates_to_delete = db.query(Candidate).filter(Candidate.candidate_id.in_(candidate_ids)).all()
-        if not candidates_to_delete:
+        # DELETE ... RETURNING candidate_id, cv_file, recruitment_proposal_id: biết luôn file nào cần giảm tham chiếu
+        # và đề xuất nào cần trừ số ứng viên, không nạp object ORM
+        deleted = await bulk.delete_returning(db, Candidate.candidate_id, candidate_ids, Candidate.cv_file, Candidate.recruitment_proposal_id)
+        if not deleted:
             return helpers.response(data=None, message="Không tìm thấy ứng viên nào trong danh sách!", code="G604", status="Error")
 
-        for candidate in candidates_to_delete:
-            if candidate.cv_file:
-                file_path = os.path.join(UPLOAD_DIR, candidate.cv_file)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            db.delete(candidate)
-
-        db.commit()
-        return helpers.response(data={"deleted_candidate_ids": candidate_ids}, message="Xóa các ứng viên thành công")
+        released = await cv_storage.release(db, [row.cv_file for row in deleted])
+        await summary.candidates_changed(db, removed=[row.recruitment_proposal_id for row in deleted])
+        await db.commit()
+        ranking.remove_candidates([row.candidate_id for row in deleted])
+        # Xóa file trên đĩa sau khi đã trả response
+        background_tasks.add_task(cv_storage.collect_garbage, released)
+        return helpers.response(data={"deleted_candidate_ids": [row.candidate_id for row in deleted]}, message="Xóa các ứng viên thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid 
-from app.db.database import get_db
+from app.db.database import get_read_db, get_write_db
 from app.models.department import Department
-from app.utils import helpers
+from app.db import bulk
+from app.utils import helpers, table_versions, reference_cache
 from app.models.user import User
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from app.utils.auth import get_current_user
 
 # Định nghĩa schema Pydantic
@@ -15,100 +17,151 @@ class DepartmentModel(BaseModel):
     code: str
     desc: Optional[str] = None
 
+class DepartmentOut(DepartmentModel):
+    model_config = ConfigDict(from_attributes=True)
+    department_id: str
 
 router = APIRouter()
 
 # Create Department
 @router.post("/department")
-def create_department(department: DepartmentModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_department(department: DepartmentModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         # Kiểm tra code đã tồn tại
-        existing = db.query(Department).filter(Department.code == department.code).first()
+        existing = (await db.execute(select(Department).where(Department.code == department.code))).scalars().first()
         if existing:
             return helpers.response(data=None, message="Code phòng ban đã tồn tại", code="C603", status="Error")
         
         new_department = Department(department_id=str(uuid.uuid4()), **department.dict())
         db.add(new_department)
-        db.commit()
+        await table_versions.bump(db, "department")
+        await db.commit()
         return helpers.response(data={"id": new_department.department_id}, message="Tạo phòng ban thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
+# Bulk create Departments
+@router.post("/department/bulk")
+async def create_departments_bulk(items: List[dict], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    """Tạo nhiều phòng ban trong 1 transaction; kết quả trả về theo từng phần tử"""
+    try:
+        if len(items) > bulk.MAX_ITEMS:
+            return helpers.response(data=None, message=f"Tối đa {bulk.MAX_ITEMS} bản ghi mỗi lần", code="G605", status="Error")
+        valid, results = bulk.validate_items(items, DepartmentModel)
+        existing = await bulk.find_existing(db, Department.code, [d.code for _, d in valid])
+        valid, errors = bulk.drop_duplicates(valid, lambda d: d.code, existing, "Code phòng ban đã tồn tại")
+        results += errors
+
+        rows = [{"department_id": str(uuid.uuid4()), **d.dict()} for _, d in valid]
+        await bulk.insert_many(db, Department, rows)
+        await table_versions.bump(db, "department")
+        await db.commit()
+        results += [bulk.item_created(index, row["department_id"]) for (index, _), row in zip(valid, rows)]
+        return helpers.response(data=bulk.summary(results), message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
 # Get All Departments
 @router.get("/department")
-def get_all_departments(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_departments(request: Request, limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        departments = db.query(Department).all()
-        return helpers.response(data=departments, message="Thành công")
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "department")
+        if not_modified:
+            return not_modified
+        schema, columns = helpers.fieldset(DepartmentOut, fields)
+
+        async def load():
+            query = select(Department).options(helpers.load_columns(Department, columns))
+            departments, next_cursor = await helpers.paginate(db, query, [Department.department_id], limit, after)
+            return helpers.serialize(schema, departments), next_cursor
+
+        # Cache theo phiên bản bảng (tag): dữ liệu đổi thì tự đọc lại từ DB
+        data, next_cursor = await reference_cache.get(tag, ("list", schema, limit, after), load)
+        return helpers.page_response(data=data, next_cursor=next_cursor, message="Thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Get Department by ID
 @router.get("/department/{department_id}")
-def get_department_by_id(department_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_department_by_id(request: Request, department_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        department = db.query(Department).filter(Department.department_id == department_id).first()
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "department")
+        if not_modified:
+            return not_modified
+        schema, columns = helpers.fieldset(DepartmentOut, fields)
+
+        async def load():
+            department = (await db.execute(
+                select(Department).options(helpers.load_columns(Department, columns)).where(Department.department_id == department_id)
+            )).scalars().first()
+            return helpers.serialize(schema, department)
+
+        department = await reference_cache.get(tag, ("id", schema, department_id), load)
         if not department:
             return helpers.response(data=None, message="Bản ghi không tồn tại", code="G604", status="Error")
-        return helpers.response(data=department, message="Lấy phòng ban thành công")
+        return helpers.response(data=department, message="Lấy phòng ban thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Update Department
 @router.put("/department/{department_id}")
-def update_department(department_id: str, update: DepartmentModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_department(department_id: str, update: DepartmentModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        department = db.query(Department).filter(Department.department_id == department_id).first()
+        department = (await db.execute(select(Department).where(Department.department_id == department_id))).scalars().first()
         if not department:
             return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
         
         # Kiểm tra code đã tồn tại?
         if update.code:
-            existing = db.query(Department).filter(
+            existing = (await db.execute(select(Department).where(
                 Department.code == update.code,
                 Department.department_id != department_id
-            ).first()
+            ))).scalars().first()
             if existing:
                 return helpers.response(data=None, message="Code phòng ban đã tồn tại", code="C603", status="Error")
         
         for field, value in update.dict(exclude_unset=True).items():
             setattr(department, field, value)
         
-        db.commit()
-        return helpers.response(data=department, message="Cập nhật phòng ban thành công")
+        await table_versions.bump(db, "department")
+        await db.commit()
+        return helpers.response(data=helpers.serialize(DepartmentOut, department), message="Cập nhật phòng ban thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Department
 @router.delete("/department/{department_id}")
-def delete_department(department_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_department(department_id: str, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        department = db.query(Department).filter(Department.department_id == department_id).first()
-        if not department:
+        deleted = await bulk.delete_returning(db, Department.department_id, [department_id])
+        if not deleted:
             return helpers.response(data=None, message="Bản ghi không tồn tại!", code="G604", status="Error")
-        
-        db.delete(department)
-        db.commit()
+
+        await table_versions.bump(db, "department")
+        await db.commit()
         return helpers.response(data={"id": department_id}, message="Xóa phòng ban thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Multiple Departments
 @router.delete("/department")
-def delete_departments(department_ids: list[str], db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_departments(department_ids: list[str], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         if not department_ids:
             return helpers.response(data=None, message="Danh sách department_id không hợp lệ!", code="G604", status="Error")
-        
-        departments_to_delete = db.query(Department).filter(Department.department_id.in_(department_ids)).all()
-        
-        if not departments_to_delete:
+
+        deleted = await bulk.delete_returning(db, Department.department_id, department_ids)
+        if not deleted:
             return helpers.response(data=None, message="Không tìm thấy phòng ban nào trong danh sách!", code="G604", status="Error")
-        
-        for department in departments_to_delete:
-            db.delete(department)
 
-        db.commit()
-        return helpers.response(data={"deleted_department_ids": department_ids}, message="Xóa các phòng ban thành công")
+        await table_versions.bump(db, "department")
+        await db.commit()
+        return helpers.response(data={"deleted_department_ids": [row.department_id for row in deleted]}, message="Xóa các phòng ban thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
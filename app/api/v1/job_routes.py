@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from app.models.job import Job
-from app.db.database import get_db
-from app.utils import helpers
+from app.db.database import get_read_db, get_write_db
+from app.db import bulk
+from app.utils import helpers, table_versions, reference_cache
 from typing import List, Optional
 from app.utils.auth import get_current_user
 from app.models.user import User
@@ -15,16 +17,20 @@ class JobModel(BaseModel):
     code: str
     desc: Optional[str] = None
 
+class JobOut(JobModel):
+    model_config = ConfigDict(from_attributes=True)
+    job_id: str
+
 router = APIRouter()
 
 @router.post("/job")
-def create_job(job: JobModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_job(job: JobModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         # Kiểm tra code đã tồn tại?
         if job.code:
-            existing = db.query(Job).filter(
+            existing = (await db.execute(select(Job).where(
                 Job.code == job.code
-            ).first()
+            ))).scalars().first()
             if existing:
                 return helpers.response(
                     data=None,
@@ -35,25 +41,70 @@ def create_job(job: JobModel, db: Session = Depends(get_db), current_user: User
 
         new_job = Job(job_id=str(uuid.uuid4()), **job.dict())
         db.add(new_job)
-        db.commit()
+        await table_versions.bump(db, "job")
+        await db.commit()
         return helpers.response(data={"id": new_job.job_id}, message="Tạo thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
+@router.post("/job/bulk")
+async def create_jobs_bulk(items: List[dict], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    """Tạo nhiều job trong 1 transaction; kết quả trả về theo từng phần tử (index trong danh sách gửi lên)"""
+    try:
+        if len(items) > bulk.MAX_ITEMS:
+            return helpers.response(data=None, message=f"Tối đa {bulk.MAX_ITEMS} bản ghi mỗi lần", code="G605", status="Error")
+        valid, results = bulk.validate_items(items, JobModel)
+        existing = await bulk.find_existing(db, Job.code, [job.code for _, job in valid])
+        valid, errors = bulk.drop_duplicates(valid, lambda job: job.code, existing, "Code đã tồn tại")
+        results += errors
+
+        rows = [{"job_id": str(uuid.uuid4()), **job.dict()} for _, job in valid]
+        await bulk.insert_many(db, Job, rows)
+        await table_versions.bump(db, "job")
+        await db.commit()
+        results += [bulk.item_created(index, row["job_id"]) for (index, _), row in zip(valid, rows)]
+        return helpers.response(data=bulk.summary(results), message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
 @router.get("/job")
-def get_all_jobs(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_jobs(request: Request, limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        jobs = db.query(Job).all()
-        return helpers.response(data=jobs, message="Thành công")
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "job")
+        if not_modified:
+            return not_modified
+        schema, columns = helpers.fieldset(JobOut, fields)
+
+        async def load():
+            query = select(Job).options(helpers.load_columns(Job, columns))
+            jobs, next_cursor = await helpers.paginate(db, query, [Job.job_id], limit, after)
+            return helpers.serialize(schema, jobs), next_cursor
+
+        # Cache theo phiên bản bảng (tag): dữ liệu đổi thì tự đọc lại từ DB
+        data, next_cursor = await reference_cache.get(tag, ("list", schema, limit, after), load)
+        return helpers.page_response(data=data, next_cursor=next_cursor, message="Thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.get("/job/{job_id}")
-def get_job_by_id(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_job_by_id(request: Request, job_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        # Truy vấn tìm job theo job_id
-        job = db.query(Job).filter(Job.job_id == job_id).first()
-        
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "job")
+        if not_modified:
+            return not_modified
+        # Truy vấn tìm job theo job_id (chỉ các cột cần trả về), qua cache danh mục
+        schema, columns = helpers.fieldset(JobOut, fields)
+
+        async def load():
+            job = (await db.execute(select(Job).options(helpers.load_columns(Job, columns)).where(Job.job_id == job_id))).scalars().first()
+            return helpers.serialize(schema, job)
+
+        job = await reference_cache.get(tag, ("id", schema, job_id), load)
+
         # Nếu không tìm thấy job, trả về lỗi
         if not job:
             return helpers.response(
@@ -64,15 +115,17 @@ def get_job_by_id(job_id: str, db: Session = Depends(get_db), current_user: User
             )
 
         # Trả về thông tin Job
-        return helpers.response(data=job, message="Lấy thông tin job thành công")
+        return helpers.response(data=job, message="Lấy thông tin job thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 
 @router.put("/job/{job_id}")
-def update_job(job_id: str, update: JobModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_job(job_id: str, update: JobModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        job = db.query(Job).filter(Job.job_id == job_id).first()
+        job = (await db.execute(select(Job).where(Job.job_id == job_id))).scalars().first()
         if not job:
             return helpers.response(
                     data=None,
@@ -83,10 +136,10 @@ def update_job(job_id: str, update: JobModel, db: Session = Depends(get_db), cur
 
         # Kiểm tra code đã tồn tại?
         if update.code:
-            existing = db.query(Job).filter(
+            existing = (await db.execute(select(Job).where(
                 Job.code == update.code,
                 Job.job_id != job_id
-            ).first()
+            ))).scalars().first()
             if existing:
                 return helpers.response(
                     data=None,
@@ -97,32 +150,32 @@ def update_job(job_id: str, update: JobModel, db: Session = Depends(get_db), cur
 
         for field, value in update.dict(exclude_unset=True).items():
             setattr(job, field, value)
-        db.commit()
+        await table_versions.bump(db, "job")
+        await db.commit()
         return helpers.response(data={"id": job_id}, message="Cập nhật thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.delete("/job/{job_id}")
-def delete_job(job_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    job = db.query(Job).filter(Job.job_id == job_id).first()
-    if not job:
-        return helpers.response(
-                data=None,
-                message="Bản ghi không tồn tại!",
-                code="G604",
-                status="Error"
-            )
-
+async def delete_job(job_id: str, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        db.delete(job)
-        db.commit()
+        deleted = await bulk.delete_returning(db, Job.job_id, [job_id])
+        if not deleted:
+            return helpers.response(
+                    data=None,
+                    message="Bản ghi không tồn tại!",
+                    code="G604",
+                    status="Error"
+                )
+        await table_versions.bump(db, "job")
+        await db.commit()
         return helpers.response(data={"id": job_id}, message="Xóa thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 
 @router.delete("/job")
-def delete_jobs(job_ids: list[str], db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_jobs(job_ids: list[str], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         # Kiểm tra xem có job nào trong danh sách không
         if not job_ids:
@@ -133,11 +186,11 @@ def delete_jobs(job_ids: list[str], db: Session = Depends(get_db), current_user:
                 status="Error"
             )
 
-        # Truy vấn các job có trong danh sách job_ids
-        jobs_to_delete = db.query(Job).filter(Job.job_id.in_(job_ids)).all()
-        
+        # Xóa bằng DELETE ... WHERE job_id IN (...) RETURNING job_id (theo từng chunk)
+        deleted = await bulk.delete_returning(db, Job.job_id, job_ids)
+
         # Kiểm tra nếu không tìm thấy job nào trong danh sách
-        if not jobs_to_delete:
+        if not deleted:
             return helpers.response(
                 data=None,
                 message="Không tìm thấy job nào trong danh sách!",
@@ -145,18 +198,14 @@ def delete_jobs(job_ids: list[str], db: Session = Depends(get_db), current_user:
                 status="Error"
             )
 
-        # Xóa các job tìm được
-        for job in jobs_to_delete:
-            db.delete(job)
-
         # Commit thay đổi vào cơ sở dữ liệu
-        db.commit()
+        await table_versions.bump(db, "job")
+        await db.commit()
 
         return helpers.response(
-            data={"deleted_job_ids": job_ids},
+            data={"deleted_job_ids": [row.job_id for row in deleted]},
             message="Xóa các job thành công"
         )
-    
+
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
-
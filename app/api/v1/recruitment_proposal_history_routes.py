@@ -1,33 +1,54 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_read_db
 from app.models.recruitment_proposal_history import RecruitmentProposalHistory
 from app.utils import helpers
 from app.models.user import User
 from app.utils.auth import get_current_user
 
+class RecruitmentProposalHistoryOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    recruitment_proposal_history_id: int
+    recruitment_proposal_id: str
+    status: Optional[str] = None
+    change_at: Optional[datetime] = None
+
 router = APIRouter()
 
 # Lấy tất cả lịch sử đề xuất tuyển dụng
 @router.get("/recruitment_proposal_history")
-def get_all_proposal_histories(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_proposal_histories(limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        histories = db.query(RecruitmentProposalHistory).all()
-        return helpers.response(data=histories, message="Lấy tất cả lịch sử đề xuất tuyển dụng thành công")
+        schema, columns = helpers.fieldset(RecruitmentProposalHistoryOut, fields)
+        histories, next_cursor = await helpers.paginate(
+            db, select(RecruitmentProposalHistory).options(helpers.load_columns(RecruitmentProposalHistory, columns)), [RecruitmentProposalHistory.recruitment_proposal_history_id], limit, after
+        )
+        return helpers.page_response(data=helpers.serialize(schema, histories), next_cursor=next_cursor, message="Lấy tất cả lịch sử đề xuất tuyển dụng thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Lấy lịch sử theo recruitment_proposal_id
 @router.get("/recruitment_proposal_history/{recruitment_proposal_id}")
-def get_history_by_proposal_id(recruitment_proposal_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_history_by_proposal_id(recruitment_proposal_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        histories = db.query(RecruitmentProposalHistory).filter(
+        schema, columns = helpers.fieldset(RecruitmentProposalHistoryOut, fields)
+        histories = (await db.execute(select(RecruitmentProposalHistory).options(
+            helpers.load_columns(RecruitmentProposalHistory, columns)
+        ).where(
             RecruitmentProposalHistory.recruitment_proposal_id == recruitment_proposal_id
-        ).order_by(RecruitmentProposalHistory.change_at.desc()).all()
+        ).order_by(RecruitmentProposalHistory.change_at.desc()))).scalars().all()
 
         if not histories:
             return helpers.response(data=[], message="Không có lịch sử nào cho đề xuất này", code="G604", status="Warning")
 
-        return helpers.response(data=histories, message="Lấy lịch sử đề xuất thành công")
+        return helpers.response(data=helpers.serialize(schema, histories), message="Lấy lịch sử đề xuất thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
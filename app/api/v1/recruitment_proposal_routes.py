@@ -1,17 +1,22 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import uuid 
 from typing import Optional
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Request
 from fastapi import Path, Query
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_read_db, get_write_db, read_session_factory
 from app.models.recruitment_proposal import RecruitmentProposal
 from app.models.recruitment_proposal_history import RecruitmentProposalHistory
-from app.utils import helpers
+from app.db import bulk
+from app.models.candidates import Candidate
+from app.utils import helpers, ranking, table_versions, summary, export
+from app.api.v1.candidates_routes import ScoredCandidateOut
+from fastapi.concurrency import run_in_threadpool
 from app.models.user import User
 from app.utils.auth import get_current_user
 from datetime import date
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 
 
 class RecruitmentProposalBase(BaseModel):
@@ -32,14 +37,18 @@ class RecruitmentProposalBase(BaseModel):
     benefits: Optional[str] = None
     user_id: Optional[str] = None
 
+class RecruitmentProposalOut(RecruitmentProposalBase):
+    model_config = ConfigDict(from_attributes=True)
+    recruitment_proposal_id: str
+
 router = APIRouter()
 
 # Create Recruitment Proposal
 @router.post("/recruitment_proposal")
-def create_recruitment_proposal(proposal: RecruitmentProposalBase, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_recruitment_proposal(proposal: RecruitmentProposalBase, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         # Kiểm tra mã proposal đã tồn tại
-        existing = db.query(RecruitmentProposal).filter(RecruitmentProposal.code == proposal.code).first()
+        existing = (await db.execute(select(RecruitmentProposal).where(RecruitmentProposal.code == proposal.code))).scalars().first()
         if existing:
             return helpers.response(data=None, message="Mã đề xuất đã tồn tại", code="C603", status="Error")
         
@@ -53,52 +62,165 @@ def create_recruitment_proposal(proposal: RecruitmentProposalBase, db: Session =
         )
         db.add(history)
 
-        db.commit()
+        await summary.proposals_changed(db, added=[new_proposal])
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
         return helpers.response(data={"id": new_proposal.recruitment_proposal_id}, message="Tạo đề xuất tuyển dụng thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
+# Bulk create Recruitment Proposals
+@router.post("/recruitment_proposal/bulk")
+async def create_recruitment_proposals_bulk(items: List[dict], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    """Tạo nhiều đề xuất + bản ghi lịch sử tương ứng trong 1 transaction; kết quả trả về theo từng phần tử"""
+    try:
+        if len(items) > bulk.MAX_ITEMS:
+            return helpers.response(data=None, message=f"Tối đa {bulk.MAX_ITEMS} bản ghi mỗi lần", code="G605", status="Error")
+        valid, results = bulk.validate_items(items, RecruitmentProposalBase)
+        existing = await bulk.find_existing(db, RecruitmentProposal.code, [p.code for _, p in valid])
+        valid, errors = bulk.drop_duplicates(valid, lambda p: p.code, existing, "Mã đề xuất đã tồn tại")
+        results += errors
+
+        rows = [{"recruitment_proposal_id": str(uuid.uuid4()), **p.dict()} for _, p in valid]
+        await bulk.insert_many(db, RecruitmentProposal, rows)
+        # Ghi vào bảng lịch sử
+        await bulk.insert_many(db, RecruitmentProposalHistory, [
+            {"recruitment_proposal_id": row["recruitment_proposal_id"], "status": row["status"]} for row in rows
+        ])
+        await summary.proposals_changed(db, added=rows)
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
+        results += [bulk.item_created(index, row["recruitment_proposal_id"]) for (index, _), row in zip(valid, rows)]
+        return helpers.response(data=bulk.summary(results), message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
 # Get All Recruitment Proposals
 @router.get("/recruitment_proposal")
-def get_all_recruitment_proposals(
+async def get_all_recruitment_proposals(
+    request: Request,
     status: Optional[Literal["approve", "pending", "reject", "done"]] = None, 
     user_ids: Optional[str] = Query(None, description="Danh sách user_id, phân cách bằng dấu ','"),
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="NextCursor của trang trước"),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        query = db.query(RecruitmentProposal)
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "recruitment_proposal")
+        if not_modified:
+            return not_modified
+        # Màn hình danh sách thường không cần desc/benefits (Text): chỉ SELECT các cột được yêu cầu
+        schema, columns = helpers.fieldset(RecruitmentProposalOut, fields)
+        query = select(RecruitmentProposal).options(helpers.load_columns(RecruitmentProposal, columns))
         
         if status:
-            query = query.filter(RecruitmentProposal.status == status)
+            query = query.where(RecruitmentProposal.status == status)
 
         if user_ids:
             id_list = user_ids.split(",")
-            query = query.filter(RecruitmentProposal.user_id.in_(id_list))
+            query = query.where(RecruitmentProposal.user_id.in_(id_list))
         
-        proposals = query.all()
+        proposals, next_cursor = await helpers.paginate(db, query, [RecruitmentProposal.recruitment_proposal_id], limit, after)
 
-        return helpers.response(data=proposals, message="Thành công")
+        return helpers.page_response(data=helpers.serialize(schema, proposals), next_cursor=next_cursor, message="Thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Export Recruitment Proposals (stream CSV/NDJSON, cùng bộ lọc với danh sách)
+@router.get("/recruitment_proposal/export")
+async def export_recruitment_proposals(
+    request: Request,
+    format: Literal["csv", "ndjson"] = "csv",
+    status: Optional[Literal["approve", "pending", "reject", "done"]] = None,
+    user_ids: Optional[str] = Query(None, description="Danh sách user_id, phân cách bằng dấu ','"),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_user)):
+    try:
+        schema, columns = helpers.fieldset(RecruitmentProposalOut, fields)
+        query = export.query(RecruitmentProposal, columns, [RecruitmentProposal.recruitment_proposal_id])
+        if status:
+            query = query.where(RecruitmentProposal.status == status)
+        if user_ids:
+            query = query.where(RecruitmentProposal.user_id.in_(user_ids.split(",")))
+        return export.response(read_session_factory(request), query, schema, format, "recruitment_proposals")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Get Recruitment Proposal by ID
 @router.get("/recruitment_proposal/{recruitment_proposal_id}")
-def get_recruitment_proposal_by_id(recruitment_proposal_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_recruitment_proposal_by_id(request: Request, recruitment_proposal_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        proposal = db.query(RecruitmentProposal).filter(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id).first()
+        # Dữ liệu chưa đổi kể từ lần trước: trả 304, không truy vấn/serialize
+        tag, not_modified = await table_versions.check(request, db, "recruitment_proposal")
+        if not_modified:
+            return not_modified
+        schema, columns = helpers.fieldset(RecruitmentProposalOut, fields)
+        proposal = (await db.execute(
+            select(RecruitmentProposal).options(helpers.load_columns(RecruitmentProposal, columns))
+            .where(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id)
+        )).scalars().first()
         if not proposal:
             return helpers.response(data=None, message="Bản ghi không tồn tại", code="G604", status="Error")
-        return helpers.response(data=proposal, message="Lấy thông tin đề xuất tuyển dụng thành công")
+        return helpers.response(data=helpers.serialize(schema, proposal), message="Lấy thông tin đề xuất tuyển dụng thành công", headers=table_versions.headers(tag))
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Rank Candidates for a Recruitment Proposal
+@router.get("/recruitment_proposal/{recruitment_proposal_id}/ranked_candidates")
+async def get_ranked_candidates(
+    recruitment_proposal_id: str,
+    scope: Literal["proposal", "all"] = Query("proposal", description="proposal: ứng viên của đề xuất, all: toàn bộ ứng viên"),
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    """Xếp hạng ứng viên theo độ tương đồng giữa nội dung CV và title/skills/desc của đề xuất"""
+    try:
+        schema, columns = helpers.fieldset(ScoredCandidateOut, fields)
+        proposal = (await db.execute(select(RecruitmentProposal).where(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id))).scalars().first()
+        if not proposal:
+            return helpers.response(data=None, message="Bản ghi không tồn tại", code="G604", status="Error")
+
+        candidate_ids = None
+        if scope == "proposal":
+            candidate_ids = (await db.execute(
+                select(Candidate.candidate_id).where(Candidate.recruitment_proposal_id == recruitment_proposal_id)
+            )).scalars().all()
+
+        index = await ranking.get_index()
+        ranked = await run_in_threadpool(index.rank, ranking.proposal_text(proposal), candidate_ids, limit)
+
+        candidates = {}
+        for chunk in bulk.chunked([cid for cid, _ in ranked]):
+            query = select(Candidate).options(helpers.load_columns(Candidate, columns)).where(Candidate.candidate_id.in_(chunk))
+            for c in (await db.execute(query)).scalars():
+                candidates[c.candidate_id] = c
+        result = []
+        for cid, score in ranked:
+            if cid in candidates:
+                candidates[cid].score = score
+                result.append(candidates[cid])
+        return helpers.response(data=helpers.serialize(schema, result), message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Update Recruitment Proposal
 @router.put("/recruitment_proposal/{recruitment_proposal_id}")
-def update_recruitment_proposal(recruitment_proposal_id: str, update: RecruitmentProposalBase, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_recruitment_proposal(recruitment_proposal_id: str, update: RecruitmentProposalBase, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        proposal = db.query(RecruitmentProposal).filter(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id).first()
+        proposal = (await db.execute(select(RecruitmentProposal).where(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id))).scalars().first()
         if not proposal:
             return helpers.response(data=None, message="Bản ghi không tồn tại", code="G604", status="Error")
 
+        before = summary.snapshot(proposal)
         old_status = proposal.status
         new_status = update.status
         status_changed = new_status and new_status != old_status    
@@ -112,51 +234,52 @@ def update_recruitment_proposal(recruitment_proposal_id: str, update: Recruitmen
         for field, value in update.dict(exclude_unset=True).items():
             setattr(proposal, field, value)
         
-        db.commit()
-        return helpers.response(data=proposal, message="Cập nhật đề xuất tuyển dụng thành công")
+        await summary.proposals_changed(db, added=[proposal], removed=[before])
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
+        return helpers.response(data=helpers.serialize(RecruitmentProposalOut, proposal), message="Cập nhật đề xuất tuyển dụng thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Recruitment Proposal
 @router.delete("/recruitment_proposal/{recruitment_proposal_id}")
-def delete_recruitment_proposal(recruitment_proposal_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_recruitment_proposal(recruitment_proposal_id: str, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        proposal = db.query(RecruitmentProposal).filter(RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id).first()
-        if not proposal:
+        deleted = await bulk.delete_returning(db, RecruitmentProposal.recruitment_proposal_id, [recruitment_proposal_id], *summary.PROPOSAL_COLUMNS)
+        if not deleted:
             return helpers.response(data=None, message="Bản ghi không tồn tại", code="G604", status="Error")
 
-        db.delete(proposal)
-        db.commit()
+        await summary.proposals_changed(db, removed=deleted)
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
         return helpers.response(data={"id": recruitment_proposal_id}, message="Xóa đề xuất tuyển dụng thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 # Delete Multiple Recruitment Proposals
 @router.delete("/recruitment_proposal")
-def delete_recruitment_proposals(recruitment_proposal_ids: list[str], db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_recruitment_proposals(recruitment_proposal_ids: list[str], db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
         if not recruitment_proposal_ids:
             return helpers.response(data=None, message="Danh sách ID không hợp lệ", code="G604", status="Error")
-        
-        proposals_to_delete = db.query(RecruitmentProposal).filter(RecruitmentProposal.recruitment_proposal_id.in_(recruitment_proposal_ids)).all()
-        
-        if not proposals_to_delete:
+
+        # RETURNING thêm các cột thống kê: trừ khỏi bảng tổng hợp mà không phải SELECT lại
+        deleted = await bulk.delete_returning(db, RecruitmentProposal.recruitment_proposal_id, recruitment_proposal_ids, *summary.PROPOSAL_COLUMNS)
+        if not deleted:
             return helpers.response(data=None, message="Không tìm thấy đề xuất nào trong danh sách", code="G604", status="Error")
-        
-        for proposal in proposals_to_delete:
-            db.delete(proposal)
 
-        db.commit()
-        return helpers.response(data={"deleted_proposal_ids": recruitment_proposal_ids}, message="Xóa các đề xuất tuyển dụng thành công")
+        await summary.proposals_changed(db, removed=deleted)
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
+        return helpers.response(data={"deleted_proposal_ids": [row.recruitment_proposal_id for row in deleted]}, message="Xóa các đề xuất tuyển dụng thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
-
 @router.put("/recruitment_proposal/{recruitment_proposal_id}/status")
-def change_status(
+async def change_status(
     recruitment_proposal_id: str = Path(..., description="ID của recruitment proposal"),
     status: str = Query(..., description="Trạng thái mới"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
     current_user: User = Depends(get_current_user)
 ):
     allowed_status = {"approve", "pending", "reject", "done"}
@@ -169,15 +292,21 @@ def change_status(
         )
 
     try:
-        proposal = db.query(RecruitmentProposal).filter(
+        proposal = (await db.execute(select(RecruitmentProposal).where(
             RecruitmentProposal.recruitment_proposal_id == recruitment_proposal_id
-        ).first()
+        ))).scalars().first()
 
         if not proposal:
             return helpers.response(data=None, message="Proposal không tồn tại!", code="G604", status="Error")
 
+        before = summary.snapshot(proposal)
+        if proposal.status != status:
+            # Ghi vào bảng lịch sử (dùng cho báo cáo thời gian xử lý)
+            db.add(RecruitmentProposalHistory(recruitment_proposal_id=recruitment_proposal_id, status=status))
         proposal.status = status
-        db.commit()
+        await summary.proposals_changed(db, added=[proposal], removed=[before])
+        await table_versions.bump(db, "recruitment_proposal")
+        await db.commit()
 
         return helpers.response(data={"id": recruitment_proposal_id, "new_status": status}, message="Cập nhật trạng thái thành công")
     except Exception as e:
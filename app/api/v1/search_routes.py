@@ -0,0 +1,68 @@
+from collections import defaultdict
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Optional
+from app.db import bulk
+from app.db.database import get_read_db
+from app.utils import helpers, search, cv_storage
+from app.models.candidates import Candidate
+from app.utils.auth import get_current_user
+from app.models.user import User
+from app.api.v1.candidates_routes import CandidateOut, ScoredCandidateOut
+from app.api.v1.recruitment_proposal_routes import RecruitmentProposalOut
+
+class ScoredProposalOut(RecruitmentProposalOut):
+    score: float
+
+SCHEMAS = {"recruitment_proposal": ScoredProposalOut, "candidate": ScoredCandidateOut}
+
+router = APIRouter()
+
+async def _cv_results(db: AsyncSession, rows: list, fields: str = None) -> list:
+    """Kết quả tìm theo nội dung CV: mỗi file CV kèm các ứng viên đang dùng file đó (`fields` áp dụng cho ứng viên)"""
+    schema, columns = helpers.fieldset(CandidateOut, fields)
+    # cv_file dùng để nhóm ứng viên theo file nên luôn được nạp
+    loader = helpers.load_columns(Candidate, columns + ["cv_file"])
+    names = [cv_storage.blob_name(item.sha256) for item, _ in rows]
+    candidates = defaultdict(list)
+    for chunk in bulk.chunked(names):
+        for c in (await db.execute(select(Candidate).options(loader).where(Candidate.cv_file.in_(chunk)))).scalars():
+            candidates[c.cv_file].append(c)
+    return [
+        {
+            "sha256": item.sha256,
+            "score": -score,
+            "candidates": helpers.serialize(schema, candidates[cv_storage.blob_name(item.sha256)]),
+        }
+        for item, score in rows
+    ]
+
+@router.get("/search")
+async def search_records(
+    q: str = Query(..., min_length=1, description="Từ khóa, khớp theo tiền tố (vd: 'pyth' khớp 'python'), không phân biệt dấu"),
+    entity: Literal["recruitment_proposal", "candidate", "cv"] = Query("recruitment_proposal", alias="type"),
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="NextCursor của trang trước"),
+    fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION),
+    db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    """
+    Tìm kiếm toàn văn, kết quả sắp xếp theo độ liên quan (score càng lớn càng liên quan)
+    - recruitment_proposal: title, desc, skills, benefits
+    - candidate: full_name, email, phone
+    - cv: nội dung file CV (trả về file CV + các ứng viên dùng file đó, `fields` chọn trường của ứng viên)
+    """
+    try:
+        if entity == "cv":
+            rows, next_cursor = await search.search(db, entity, q, limit, after)
+            return helpers.page_response(data=await _cv_results(db, rows, fields), next_cursor=next_cursor, message="Thành công")
+        schema, columns = helpers.fieldset(SCHEMAS[entity], fields)
+        model = search.SEARCHABLE[entity][0]
+        rows, next_cursor = await search.search(db, entity, q, limit, after, [helpers.load_columns(model, columns)])
+        for item, score in rows:
+            item.score = -score
+        return helpers.page_response(data=helpers.serialize(schema, [item for item, _ in rows]), next_cursor=next_cursor, message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
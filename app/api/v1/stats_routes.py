@@ -0,0 +1,102 @@
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from datetime import date, timedelta
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_read_db
+from app.models.proposal_summary import ProposalSummary
+from app.models.candidate_summary import CandidateSummary
+from app.utils import helpers, summary, analytics
+from app.models.user import User
+from app.utils.auth import get_current_user
+
+class CandidateCountOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    recruitment_proposal_id: str
+    candidate_count: int
+
+router = APIRouter()
+
+def _group(rows: list, name: str, key) -> list:
+    """Cộng dồn các nhóm trong proposal_summary theo 1 chiều (status/department/job)"""
+    totals = {}
+    for row in rows:
+        item = totals.setdefault(key(row), {name: key(row), "count": 0, "quantity": 0})
+        item["count"] += row.proposal_count
+        item["quantity"] += row.quantity_total
+    return sorted(totals.values(), key=lambda item: -item["count"])
+
+# Thống kê cho dashboard: chỉ đọc bảng tổng hợp (vài dòng mỗi nhóm), không quét bảng đề xuất/ứng viên
+@router.get("/stats")
+async def get_stats(db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
+    try:
+        rows = (await db.execute(select(ProposalSummary))).scalars().all()
+        candidate_total, proposals_with_candidates = (await db.execute(
+            select(func.coalesce(func.sum(CandidateSummary.candidate_count), 0), func.count())
+        )).one()
+
+        total = sum(row.proposal_count for row in rows)
+        bands = {}
+        for row in rows:
+            bands[row.salary_band] = bands.get(row.salary_band, 0) + row.proposal_count
+        data = {
+            "proposals": {
+                "total": total,
+                "quantity_total": sum(row.quantity_total for row in rows),
+                "open_headcount": sum(row.quantity_total for row in rows if row.status in summary.OPEN_STATUSES),
+                "salary_start_avg": sum(row.salary_start_total for row in rows) / total if total else None,
+                "salary_end_avg": sum(row.salary_end_total for row in rows) / total if total else None,
+                "by_status": _group(rows, "status", lambda row: row.status),
+                "by_department": _group(rows, "department_id", lambda row: row.department_id),
+                "by_job": _group(rows, "job_id", lambda row: row.job_id),
+                "salary_bands": [
+                    {"band": band, "min": summary.band_range(band)[0], "max": summary.band_range(band)[1], "count": bands[band]}
+                    for band in sorted(bands)
+                ],
+            },
+            "candidates": {"total": candidate_total, "proposals_with_candidates": proposals_with_candidates},
+        }
+        return helpers.response(data=data, message="Thành công")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Số ứng viên theo từng đề xuất (đề xuất chưa có ứng viên không có trong danh sách)
+@router.get("/stats/candidates")
+async def get_candidate_counts(
+    recruitment_proposal_ids: Optional[str] = Query(None, description="Lọc theo danh sách ID, phân cách bằng dấu ','"),
+    limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="NextCursor của trang trước"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        query = select(CandidateSummary)
+        if recruitment_proposal_ids:
+            query = query.where(CandidateSummary.recruitment_proposal_id.in_(recruitment_proposal_ids.split(',')))
+        counts, next_cursor = await helpers.paginate(db, query, [CandidateSummary.recruitment_proposal_id], limit, after)
+        return helpers.page_response(data=helpers.serialize(CandidateCountOut, counts), next_cursor=next_cursor, message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
+
+# Thời gian xử lý đề xuất: thời gian ở từng trạng thái, thời gian tới khi done (percentile), số đề xuất theo phòng ban/tháng
+@router.get("/stats/proposal_history")
+async def get_proposal_history_stats(
+    start: Optional[date] = Query(None, description="Từ ngày (mặc định: 1 năm trước ngày kết thúc)"),
+    end: Optional[date] = Query(None, description="Tới ngày, tính cả ngày này (mặc định: hôm nay)"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        end = end or date.today()
+        start = start or end - timedelta(days=365)
+        if start > end:
+            return helpers.response(data=None, message="start phải trước end", code="G605", status="Error")
+        report = await analytics.proposal_report(db, start, end + timedelta(days=1))
+        return helpers.response(data={"start": start, "end": end, **report}, message="Thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
+    except Exception as e:
+        return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, load_only, defer
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import load_only, defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_read_db, get_write_db
 from app.models.user import User
-from app.utils import helpers
-from pydantic import BaseModel
-from sqlalchemy import text
+from app.utils import helpers, passwords
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import text, select
 from typing import List, Optional
+from datetime import datetime
 import uuid
-from app.utils.auth import get_current_user
+from app.utils.auth import get_current_user, invalidate_user
 
 # Định nghĩa schema Pydantic
 class UserModel(BaseModel):
@@ -16,24 +18,37 @@ class UserModel(BaseModel):
     password: str
     fullname: Optional[str] = None
     role_code: Optional[str] = "user"
-    
+
+# Schema trả về: không có password/token_version
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    user_id: str
+    username: str
+    email: str
+    fullname: Optional[str] = None
+    role_code: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 
 # Tạo router FastAPI
 router = APIRouter()
 
 @router.get("/users")
-def get_all_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_users(limit: int = Query(helpers.DEFAULT_PAGE_SIZE, ge=1, le=helpers.MAX_PAGE_SIZE), after: Optional[str] = Query(None, description="NextCursor của trang trước"), fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        users = db.query(User).all()
-        users_dict = [{**user.__dict__, "password": None} for user in users] 
-        return helpers.response(data=users_dict, message="Lấy danh sách user thành công")
+        # Chỉ SELECT các cột của UserOut: không đọc cột password
+        schema, columns = helpers.fieldset(UserOut, fields)
+        users, next_cursor = await helpers.paginate(db, select(User).options(helpers.load_columns(User, columns)), [User.user_id], limit, after)
+        return helpers.page_response(data=helpers.serialize(schema, users), next_cursor=next_cursor, message="Lấy danh sách user thành công")
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception  as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.post("/users")
-def create_user(user: UserModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_user(user: UserModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        existing_user = db.query(User).filter(User.username == user.username).first()
+        existing_user = (await db.execute(select(User).where(User.username == user.username))).scalars().first()
         if existing_user:
             return helpers.response(
                 data=None,
@@ -42,7 +57,7 @@ def create_user(user: UserModel, db: Session = Depends(get_db), current_user: Us
                 status="Error"
             )
 
-        existing_user = db.query(User).filter(User.email == user.email).first()
+        existing_user = (await db.execute(select(User).where(User.email == user.email))).scalars().first()
         if existing_user:
             return helpers.response(
                 data=None,
@@ -54,22 +69,22 @@ def create_user(user: UserModel, db: Session = Depends(get_db), current_user: Us
         new_user = User(
             user_id=str(uuid.uuid4()),
             username=user.username,
-            password=helpers.hash_password(user.password),  
+            password=await passwords.hash_password(user.password),
             email=user.email,
             fullname=user.fullname,
             role_code=user.role_code
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
         return helpers.response(data={"id": new_user.user_id}, message="Tạo user thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.get("/users/{user_id}")
-def get_user_by_id(user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_user_by_id(user_id: str, fields: Optional[str] = Query(None, description=helpers.FIELDS_DESCRIPTION), db: AsyncSession = Depends(get_read_db), current_user: User = Depends(get_current_user)):
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
+        schema, columns = helpers.fieldset(UserOut, fields)
+        user = (await db.execute(select(User).options(helpers.load_columns(User, columns)).where(User.user_id == user_id))).scalars().first()
         if not user:
             return helpers.response(
                 data=None,
@@ -77,11 +92,12 @@ def get_user_by_id(user_id: str, db: Session = Depends(get_db), current_user: Us
                 code="G604",
                 status="Error"
             )
-        user.password = None
         return helpers.response(
-            data=user,
+            data=helpers.serialize(schema, user),
             message="Lấy thông tin user thành công"
         )
+    except ValueError as e:
+        return helpers.response(data=None, message=str(e), code="G605", status="Error")
     except Exception as e:
         return helpers.response(
             data=None,
@@ -91,18 +107,18 @@ def get_user_by_id(user_id: str, db: Session = Depends(get_db), current_user: Us
         )
 
 @router.put("/users/{user_id}")
-def update_user(user_id: str, user_update: UserModel, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_user(user_id: str, user_update: UserModel, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
     try:
-        user = db.query(User).filter(User.user_id == user_id).first()
+        user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
         if not user:
             return helpers.response(data=None, message=f"Bản ghi không tồn tại!", code="G604", status="Error")
 
         # Kiểm tra username đã tồn tại ở user khác chưa
         if user_update.username:
-            existing = db.query(User).filter(
+            existing = (await db.execute(select(User).where(
                 User.username == user_update.username,
                 User.user_id != user_id
-            ).first()
+            ))).scalars().first()
             if existing:
                 return helpers.response(
                     data=None,
@@ -113,24 +129,40 @@ def update_user(user_id: str, user_update: UserModel, db: Session = Depends(get_
 
         update_data = user_update.dict(exclude_unset=True)
         if "password" in update_data:
-            update_data["password"] = helpers.hash_password(update_data["password"])
+            # Hash có salt nên không so sánh chuỗi hash được: cùng mật khẩu thì giữ hash cũ (không thu hồi token)
+            same, _ = await passwords.verify_password(update_data["password"], user.password)
+            if same:
+                del update_data["password"]
+            else:
+                update_data["password"] = await passwords.hash_password(update_data["password"])
+
+        # Đổi mật khẩu hoặc quyền thì các token đã cấp không còn hợp lệ
+        revoke = (
+            update_data.get("password", user.password) != user.password
+            or update_data.get("role_code", user.role_code) != user.role_code
+        )
 
         for field, value in update_data.items():
             setattr(user, field, value)
-        db.commit()
+        if revoke:
+            user.token_version = (user.token_version or 0) + 1
+        await db.commit()
+        if revoke:
+            invalidate_user(user_id)
         return helpers.response(data={"id": user_id}, message="Thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
 
 @router.delete("/users/{user_id}")
-def delete_user(user_id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    user = db.query(User).filter(User.user_id == user_id).first()
+async def delete_user(user_id: str, db: AsyncSession = Depends(get_write_db), current_user: User = Depends(get_current_user)):
+    user = (await db.execute(select(User).where(User.user_id == user_id))).scalars().first()
     if not user:
         return helpers.response(data=None, message=f"Bản ghi không tồn tại!", code="G604", status="Error")
 
     try:
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
+        invalidate_user(user_id)
         return helpers.response(data={"id": user_id}, message="Thành công")
     except Exception as e:
         return helpers.response(data=None, message=f"Lỗi: {str(e)}", code="G600", status="Error")
@@ -0,0 +1,85 @@
+"""
+So sánh 2 file kết quả của app.benchmark.run theo từng (kịch bản, concurrency).
+
+Chậm đi (regression): p95 tăng hoặc throughput giảm quá --threshold %, hoặc số lỗi tăng.
+Chỉ nên so sánh các lần chạy cùng máy, cùng --server/--workers và cùng dữ liệu seed (xem "meta").
+
+CLI:
+    python -m app.benchmark.compare baseline.json current.json [--threshold 10]
+Thoát với mã 1 nếu có kịch bản chậm đi (dùng được trong CI).
+"""
+import argparse
+import json
+import sys
+
+# Các tham số phải giống nhau thì số liệu mới so sánh được
+COMPARABLE_META = ("server", "workers", "cpu_count", "password_scheme", "data")
+
+def _change(old, new):
+    """% thay đổi, None nếu thiếu số liệu"""
+    if old in (None, 0) or new is None:
+        return None
+    return round((new - old) / old * 100, 1)
+
+def compare(baseline: dict, current: dict, threshold: float = 10) -> list:
+    old = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = old.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        row = {"endpoint": result["endpoint"], "concurrency": result["concurrency"]}
+        for name in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb", "errors"):
+            row[name] = (before.get(name), result.get(name), _change(before.get(name), result.get(name)))
+        p95_change, rps_change = row["p95_ms"][2], row["throughput_rps"][2]
+        row["regression"] = (
+            (p95_change is not None and p95_change > threshold)
+            or (rps_change is not None and rps_change < -threshold)
+            or (result.get("errors") or 0) > (before.get("errors") or 0)
+        )
+        rows.append(row)
+    return rows
+
+def meta_differences(baseline: dict, current: dict) -> list:
+    return [
+        name for name in COMPARABLE_META
+        if baseline.get("meta", {}).get(name) != current.get("meta", {}).get(name)
+    ]
+
+def _cell(values: tuple) -> str:
+    old, new, change = values
+    if change is None:
+        return f"{old}->{new}"
+    return f"{new} ({change:+.1f}%)"
+
+def format_rows(rows: list) -> str:
+    lines = [f"{'endpoint':<72} {'conc':>4} {'p50_ms':>18} {'p95_ms':>18} {'throughput_rps':>18} {'errors':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['endpoint'][:72]:<72} {row['concurrency']:>4} {_cell(row['p50_ms']):>18} {_cell(row['p95_ms']):>18} "
+            f"{_cell(row['throughput_rps']):>18} {_cell(row['errors']):>8}" + ("  CHẬM ĐI" if row["regression"] else "")
+        )
+    regressions = sum(1 for row in rows if row["regression"])
+    lines.append(f"{len(rows)} kịch bản, {regressions} chậm đi")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh kết quả benchmark với lần chạy trước")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10, help="Ngưỡng (%%) coi là chậm đi")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    different = meta_differences(baseline, current)
+    if different:
+        print("Lưu ý: 2 lần chạy khác cấu hình:", ", ".join(different))
+    rows = compare(baseline, current, args.threshold)
+    print(format_rows(rows))
+    sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+if __name__ == "__main__":
+    main()
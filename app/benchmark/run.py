@@ -0,0 +1,310 @@
+"""
+Benchmark các route /v1 trên dữ liệu giả (app.benchmark.seed), ghi kết quả JSON để so sánh giữa các lần chạy.
+
+- inprocess (mặc định): gọi app trực tiếp qua httpx.ASGITransport, không qua mạng. Background task (trích xuất
+  text CV, ...) chạy xong trước khi ASGITransport trả response nên được tính vào thời gian request.
+- uvicorn: chạy `uvicorn app.main:app --workers N` ở process con, gọi qua HTTP.
+- Mỗi kịch bản chạy ở từng mức concurrency (số client gửi request liên tục): p50/p95/p99, throughput, số lỗi
+  (HTTP >= 400 hoặc Status "Error") và RSS lớn nhất của process chạy app (tổng các worker) trong lúc đo.
+  inprocess: RSS gồm cả phần client của benchmark. RSS đọc từ /proc, hệ điều hành khác ghi null.
+- Database và thư mục CV được chép lại từ snapshot trước mỗi lần chạy: các lần chạy luôn bắt đầu từ cùng dữ liệu.
+
+CLI:
+    python -m app.benchmark.run [--concurrency 1,8,32] [--requests 200] [--only job,stats]
+                                [--server uvicorn --workers 4] [--output result.json] [--baseline old.json]
+    python -m app.benchmark.compare old.json new.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from app.benchmark import seed, scenarios
+
+PERCENTILES = (0.5, 0.95, 0.99)
+RSS_INTERVAL = 0.05  # giây
+SERVER_START_TIMEOUT = 60  # giây
+ERROR_MARKER = b'"Status":"Error"'
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# ----- Đo -----
+
+def percentile(sorted_values: list, p: float):
+    """Nearest-rank, giống app.utils.analytics"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(math.ceil(p * len(sorted_values)) - 1, 0)]
+
+class RssSampler:
+    """RSS lớn nhất (bytes) của process gốc và các process con trong lúc đo, lấy mẫu định kỳ từ /proc"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.supported = os.path.exists(f"/proc/{pid}/statm")
+        self.peak = 0
+
+    def _pids(self) -> list:
+        pids, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            pids.append(pid)
+            try:
+                for task in os.listdir(f"/proc/{pid}/task"):
+                    with open(f"/proc/{pid}/task/{task}/children") as f:
+                        pending += [int(child) for child in f.read().split()]
+            except OSError:
+                continue
+        return pids
+
+    def current(self) -> int:
+        total = 0
+        for pid in self._pids():
+            try:
+                with open(f"/proc/{pid}/statm") as f:
+                    total += int(f.read().split()[1]) * _PAGE_SIZE
+            except OSError:
+                continue  # Process vừa kết thúc
+        return total
+
+    def reset(self):
+        self.peak = self.current() if self.supported else 0
+
+    async def run(self):
+        while self.supported:
+            self.peak = max(self.peak, self.current())
+            await asyncio.sleep(RSS_INTERVAL)
+
+def _is_error(response) -> bool:
+    return response.status_code >= 400 or ERROR_MARKER in response.content[:100]
+
+async def _send(client, scenario: scenarios.Scenario, ctx: dict, i: int):
+    kwargs = scenario.build(ctx, i)
+    return await client.request(scenario.method, kwargs.pop("url"), **kwargs)
+
+async def measure(client, scenario: scenarios.Scenario, ctx: dict, concurrency: int, requests: int, warmup: int, sampler: RssSampler) -> dict:
+    total = warmup + requests
+    if scenario.prepare:
+        await scenario.prepare(client, ctx, total)
+    for i in range(warmup):
+        await _send(client, scenario, ctx, i)
+
+    latencies, errors, sample_error = [], 0, None
+    counter = itertools.count(warmup)
+
+    async def worker():
+        nonlocal errors, sample_error
+        while (i := next(counter)) < total:
+            started = time.perf_counter()
+            try:
+                response = await _send(client, scenario, ctx, i)
+            except Exception as e:
+                errors += 1
+                sample_error = sample_error or f"{type(e).__name__}: {e}"
+                continue
+            latencies.append(time.perf_counter() - started)
+            if _is_error(response):
+                errors += 1
+                sample_error = sample_error or f"{response.status_code} {response.text[:200]}"
+
+    sampler.reset()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        "endpoint": scenario.name,
+        "method": scenario.method,
+        "path": scenario.path,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "peak_rss_mb": round(sampler.peak / 2 ** 20, 1) if sampler.supported else None,
+        "sample_error": sample_error,
+    }
+    for p in PERCENTILES:
+        value = percentile(latencies, p)
+        result[f"p{round(p * 100)}_ms"] = round(value * 1000, 3) if value is not None else None
+    return result
+
+# ----- Server -----
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    """uvicorn nhiều worker ở process con (dùng DATABASE_URL/CV_UPLOAD_DIR của benchmark qua biến môi trường)"""
+    import httpx
+
+    # Process group riêng: dừng được cả các process pool (hash mật khẩu, trích xuất CV) của từng worker
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ], start_new_session=hasattr(os, "killpg"))
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn đã dừng (exit code {process.returncode})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/db", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError("uvicorn không khởi động kịp")
+
+def stop_server(process: subprocess.Popen):
+    for sig in (signal.SIGTERM, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, sig)
+            else:
+                process.terminate()
+            process.wait(timeout=30)
+            return
+        except ProcessLookupError:
+            return
+        except subprocess.TimeoutExpired:
+            continue
+
+async def _login(client) -> str:
+    username, password = seed.BENCH_USER
+    response = await client.post("/v1/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def _run_all(client, selected: list, ctx: dict, args, sampler: RssSampler) -> list:
+    client.headers["Authorization"] = f"Bearer {await _login(client)}"
+    sampling = asyncio.create_task(sampler.run())
+    results = []
+    try:
+        for scenario in selected:
+            requests = min(args.requests, scenario.max_requests or args.requests)
+            for concurrency in args.concurrency:
+                result = await measure(client, scenario, ctx, concurrency, requests, args.warmup, sampler)
+                results.append(result)
+                print(_format_row(result), flush=True)
+    finally:
+        sampling.cancel()
+    return results
+
+async def run(args) -> list:
+    import httpx
+    from app.db.database import SessionLocal
+
+    with SessionLocal() as session:
+        ctx = scenarios.load_context(session)
+    selected = scenarios.select_scenarios(args.only)
+    timeout = httpx.Timeout(args.timeout)
+    print(_format_header(), flush=True)
+
+    if args.server == "uvicorn":
+        process = start_server(args.port, args.workers)
+        try:
+            limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=timeout, limits=limits) as client:
+                return await _run_all(client, selected, ctx, args, RssSampler(process.pid))
+        finally:
+            stop_server(process)
+
+    from app.main import app
+    # ASGITransport không chạy lifespan: chạy thủ công để giống lúc chạy thật (migration, đóng process pool)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=timeout) as client:
+            return await _run_all(client, selected, ctx, args, RssSampler(os.getpid()))
+
+# ----- Kết quả -----
+
+_COLUMNS = (("endpoint", 72), ("concurrency", 5), ("throughput_rps", 10), ("p50_ms", 10), ("p95_ms", 10), ("p99_ms", 10), ("errors", 6), ("peak_rss_mb", 8))
+
+def _format_header() -> str:
+    return " ".join(f"{name[:width]:>{width}}" if i else f"{name:<{width}}" for i, (name, width) in enumerate(_COLUMNS))
+
+def _format_row(result: dict) -> str:
+    cells = []
+    for i, (name, width) in enumerate(_COLUMNS):
+        value = result.get(name)
+        value = "-" if value is None else str(value)
+        cells.append(f"{value[:width]:>{width}}" if i else f"{value[:width]:<{width}}")
+    return " ".join(cells)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các route /v1 trên dữ liệu giả")
+    parser.add_argument("--workdir", default=seed.DEFAULT_WORKDIR)
+    parser.add_argument("--reseed", action="store_true", help="Seed lại dữ liệu (theo các tham số số lượng bên dưới)")
+    seed.add_volume_arguments(parser)
+    parser.add_argument("--concurrency", type=lambda v: [int(c) for c in v.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Số request đo cho mỗi kịch bản ở mỗi mức concurrency")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", type=lambda v: v.split(","), default=None, help="Chỉ chạy kịch bản có tên chứa 1 trong các chuỗi này")
+    parser.add_argument("--server", choices=["inprocess", "uvicorn"], default="inprocess")
+    parser.add_argument("--workers", type=int, default=4, help="Số worker uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60, help="Timeout mỗi request (giây)")
+    parser.add_argument("--output", default=None, help="File JSON kết quả (mặc định <workdir>/results/<thời điểm>.json)")
+    parser.add_argument("--baseline", default=None, help="File kết quả cũ để so sánh sau khi chạy")
+    parser.add_argument("--threshold", type=float, default=10, help="Ngưỡng (%%) coi là chậm đi khi so sánh")
+    args = parser.parse_args()
+
+    paths = seed.configure(args.workdir)
+    if args.reseed or not seed.has_snapshot(args.workdir):
+        print("seed:", seed.seed(args.workdir, seed.volumes_from_args(args), args.seed), flush=True)
+    else:
+        seed.restore(args.workdir)
+
+    from app import config
+
+    started_at = datetime.now(timezone.utc)
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "started_at": started_at.isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "server": args.server,
+            "workers": args.workers if args.server == "uvicorn" else 1,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "password_scheme": config.PASSWORD_SCHEME,
+            "data": seed.snapshot_info(args.workdir),
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(paths["workdir"], "results", started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Kết quả:", output)
+
+    if args.baseline:
+        from app.benchmark import compare
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        different = compare.meta_differences(baseline, report)
+        if different:
+            print("Lưu ý: khác cấu hình với baseline:", ", ".join(different))
+        rows = compare.compare(baseline, report, args.threshold)
+        print(compare.format_rows(rows))
+        sys.exit(1 if any(row["regression"] for row in rows) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Kịch bản benchmark cho từng route /v1.
+
+- build(ctx, i): tham số httpx (url, params, json, data, files) của request thứ i.
+- prepare(client, ctx, n): tạo trước dữ liệu mà request sẽ sửa/xóa (vd: n job cho DELETE /v1/job/{job_id}),
+  chạy trước khi bắt đầu đo. Dữ liệu tạo qua chính API nên chạy được cả khi app ở process khác (uvicorn).
+- Tên kịch bản = METHOD + path template (trùng nhãn route của /metrics), thêm [biến thể] khi 1 route có nhiều cách gọi.
+"""
+import csv
+import io
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Optional
+from app.benchmark import seed
+
+SAMPLE_SIZE = 1000  # Số ID mỗi loại lấy từ dữ liệu seed để request xoay vòng
+BULK_SIZE = 100     # Số phần tử mỗi request bulk
+DELETE_MANY = 10    # Số ID mỗi request xóa nhiều
+SLOW_REQUESTS = 20  # Route hash mật khẩu (bcrypt/argon2): số request tối đa mỗi mức concurrency
+PREPARE_BATCH = 1000
+
+@dataclass
+class Scenario:
+    method: str
+    path: str
+    build: Callable
+    prepare: Optional[Callable] = None
+    variant: str = ""
+    max_requests: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.method} {self.path}" + (f" [{self.variant}]" if self.variant else "")
+
+def load_context(session) -> dict:
+    """ID mẫu từ database đã seed (đọc trước khi chạy, không tính vào thời gian đo)"""
+    from sqlalchemy import select
+    from app.models.user import User
+    from app.models.job import Job
+    from app.models.department import Department
+    from app.models.recruitment_proposal import RecruitmentProposal
+    from app.models.candidates import Candidate
+
+    def sample(query):
+        return session.execute(query.limit(SAMPLE_SIZE)).scalars().all()
+
+    return {
+        "users": sample(select(User.user_id).where(User.username != seed.BENCH_USER[0]).order_by(User.user_id)),
+        "jobs": sample(select(Job.job_id).order_by(Job.job_id)),
+        "departments": sample(select(Department.department_id).order_by(Department.department_id)),
+        "proposals": sample(select(RecruitmentProposal.recruitment_proposal_id).order_by(RecruitmentProposal.recruitment_proposal_id)),
+        "candidates": sample(select(Candidate.candidate_id).order_by(Candidate.candidate_id)),
+        "cv_candidates": sample(select(Candidate.candidate_id).where(Candidate.cv_file.isnot(None)).order_by(Candidate.candidate_id)),
+        "cv": seed.pdf_stub("Benchmark candidate python sql docker Ha Noi"),
+        "seq": itertools.count(),
+        "prepared": {},
+    }
+
+def _pick(ctx: dict, kind: str, i: int):
+    return ctx[kind][i % len(ctx[kind])]
+
+def _code(ctx: dict, prefix: str) -> str:
+    # Dữ liệu seed dùng mã D/J/P + số: mã của benchmark không trùng
+    return f"B{prefix}{next(ctx['seq']):08d}"
+
+# ----- Body tạo mới -----
+
+def job_body(ctx: dict) -> dict:
+    return {"name": "Benchmark job", "code": _code(ctx, "J"), "desc": "python sql"}
+
+def department_body(ctx: dict) -> dict:
+    return {"name": "Benchmark department", "code": _code(ctx, "D"), "desc": "Ha Noi"}
+
+def proposal_body(ctx: dict) -> dict:
+    i = next(ctx["seq"])
+    return {
+        "code": _code(ctx, "P"),
+        "title": "Benchmark python developer",
+        "desc": "python fastapi sql docker",
+        "skills": "python, sql, docker",
+        "quantity": 2,
+        "location": "Ha Noi",
+        "job_id": _pick(ctx, "jobs", i),
+        "department_id": _pick(ctx, "departments", i),
+        "salary_start": 15_000_000,
+        "salary_end": 25_000_000,
+    }
+
+def candidate_body(ctx: dict) -> dict:
+    i = next(ctx["seq"])
+    return {
+        "full_name": "Benchmark Candidate",
+        "email": f"bench{i}@example.com",
+        "phone": "0900000000",
+        "recruitment_proposal_id": _pick(ctx, "proposals", i),
+    }
+
+def user_body(ctx: dict) -> dict:
+    i = next(ctx["seq"])
+    return {"username": f"bench_user{i}", "email": f"bench_user{i}@example.com", "password": "bench", "fullname": "Bench"}
+
+BODIES = {
+    "job": job_body,
+    "department": department_body,
+    "recruitment_proposal": proposal_body,
+    "candidate": candidate_body,
+}
+
+# ----- Chuẩn bị dữ liệu cho route sửa/xóa -----
+
+def _created(kind: str, per_request: int = 1):
+    """prepare: tạo n * per_request bản ghi qua POST /v1/<kind>/bulk, lưu (id, body) theo tên kind"""
+    async def prepare(client, ctx: dict, n: int):
+        bodies = [BODIES[kind](ctx) for _ in range(n * per_request)]
+        prepared = ctx["prepared"][kind] = []
+        for start in range(0, len(bodies), PREPARE_BATCH):
+            chunk = bodies[start:start + PREPARE_BATCH]
+            response = await client.post(f"/v1/{kind}/bulk", json=chunk)
+            prepared += [(item["id"], chunk[item["index"]]) for item in response.json()["Data"]["items"] if item["status"] == "Success"]
+    return prepare
+
+async def _created_users(client, ctx: dict, n: int):
+    """Không có API bulk cho user: tạo từng user (mỗi lần 1 hash mật khẩu)"""
+    prepared = ctx["prepared"]["users"] = []
+    for _ in range(n):
+        body = user_body(ctx)
+        response = await client.post("/v1/users", json=body)
+        prepared.append((response.json()["Data"]["id"], body))
+
+def _prepared(ctx: dict, kind: str, i: int) -> tuple:
+    return ctx["prepared"][kind][i]
+
+def _prepared_many(ctx: dict, kind: str, i: int) -> list:
+    return [item_id for item_id, _ in ctx["prepared"][kind][i * DELETE_MANY:(i + 1) * DELETE_MANY]]
+
+# ----- Danh sách kịch bản -----
+
+def _crud(kind: str, id_name: str, sample: str) -> list:
+    """Các route CRUD giống nhau của job/department"""
+    base = f"/v1/{kind}"
+    return [
+        Scenario("POST", base, lambda ctx, i: {"url": base, "json": BODIES[kind](ctx)}),
+        Scenario("POST", f"{base}/bulk", lambda ctx, i: {"url": f"{base}/bulk", "json": [BODIES[kind](ctx) for _ in range(BULK_SIZE)]}),
+        Scenario("GET", base, lambda ctx, i: {"url": base, "params": {"limit": 50}}),
+        Scenario("GET", f"{base}/{{{id_name}}}", lambda ctx, i: {"url": f"{base}/{_pick(ctx, sample, i)}"}),
+        Scenario(
+            "PUT", f"{base}/{{{id_name}}}",
+            lambda ctx, i: {"url": f"{base}/{_prepared(ctx, kind, i)[0]}", "json": {**_prepared(ctx, kind, i)[1], "desc": "updated"}},
+            prepare=_created(kind),
+        ),
+        Scenario("DELETE", f"{base}/{{{id_name}}}", lambda ctx, i: {"url": f"{base}/{_prepared(ctx, kind, i)[0]}"}, prepare=_created(kind)),
+        Scenario("DELETE", base, lambda ctx, i: {"url": base, "json": _prepared_many(ctx, kind, i)}, prepare=_created(kind, DELETE_MANY)),
+    ]
+
+def _proposal_item(ctx: dict, i: int) -> str:
+    return f"/v1/recruitment_proposal/{_pick(ctx, 'proposals', i)}"
+
+def _proposal_ids(ctx: dict, i: int) -> str:
+    """Vài đề xuất liền nhau trong danh sách mẫu, phân cách bằng dấu ','"""
+    start = i * DELETE_MANY % max(len(ctx["proposals"]) - DELETE_MANY, 1)
+    return ",".join(ctx["proposals"][start:start + DELETE_MANY])
+
+def _candidate_form(ctx: dict, i: int) -> dict:
+    return {"url": "/v1/candidate", "data": candidate_body(ctx), "files": {"cv_file": ("cv.pdf", ctx["cv"], "application/pdf")}}
+
+def candidate_csv(ctx: dict, rows: int, invalid: int = 0) -> bytes:
+    """File CSV cho POST /v1/candidate/import; `invalid` dòng cuối thiếu email (có dữ liệu cho API xem lỗi)"""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=["full_name", "email", "phone", "recruitment_proposal_id"])
+    writer.writeheader()
+    for n in range(rows):
+        body = candidate_body(ctx)
+        if n >= rows - invalid:
+            body["email"] = ""
+        writer.writerow(body)
+    return out.getvalue().encode()
+
+def _candidate_import(ctx: dict, i: int) -> dict:
+    return {"url": "/v1/candidate/import", "files": {"file": ("candidates.csv", candidate_csv(ctx, BULK_SIZE), "text/csv")}}
+
+async def _created_import(client, ctx: dict, n: int):
+    """Các request xem tiến độ/lỗi dùng chung 1 lần import"""
+    response = await client.post("/v1/candidate/import", files={"file": ("candidates.csv", candidate_csv(ctx, BULK_SIZE, DELETE_MANY))})
+    ctx["prepared"]["import"] = [(response.json()["Data"]["import_id"], None)]
+
+def _login(ctx: dict, i: int) -> dict:
+    username, password = seed.BENCH_USER
+    return {"url": "/v1/login", "data": {"username": username, "password": password}}
+
+SCENARIOS = [
+    Scenario("POST", "/v1/login", _login, max_requests=SLOW_REQUESTS),
+
+    Scenario("GET", "/v1/users", lambda ctx, i: {"url": "/v1/users", "params": {"limit": 50}}),
+    Scenario("POST", "/v1/users", lambda ctx, i: {"url": "/v1/users", "json": user_body(ctx)}, max_requests=SLOW_REQUESTS),
+    Scenario("GET", "/v1/users/{user_id}", lambda ctx, i: {"url": f"/v1/users/{_pick(ctx, 'users', i)}"}),
+    Scenario(
+        "PUT", "/v1/users/{user_id}",
+        lambda ctx, i: {"url": f"/v1/users/{_prepared(ctx, 'users', i)[0]}", "json": {**_prepared(ctx, 'users', i)[1], "fullname": "Updated"}},
+        prepare=_created_users, max_requests=SLOW_REQUESTS,
+    ),
+    Scenario(
+        "DELETE", "/v1/users/{user_id}", lambda ctx, i: {"url": f"/v1/users/{_prepared(ctx, 'users', i)[0]}"},
+        prepare=_created_users, max_requests=SLOW_REQUESTS,
+    ),
+
+    *_crud("job", "job_id", "jobs"),
+    *_crud("department", "department_id", "departments"),
+
+    Scenario("POST", "/v1/recruitment_proposal", lambda ctx, i: {"url": "/v1/recruitment_proposal", "json": proposal_body(ctx)}),
+    Scenario(
+        "POST", "/v1/recruitment_proposal/bulk",
+        lambda ctx, i: {"url": "/v1/recruitment_proposal/bulk", "json": [proposal_body(ctx) for _ in range(BULK_SIZE)]},
+    ),
+    Scenario("GET", "/v1/recruitment_proposal", lambda ctx, i: {"url": "/v1/recruitment_proposal", "params": {"limit": 50}}),
+    Scenario(
+        "GET", "/v1/recruitment_proposal", lambda ctx, i: {"url": "/v1/recruitment_proposal", "params": {"limit": 50, "status": "approve"}},
+        variant="status",
+    ),
+    Scenario("GET", "/v1/recruitment_proposal/{recruitment_proposal_id}", lambda ctx, i: {"url": _proposal_item(ctx, i)}),
+    Scenario(
+        "GET", "/v1/recruitment_proposal/{recruitment_proposal_id}/ranked_candidates",
+        lambda ctx, i: {"url": f"{_proposal_item(ctx, i)}/ranked_candidates", "params": {"scope": "all", "limit": 20}},
+    ),
+    Scenario(
+        "GET", "/v1/recruitment_proposal/export",
+        lambda ctx, i: {"url": "/v1/recruitment_proposal/export", "params": {"format": ("csv", "ndjson")[i % 2]}},
+        max_requests=SLOW_REQUESTS,
+    ),
+    Scenario(
+        "GET", "/v1/recruitment_proposal/export",
+        lambda ctx, i: {"url": "/v1/recruitment_proposal/export", "params": {"format": "ndjson", "status": "approve"}},
+        variant="status", max_requests=SLOW_REQUESTS,
+    ),
+    Scenario(
+        "PUT", "/v1/recruitment_proposal/{recruitment_proposal_id}",
+        lambda ctx, i: {
+            "url": f"/v1/recruitment_proposal/{_prepared(ctx, 'recruitment_proposal', i)[0]}",
+            "json": {**_prepared(ctx, 'recruitment_proposal', i)[1], "quantity": 3},
+        },
+        prepare=_created("recruitment_proposal"),
+    ),
+    Scenario(
+        "PUT", "/v1/recruitment_proposal/{recruitment_proposal_id}/status",
+        lambda ctx, i: {"url": f"{_proposal_item(ctx, i)}/status", "params": {"status": ("approve", "pending", "done", "reject")[i % 4]}},
+    ),
+    Scenario(
+        "DELETE", "/v1/recruitment_proposal/{recruitment_proposal_id}",
+        lambda ctx, i: {"url": f"/v1/recruitment_proposal/{_prepared(ctx, 'recruitment_proposal', i)[0]}"},
+        prepare=_created("recruitment_proposal"),
+    ),
+    Scenario(
+        "DELETE", "/v1/recruitment_proposal",
+        lambda ctx, i: {"url": "/v1/recruitment_proposal", "json": _prepared_many(ctx, "recruitment_proposal", i)},
+        prepare=_created("recruitment_proposal", DELETE_MANY),
+    ),
+
+    Scenario("GET", "/v1/recruitment_proposal_history", lambda ctx, i: {"url": "/v1/recruitment_proposal_history", "params": {"limit": 50}}),
+    Scenario(
+        "GET", "/v1/recruitment_proposal_history/{recruitment_proposal_id}",
+        lambda ctx, i: {"url": f"/v1/recruitment_proposal_history/{_pick(ctx, 'proposals', i)}"},
+    ),
+
+    Scenario("POST", "/v1/candidate", _candidate_form),
+    Scenario("POST", "/v1/candidate/bulk", lambda ctx, i: {"url": "/v1/candidate/bulk", "json": [candidate_body(ctx) for _ in range(BULK_SIZE)]}),
+    Scenario("POST", "/v1/candidate/import", _candidate_import),
+    Scenario(
+        "GET", "/v1/candidate/import/{import_id}",
+        lambda ctx, i: {"url": f"/v1/candidate/import/{_prepared(ctx, 'import', 0)[0]}"}, prepare=_created_import,
+    ),
+    Scenario(
+        "GET", "/v1/candidate/import/{import_id}/errors",
+        lambda ctx, i: {"url": f"/v1/candidate/import/{_prepared(ctx, 'import', 0)[0]}/errors", "params": {"limit": 50}},
+        prepare=_created_import,
+    ),
+    Scenario("GET", "/v1/candidate", lambda ctx, i: {"url": "/v1/candidate", "params": {"limit": 50}}),
+    Scenario(
+        "GET", "/v1/candidates/by-proposals",
+        lambda ctx, i: {"url": "/v1/candidates/by-proposals", "params": {"recruitment_proposal_ids": _proposal_ids(ctx, i)}},
+    ),
+    Scenario(
+        "GET", "/v1/candidate/export",
+        lambda ctx, i: {"url": "/v1/candidate/export", "params": {"format": "csv", "recruitment_proposal_ids": _proposal_ids(ctx, i)}},
+        variant="by-proposals",
+    ),
+    Scenario("GET", "/v1/candidate/{candidate_id}", lambda ctx, i: {"url": f"/v1/candidate/{_pick(ctx, 'candidates', i)}"}),
+    Scenario("GET", "/v1/candidate/{candidate_id}/cv", lambda ctx, i: {"url": f"/v1/candidate/{_pick(ctx, 'cv_candidates', i)}/cv"}),
+    Scenario("DELETE", "/v1/candidate/{candidate_id}", lambda ctx, i: {"url": f"/v1/candidate/{_prepared(ctx, 'candidate', i)[0]}"}, prepare=_created("candidate")),
+    Scenario("DELETE", "/v1/candidate", lambda ctx, i: {"url": "/v1/candidate", "json": _prepared_many(ctx, "candidate", i)}, prepare=_created("candidate", DELETE_MANY)),
+
+    Scenario("GET", "/v1/search", lambda ctx, i: {"url": "/v1/search", "params": {"q": seed.SKILLS[i % len(seed.SKILLS)], "type": "recruitment_proposal"}}, variant="recruitment_proposal"),
+    Scenario("GET", "/v1/search", lambda ctx, i: {"url": "/v1/search", "params": {"q": seed.LAST_NAMES[i % len(seed.LAST_NAMES)], "type": "candidate"}}, variant="candidate"),
+    Scenario("GET", "/v1/search", lambda ctx, i: {"url": "/v1/search", "params": {"q": seed.SKILLS[i % len(seed.SKILLS)], "type": "cv"}}, variant="cv"),
+
+    Scenario("GET", "/v1/stats", lambda ctx, i: {"url": "/v1/stats"}),
+    Scenario("GET", "/v1/stats/candidates", lambda ctx, i: {"url": "/v1/stats/candidates", "params": {"limit": 50}}),
+    Scenario("GET", "/v1/stats/proposal_history", lambda ctx, i: {"url": "/v1/stats/proposal_history"}),
+]
+
+def select_scenarios(only: list = None) -> list:
+    """Lọc kịch bản theo chuỗi con của tên (vd: ["job", "GET /v1/stats"])"""
+    if not only:
+        return list(SCENARIOS)
+    return [s for s in SCENARIOS if any(part in s.name for part in only)]
@@ -0,0 +1,287 @@
+"""
+Dữ liệu giả cho benchmark: database và thư mục CV riêng (không đụng dữ liệu thật), tái lập được
+(cùng --seed và cùng số lượng thì cùng dữ liệu; mốc thời gian lịch sử tính lùi từ lúc seed).
+
+Thư mục làm việc (--workdir, mặc định .benchmark):
+    bench.db, uploads/cv/...                  dữ liệu benchmark đang chạy (các API ghi vào đây)
+    snapshot/bench.db, snapshot/uploads/...   bản gốc ngay sau khi seed, được chép lại trước mỗi lần chạy
+    snapshot/seed.json                        seed và số lượng đã dùng
+
+Module chỉ import app.* bên trong hàm: configure() phải đặt DATABASE_URL/CV_UPLOAD_DIR trước khi app.config
+và engine được tạo.
+
+CLI:
+    python -m app.benchmark.seed [--workdir .benchmark] [--seed 42] [--proposals 5000] [--candidates 50000] ...
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+DEFAULT_WORKDIR = ".benchmark"
+DB_NAME = "bench.db"
+SNAPSHOT_DIR = "snapshot"
+
+# Số bản ghi mặc định; history: số lần chuyển trạng thái tối đa mỗi đề xuất, cvs: số file PDF khác nhau
+DEFAULT_VOLUMES = {
+    "users": 20,
+    "departments": 30,
+    "jobs": 100,
+    "proposals": 5000,
+    "history": 3,
+    "candidates": 50000,
+    "cvs": 300,
+}
+BENCH_USER = ("bench", "bench")  # username, password dùng để đăng nhập khi chạy benchmark
+
+SKILLS = [
+    "python", "java", "golang", "sql", "postgresql", "react", "vue", "angular", "docker", "kubernetes",
+    "aws", "linux", "fastapi", "django", "spring", "kotlin", "swift", "excel", "marketing", "sales",
+    "accounting", "recruiting", "english", "japanese", "photoshop", "figma", "testing", "selenium",
+]
+ROLES = ["Developer", "Engineer", "Analyst", "Designer", "Tester", "Manager", "Specialist", "Intern"]
+LOCATIONS = ["Ha Noi", "Ho Chi Minh", "Da Nang", "Can Tho", "Hai Phong", "Remote"]
+LAST_NAMES = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Phan", "Vu", "Dang", "Bui", "Do"]
+MIDDLE_NAMES = ["Van", "Thi", "Minh", "Duc", "Thanh", "Ngoc", "Quoc", "Hai"]
+FIRST_NAMES = ["An", "Binh", "Chi", "Dung", "Giang", "Hung", "Khanh", "Linh", "Mai", "Nam", "Phuong", "Quan", "Son", "Trang", "Vy"]
+# Trạng thái kế tiếp có thể có (giống luồng duyệt đề xuất thực tế)
+TRANSITIONS = {"pending": ["approve", "reject"], "approve": ["done", "pending"], "reject": ["pending"], "done": []}
+BATCH_SIZE = 5000
+
+def paths(workdir: str) -> dict:
+    workdir = os.path.abspath(workdir)
+    snapshot = os.path.join(workdir, SNAPSHOT_DIR)
+    return {
+        "workdir": workdir,
+        "db": os.path.join(workdir, DB_NAME),
+        "uploads": os.path.join(workdir, "uploads"),
+        "snapshot_db": os.path.join(snapshot, DB_NAME),
+        "snapshot_uploads": os.path.join(snapshot, "uploads"),
+        "snapshot_info": os.path.join(snapshot, "seed.json"),
+    }
+
+def configure(workdir: str) -> dict:
+    """Trỏ app vào database/thư mục CV của benchmark. Gọi trước khi import app.config"""
+    p = paths(workdir)
+    url = f"sqlite:///{p['db']}"
+    if "app.config" in sys.modules and sys.modules["app.config"].DATABASE_URL != url:
+        raise RuntimeError("app.config đã được import với DATABASE_URL khác, gọi configure() trước")
+    os.makedirs(p["workdir"], exist_ok=True)
+    os.environ["DATABASE_URL"] = url
+    os.environ["DATABASE_READ_URLS"] = ""
+    os.environ["CV_UPLOAD_DIR"] = os.path.join(p["uploads"], "cv")
+    return p
+
+def _remove_db(path: str):
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def _copy(src_db: str, src_uploads: str, dest_db: str, dest_uploads: str):
+    _remove_db(dest_db)
+    shutil.rmtree(dest_uploads, ignore_errors=True)
+    os.makedirs(os.path.dirname(dest_db), exist_ok=True)
+    shutil.copy2(src_db, dest_db)
+    if os.path.isdir(src_uploads):
+        shutil.copytree(src_uploads, dest_uploads)
+
+def has_snapshot(workdir: str) -> bool:
+    p = paths(workdir)
+    return os.path.exists(p["snapshot_db"]) and os.path.exists(p["snapshot_info"])
+
+def restore(workdir: str):
+    """Chép bản gốc đè lên dữ liệu của lần chạy trước. Gọi trước khi engine mở connection"""
+    p = paths(workdir)
+    _copy(p["snapshot_db"], p["snapshot_uploads"], p["db"], p["uploads"])
+
+def pdf_stub(text: str) -> bytes:
+    """PDF 1 trang tối thiểu có lớp text (ASCII), đủ để pypdf trích xuất"""
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    stream = f"BT /F1 11 Tf 50 750 Td ({escaped}) Tj ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}"
+
+def _history(rng: random.Random, proposal_id: str, max_steps: int, now: datetime) -> list:
+    """Chuỗi chuyển trạng thái của 1 đề xuất trong khoảng 400 ngày gần đây, bắt đầu từ pending"""
+    at = now - timedelta(days=rng.uniform(1, 400))
+    rows = [{"recruitment_proposal_id": proposal_id, "status": "pending", "change_at": at}]
+    for _ in range(rng.randint(0, max_steps)):
+        choices = TRANSITIONS[rows[-1]["status"]]
+        at += timedelta(hours=rng.expovariate(1 / 72))
+        if not choices or at >= now:
+            break
+        rows.append({"recruitment_proposal_id": proposal_id, "status": rng.choice(choices), "change_at": at})
+    return rows
+
+def _insert(session, model, rows: list):
+    from sqlalchemy import insert
+
+    for start in range(0, len(rows), BATCH_SIZE):
+        session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+def seed(workdir: str = DEFAULT_WORKDIR, volumes: dict = None, seed_value: int = 42) -> dict:
+    """Tạo lại database benchmark từ đầu rồi lưu bản gốc vào snapshot/. Trả về số bản ghi mỗi bảng"""
+    p = configure(workdir)
+    from sqlalchemy import text
+    from app import config
+    from app.db import migrations
+    from app.db.database import engine, SessionLocal
+    from app.models.user import User
+    from app.models.job import Job
+    from app.models.department import Department
+    from app.models.recruitment_proposal import RecruitmentProposal
+    from app.models.recruitment_proposal_history import RecruitmentProposalHistory
+    from app.models.candidates import Candidate
+    from app.models.cv_blob import CvBlob
+    from app.models.cv_text import CvText
+    from app.utils import cv_storage, password_schemes, summary
+    from app.utils.text_extract import extract_pdf_text
+
+    volumes = {**DEFAULT_VOLUMES, **(volumes or {})}
+    rng = random.Random(seed_value)
+    now = datetime.utcnow().replace(microsecond=0)
+    engine.dispose()
+    _remove_db(p["db"])
+    shutil.rmtree(p["uploads"], ignore_errors=True)
+    migrations.upgrade(engine)
+
+    # Mọi user dùng chung 1 hash: hash bằng KDF chậm cho từng user chỉ làm seed lâu thêm
+    password = password_schemes.SCHEMES[config.PASSWORD_SCHEME].hash(BENCH_USER[1])
+    users = [{"user_id": _uuid(rng), "username": BENCH_USER[0], "email": "bench@example.com", "fullname": "Benchmark",
+              "password": password, "role_code": "admin"}]
+    users += [
+        {"user_id": _uuid(rng), "username": f"user{i}", "email": f"user{i}@example.com", "fullname": _name(rng),
+         "password": password, "role_code": "HR"}
+        for i in range(1, volumes["users"])
+    ]
+    departments = [
+        {"department_id": _uuid(rng), "name": f"Phong {i}", "code": f"D{i:05d}", "desc": rng.choice(LOCATIONS)}
+        for i in range(volumes["departments"])
+    ]
+    jobs = [
+        {"job_id": _uuid(rng), "name": f"{rng.choice(ROLES)} {rng.choice(SKILLS)}", "code": f"J{i:05d}", "desc": None}
+        for i in range(volumes["jobs"])
+    ]
+
+    proposals, history = [], []
+    for i in range(volumes["proposals"]):
+        proposal_id = _uuid(rng)
+        steps = _history(rng, proposal_id, volumes["history"], now)
+        skills = rng.sample(SKILLS, rng.randint(2, 5))
+        salary = rng.randrange(5, 80) * 1_000_000
+        proposals.append({
+            "recruitment_proposal_id": proposal_id,
+            "code": f"P{i:07d}",
+            "title": f"{rng.choice(ROLES)} {skills[0]}",
+            "desc": " ".join(rng.choices(SKILLS, k=12)),
+            "skills": ", ".join(skills),
+            "quantity": rng.randint(1, 10),
+            "start_date": steps[0]["change_at"].date(),
+            "location": rng.choice(LOCATIONS),
+            "status": steps[-1]["status"],
+            "job_id": rng.choice(jobs)["job_id"],
+            "department_id": rng.choice(departments)["department_id"],
+            "salary_start": salary,
+            "salary_end": salary + rng.randrange(0, 20) * 1_000_000,
+            "user_id": users[0]["user_id"],
+        })
+        history += steps
+
+    # File CV: PDF khác nhau, lưu theo hash như cv_storage; text trích bằng đúng hàm của app
+    blobs, texts = [], []
+    for _ in range(volumes["cvs"]):
+        content = pdf_stub(f"{_name(rng)} {' '.join(rng.sample(SKILLS, 6))} {rng.choice(LOCATIONS)}")
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = cv_storage.blob_path(cv_storage.blob_name(sha256))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        status, extracted, error = extract_pdf_text(path, config.CV_TEXT_MAX_PAGES, config.CV_TEXT_MAX_CHARS)
+        blobs.append({"sha256": sha256, "size": len(content), "ref_count": 0})
+        texts.append({"sha256": sha256, "status": status, "content": extracted or None, "error": error})
+
+    candidates = []
+    for _ in range(volumes["candidates"]):
+        name = _name(rng)
+        blob = rng.choice(blobs) if blobs and rng.random() < 0.5 else None
+        if blob:
+            blob["ref_count"] += 1
+        candidates.append({
+            "candidate_id": _uuid(rng),
+            "full_name": name,
+            "email": f"{name.lower().replace(' ', '.')}{rng.randrange(10000)}@example.com",
+            "phone": f"09{rng.randrange(10 ** 8):08d}",
+            "gender": rng.choice(["male", "female"]),
+            "recruitment_proposal_id": rng.choice(proposals)["recruitment_proposal_id"] if proposals else _uuid(rng),
+            "cv_file": cv_storage.blob_name(blob["sha256"]) if blob else None,
+        })
+
+    with SessionLocal() as session:
+        for model, rows in (
+            (User, users), (Department, departments), (Job, jobs), (RecruitmentProposal, proposals),
+            (RecruitmentProposalHistory, history), (CvBlob, blobs), (CvText, texts), (Candidate, candidates),
+        ):
+            _insert(session, model, rows)
+        summary.rebuild(session)
+        session.commit()
+        # Gộp WAL vào file chính để chép snapshot là đủ dữ liệu
+        session.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    engine.dispose()
+
+    _copy(p["db"], p["uploads"], p["snapshot_db"], p["snapshot_uploads"])
+    counts = {
+        "users": len(users), "departments": len(departments), "jobs": len(jobs), "proposals": len(proposals),
+        "history": len(history), "candidates": len(candidates), "cvs": len(blobs),
+    }
+    with open(p["snapshot_info"], "w") as f:
+        json.dump({"seed": seed_value, "volumes": volumes, "counts": counts, "created_at": now.isoformat()}, f, indent=2)
+    return counts
+
+def snapshot_info(workdir: str) -> dict:
+    """Tham số đã dùng để seed snapshot hiện tại (ghi vào kết quả benchmark)"""
+    with open(paths(workdir)["snapshot_info"]) as f:
+        return json.load(f)
+
+def add_volume_arguments(parser: argparse.ArgumentParser):
+    for name, default in DEFAULT_VOLUMES.items():
+        parser.add_argument(f"--{name}", type=int, default=default)
+    parser.add_argument("--seed", type=int, default=42, help="Seed của bộ sinh ngẫu nhiên")
+
+def volumes_from_args(args) -> dict:
+    return {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo dữ liệu giả cho benchmark")
+    parser.add_argument("--workdir", default=DEFAULT_WORKDIR)
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+    print(seed(args.workdir, volumes_from_args(args), args.seed))
+
+if __name__ == "__main__":
+    main()
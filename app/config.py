@@ -0,0 +1,89 @@
+import os
+from dotenv import load_dotenv
+
+# Đọc biến môi trường từ file .env (nếu có), biến môi trường thật luôn được ưu tiên
+load_dotenv()
+
+def get_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+PROJECT_NAME = os.getenv("PROJECT_NAME", "FastAPI Recruitment Project")
+VERSION = os.getenv("VERSION", "1.0.0")
+
+# Xác thực
+# - "claims": tin vào JWT đã verify, chỉ kiểm tra token_version qua cache trong process
+# - "db": truy vấn bảng users ở mỗi request (cách cũ)
+AUTH_MODE = os.getenv("AUTH_MODE", "claims")
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))  # giây
+
+# Hash mật khẩu: scheme cho hash mới ("bcrypt" | "argon2"); hash cũ/khác scheme được hash lại khi đăng nhập
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+# Process pool riêng cho hash: số worker = số job chạy cùng lúc; hàng đợi dài hơn MAX_QUEUE thì từ chối ngay
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "100"))
+
+# Cache dữ liệu danh mục (job, department) trong process, tự bỏ entry cũ khi dữ liệu đổi
+REFERENCE_CACHE_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", "2000"))
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))  # giây
+
+# Database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fast_api.db")
+DB_ECHO = get_bool("DB_ECHO", False)  # Chỉ bật khi debug: log từng câu SQL ra stdout rất tốn kém
+# Tự chạy migration còn thiếu khi khởi động app (tắt nếu chạy migration riêng lúc deploy)
+DB_AUTO_MIGRATE = get_bool("DB_AUTO_MIGRATE", True)
+
+# Connection pool (MySQL/PostgreSQL...)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # giây
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # giây, nhỏ hơn wait_timeout của server
+DB_POOL_PRE_PING = get_bool("DB_POOL_PRE_PING", True)
+
+# SQLite PRAGMA, áp dụng cho mỗi connection mới
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))  # ms
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # số âm = KiB (64 MiB)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+
+# Read replica: danh sách URL phân cách bằng dấu ','. Để trống với SQLite sẽ dùng connection read-only trên cùng file
+DATABASE_READ_URLS = [url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()]
+# Sau khi client commit, các lần đọc của client đó trong khoảng này (giây) đi vào primary. 0 = tắt
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "0"))
+
+# Upload CV
+CV_UPLOAD_DIR = os.getenv("CV_UPLOAD_DIR", os.path.join("uploads", "cv"))
+CV_MAX_BYTES = int(os.getenv("CV_MAX_BYTES", str(10 * 1024 * 1024)))  # 10 MiB
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1 MiB
+
+# Import ứng viên từ CSV/XLSX: file tạm nằm ở CANDIDATE_IMPORT_DIR cho tới khi import xong
+CANDIDATE_IMPORT_DIR = os.getenv("CANDIDATE_IMPORT_DIR", os.path.join("uploads", "import"))
+CANDIDATE_IMPORT_MAX_BYTES = int(os.getenv("CANDIDATE_IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))  # 100 MiB
+CANDIDATE_IMPORT_BATCH_SIZE = int(os.getenv("CANDIDATE_IMPORT_BATCH_SIZE", "1000"))  # số dòng mỗi transaction
+CANDIDATE_IMPORT_MAX_ERRORS = int(os.getenv("CANDIDATE_IMPORT_MAX_ERRORS", "10000"))  # số dòng lỗi lưu lại mỗi lần import
+
+# Export (GET /v1/<entity>/export): số dòng mỗi lần fetch từ server-side cursor và ghi ra response
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# Trích xuất text từ CV (process pool)
+CV_EXTRACT_WORKERS = int(os.getenv("CV_EXTRACT_WORKERS", "2"))
+CV_TEXT_MAX_PAGES = int(os.getenv("CV_TEXT_MAX_PAGES", "50"))
+CV_TEXT_MAX_CHARS = int(os.getenv("CV_TEXT_MAX_CHARS", "200000"))
+
+# Xếp hạng ứng viên: index TF-IDF trong bộ nhớ được dựng lại sau khoảng này (giây)
+RANKING_REFRESH_SECONDS = float(os.getenv("RANKING_REFRESH_SECONDS", "300"))
+
+# Báo cáo thời gian xử lý đề xuất (GET /v1/stats/proposal_history): cache kết quả theo kỳ
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "256"))
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "3600"))  # giây
+
+# Thống kê dashboard: mốc chia khung lương (theo salary_start), đổi mốc thì chạy lại `python -m app.utils.summary rebuild`
+SALARY_BAND_EDGES = [float(v) for v in os.getenv("SALARY_BAND_EDGES", "10000000,20000000,30000000,50000000").split(",") if v.strip()]
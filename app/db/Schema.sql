@@ -5,6 +5,7 @@ CREATE TABLE users (
     email VARCHAR(255) NOT NULL UNIQUE,
     fullname VARCHAR(255),
     role_code VARCHAR(50) NOT NULL DEFAULT 'HR',
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -42,7 +43,7 @@ CREATE TABLE "recruitment_proposal" (
 	"benefits"	VARCHAR(1000),
 	"user_id"	VARCHAR(36),
 	PRIMARY KEY("recruitment_proposal_id")
-)
+);
 
 CREATE TABLE recruitment_proposal_history (
     recruitment_proposal_history_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,3 +62,96 @@ CREATE TABLE candidates (
     recruitment_proposal_id VARCHAR(36) NOT NULL,
     cv_file VARCHAR(255)
 );
+
+CREATE TABLE cv_blob (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    size INTEGER NOT NULL,
+    ref_count INTEGER NOT NULL DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX ix_candidates_proposal ON candidates (recruitment_proposal_id, candidate_id);
+CREATE INDEX ix_recruitment_proposal_status ON recruitment_proposal (status, recruitment_proposal_id);
+CREATE INDEX ix_recruitment_proposal_user ON recruitment_proposal (user_id, recruitment_proposal_id);
+CREATE INDEX ix_recruitment_proposal_history_proposal ON recruitment_proposal_history (recruitment_proposal_id, change_at);
+CREATE INDEX ix_recruitment_proposal_history_change_at ON recruitment_proposal_history (change_at);
+
+-- Tìm kiếm toàn văn (FTS5, external content) + trigger đồng bộ
+CREATE VIRTUAL TABLE recruitment_proposal_fts USING fts5("title", "desc", "skills", "benefits", content='recruitment_proposal', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3');
+CREATE TRIGGER recruitment_proposal_fts_ai AFTER INSERT ON recruitment_proposal BEGIN INSERT INTO recruitment_proposal_fts(rowid, "title", "desc", "skills", "benefits") VALUES (new.rowid, new."title", new."desc", new."skills", new."benefits"); END;
+CREATE TRIGGER recruitment_proposal_fts_ad AFTER DELETE ON recruitment_proposal BEGIN INSERT INTO recruitment_proposal_fts(recruitment_proposal_fts, rowid, "title", "desc", "skills", "benefits") VALUES ('delete', old.rowid, old."title", old."desc", old."skills", old."benefits"); END;
+CREATE TRIGGER recruitment_proposal_fts_au AFTER UPDATE OF "title", "desc", "skills", "benefits" ON recruitment_proposal BEGIN INSERT INTO recruitment_proposal_fts(recruitment_proposal_fts, rowid, "title", "desc", "skills", "benefits") VALUES ('delete', old.rowid, old."title", old."desc", old."skills", old."benefits"); INSERT INTO recruitment_proposal_fts(rowid, "title", "desc", "skills", "benefits") VALUES (new.rowid, new."title", new."desc", new."skills", new."benefits"); END;
+
+CREATE VIRTUAL TABLE candidates_fts USING fts5("full_name", "email", "phone", content='candidates', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3');
+CREATE TRIGGER candidates_fts_ai AFTER INSERT ON candidates BEGIN INSERT INTO candidates_fts(rowid, "full_name", "email", "phone") VALUES (new.rowid, new."full_name", new."email", new."phone"); END;
+CREATE TRIGGER candidates_fts_ad AFTER DELETE ON candidates BEGIN INSERT INTO candidates_fts(candidates_fts, rowid, "full_name", "email", "phone") VALUES ('delete', old.rowid, old."full_name", old."email", old."phone"); END;
+CREATE TRIGGER candidates_fts_au AFTER UPDATE OF "full_name", "email", "phone" ON candidates BEGIN INSERT INTO candidates_fts(candidates_fts, rowid, "full_name", "email", "phone") VALUES ('delete', old.rowid, old."full_name", old."email", old."phone"); INSERT INTO candidates_fts(rowid, "full_name", "email", "phone") VALUES (new.rowid, new."full_name", new."email", new."phone"); END;
+
+CREATE TABLE cv_text (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    status VARCHAR(20) NOT NULL,
+    content TEXT,
+    error VARCHAR(500),
+    extracted_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE VIRTUAL TABLE cv_text_fts USING fts5("content", content='cv_text', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2', prefix='2 3');
+CREATE TRIGGER cv_text_fts_ai AFTER INSERT ON cv_text BEGIN INSERT INTO cv_text_fts(rowid, "content") VALUES (new.rowid, new."content"); END;
+CREATE TRIGGER cv_text_fts_ad AFTER DELETE ON cv_text BEGIN INSERT INTO cv_text_fts(cv_text_fts, rowid, "content") VALUES ('delete', old.rowid, old."content"); END;
+CREATE TRIGGER cv_text_fts_au AFTER UPDATE OF "content" ON cv_text BEGIN INSERT INTO cv_text_fts(cv_text_fts, rowid, "content") VALUES ('delete', old.rowid, old."content"); INSERT INTO cv_text_fts(rowid, "content") VALUES (new.rowid, new."content"); END;
+
+-- Phiên bản dữ liệu theo bảng (ETag cho API GET), các API ghi tăng version trong cùng transaction
+CREATE TABLE table_version (
+    name VARCHAR(100) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO table_version (name, version) SELECT name, CAST(strftime('%s', 'now') AS INTEGER) FROM (SELECT 'job' AS name UNION ALL SELECT 'department' UNION ALL SELECT 'recruitment_proposal');
+
+-- Bảng tổng hợp cho dashboard (GET /v1/stats), các API ghi cập nhật trong cùng transaction
+CREATE TABLE proposal_summary (
+    status VARCHAR(50) NOT NULL,
+    department_id VARCHAR(36) NOT NULL,
+    job_id VARCHAR(36) NOT NULL,
+    salary_band INTEGER NOT NULL,
+    proposal_count INTEGER NOT NULL DEFAULT 0,
+    quantity_total INTEGER NOT NULL DEFAULT 0,
+    salary_start_total FLOAT NOT NULL DEFAULT 0,
+    salary_end_total FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, department_id, job_id, salary_band)
+);
+
+CREATE TABLE candidate_summary (
+    recruitment_proposal_id VARCHAR(36) PRIMARY KEY,
+    candidate_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Import ứng viên từ CSV/XLSX (POST /v1/candidate/import): tiến độ và lỗi theo dòng
+CREATE TABLE candidate_import (
+    import_id VARCHAR(36) PRIMARY KEY,
+    filename VARCHAR(255),
+    file_format VARCHAR(10) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    total_rows INTEGER,
+    processed_rows INTEGER NOT NULL DEFAULT 0,
+    created_rows INTEGER NOT NULL DEFAULT 0,
+    failed_rows INTEGER NOT NULL DEFAULT 0,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message VARCHAR(500),
+    created_by VARCHAR(36),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    finished_at DATETIME
+);
+
+CREATE TABLE candidate_import_error (
+    import_id VARCHAR(36) NOT NULL,
+    row_number INTEGER NOT NULL,
+    code VARCHAR(10) NOT NULL,
+    message VARCHAR(500) NOT NULL,
+    PRIMARY KEY (import_id, row_number)
+);
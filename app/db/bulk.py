@@ -0,0 +1,79 @@
+"""Hàm dùng chung cho các endpoint xử lý hàng loạt (bulk create/delete)"""
+from pydantic import ValidationError
+from sqlalchemy import select, insert, delete
+
+# Số phần tử tối đa trong một request bulk
+MAX_ITEMS = 5000
+# Số tham số trong một câu IN (...): dưới giới hạn 999 biến của các bản SQLite cũ
+SQL_CHUNK_SIZE = 500
+
+def chunked(items: list, size: int = SQL_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def item_created(index: int, id) -> dict:
+    return {"index": index, "status": "Success", "id": id}
+
+def item_error(index: int, message: str, code: str) -> dict:
+    return {"index": index, "status": "Error", "code": code, "message": message}
+
+def validate_items(items: list, schema) -> tuple:
+    """Validate từng phần tử; trả về ([(index, model)], [lỗi])"""
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+            errors.append(item_error(index, f"Dữ liệu không hợp lệ - {detail}", "G605"))
+    return valid, errors
+
+async def find_existing(db, column, values) -> set:
+    """Các giá trị đã có trong DB, truy vấn theo từng chunk IN (...)"""
+    values = list({v for v in values if v is not None})
+    existing = set()
+    for chunk in chunked(values):
+        existing.update((await db.execute(select(column).where(column.in_(chunk)))).scalars())
+    return existing
+
+def drop_duplicates(valid: list, key, existing: set, message: str, code: str = "C603") -> tuple:
+    """Loại phần tử trùng với DB hoặc trùng với phần tử đứng trước trong cùng batch"""
+    kept, errors, seen = [], [], set(existing)
+    for index, item in valid:
+        value = key(item)
+        if value in seen:
+            errors.append(item_error(index, message, code))
+            continue
+        seen.add(value)
+        kept.append((index, item))
+    return kept, errors
+
+async def insert_many(db, model, rows: list):
+    """INSERT dạng executemany (SQLAlchemy gộp thành các câu INSERT nhiều VALUES)"""
+    if rows:
+        await db.execute(insert(model), rows)
+
+async def delete_returning(db, pk, ids: list, *columns) -> list:
+    """
+    DELETE ... WHERE pk IN (...) RETURNING pk, *columns theo từng chunk, không nạp object ORM.
+    Trả về các dòng thực sự bị xóa. DB không hỗ trợ RETURNING thì SELECT ... FOR UPDATE rồi DELETE.
+    """
+    model = pk.class_
+    returning = (pk, *columns)
+    deleted = []
+    for chunk in chunked(list(dict.fromkeys(ids))):
+        if db.bind.dialect.delete_returning:
+            stmt = delete(model).where(pk.in_(chunk)).returning(*returning)
+            rows = (await db.execute(stmt, execution_options={"synchronize_session": False})).all()
+        else:
+            rows = (await db.execute(select(*returning).where(pk.in_(chunk)).with_for_update())).all()
+            if rows:
+                stmt = delete(model).where(pk.in_([row[0] for row in rows]))
+                await db.execute(stmt, execution_options={"synchronize_session": False})
+        deleted.extend(rows)
+    return deleted
+
+def summary(results: list) -> dict:
+    results.sort(key=lambda r: r["index"])
+    created = sum(1 for r in results if r["status"] == "Success")
+    return {"created": created, "failed": len(results) - created, "items": results}
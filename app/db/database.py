@@ -1,20 +1,171 @@
-from sqlalchemy import create_engine
+import itertools
+import os
+from pathlib import Path
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from sqlalchemy.orm import sessionmaker, Session
+from typing import Generator, AsyncGenerator
+from app import config
+from app.utils.cache import TTLCache
 
-# Cập nhật URL kết nối MySQL
-DATABASE_URL = "sqlite:///./fast_api.db" 
+# URL kết nối, đọc từ biến môi trường / .env (mặc định: sqlite:///./fast_api.db)
+DATABASE_URL = config.DATABASE_URL
 
-# Tạo engine và session cho MySQL
-engine = create_engine(DATABASE_URL, echo=True)  # echo=True sẽ log các câu lệnh SQL
+# Driver async tương ứng với từng loại database
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    """Chuyển URL sync (vd: sqlite:///...) sang URL dùng driver async (vd: sqlite+aiosqlite:///...)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername in ASYNC_DRIVERS.values() or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+def _is_memory_sqlite(url) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in str(url)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    WAL cho phép đọc song song với ghi, synchronous=NORMAL đủ an toàn khi đã dùng WAL,
+    busy_timeout để chờ lock thay vì lỗi "database is locked" ngay lập tức.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def _set_sqlite_read_only_pragmas(dbapi_connection, connection_record):
+    """Connection chỉ đọc: không đổi journal_mode (cần quyền ghi), chặn mọi câu lệnh ghi bằng query_only"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size={int(config.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+def read_only_sqlite_url(url: str) -> str:
+    """sqlite:///./fast_api.db -> sqlite:///file:/abs/path/fast_api.db?mode=ro&uri=true"""
+    parsed = make_url(url)
+    path = Path(os.path.abspath(parsed.database)).as_posix()
+    return f"{parsed.drivername}:///file:{path}?mode=ro&uri=true"
+
+def engine_options(url: str, echo: bool = None) -> dict:
+    """Tham số tạo engine theo từng loại database"""
+    parsed = make_url(url)
+    options = {"echo": config.DB_ECHO if echo is None else echo}
+    if parsed.get_backend_name() == "sqlite":
+        # SQLite không có server: không cần pre-ping/recycle, pool mặc định của SQLAlchemy là đủ
+        return options
+    options.update(
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+    return options
+
+def _tune_engine(sync_engine, read_only: bool = False):
+    url = sync_engine.url
+    if url.get_backend_name() == "sqlite" and not _is_memory_sqlite(url):
+        event.listen(sync_engine, "connect", _set_sqlite_read_only_pragmas if read_only else _set_sqlite_pragmas)
+    return sync_engine
+
+def create_db_engine(url: str = None, echo: bool = None):
+    """Tạo engine sync đã được tinh chỉnh theo loại database"""
+    url = url or DATABASE_URL
+    engine = create_engine(url, **engine_options(url, echo))
+    _tune_engine(engine)
+    return engine
+
+def create_async_db_engine(url: str = None, echo: bool = None, read_only: bool = False):
+    """Tạo engine async (aiosqlite/asyncpg/aiomysql) đã được tinh chỉnh theo loại database"""
+    url = to_async_url(url or DATABASE_URL)
+    engine = create_async_engine(url, **engine_options(url, echo))
+    _tune_engine(engine.sync_engine, read_only=read_only)
+    return engine
+
+def read_database_urls() -> list:
+    """URL các replica dùng để đọc; SQLite file không có replica thì đọc qua connection read-only"""
+    if config.DATABASE_READ_URLS:
+        return config.DATABASE_READ_URLS
+    parsed = make_url(DATABASE_URL)
+    if parsed.get_backend_name() == "sqlite" and not _is_memory_sqlite(parsed):
+        return [read_only_sqlite_url(DATABASE_URL)]
+    return []
+
+# Tạo engine và session (sync)
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# Hàm lấy session DB
+# Engine async: các route dùng AsyncSession để không chiếm thread của threadpool khi chờ I/O
+async_engine = create_async_db_engine()
+# expire_on_commit=False: vẫn đọc được thuộc tính object sau commit mà không phải lazy-load lại
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Engine chỉ đọc (replica). Không có replica thì đọc luôn từ primary
+read_engines = [create_async_db_engine(url, read_only=True) for url in read_database_urls()] or [async_engine]
+ReadSessionLocals = [async_sessionmaker(bind=e, autoflush=False, expire_on_commit=False) for e in read_engines]
+_next_read_session = itertools.cycle(ReadSessionLocals).__next__
+
+# Client vừa commit -> đọc từ primary trong DB_READ_YOUR_WRITES_SECONDS giây
+_recent_writers = TTLCache(maxsize=100_000, ttl=max(config.DB_READ_YOUR_WRITES_SECONDS, 0.001))
+
+def _client_key(request: Request) -> str:
+    """Định danh client: token trong header Authorization, nếu không có thì IP"""
+    return request.headers.get("authorization") or (request.client.host if request.client else "")
+
+@event.listens_for(Session, "after_commit")
+def _remember_writer(session):
+    key = session.info.get("client_key")
+    if key is not None:
+        _recent_writers.set(key, True)
+
+# Hàm lấy session DB (sync) - dùng cho script, CLI hoặc route viết kiểu `def`
 def get_db() -> Generator:
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+# Hàm lấy session DB (async) - dùng cho các route `async def`
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session ghi - luôn vào primary
+async def get_write_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        if config.DB_READ_YOUR_WRITES_SECONDS > 0:
+            db.sync_session.info["client_key"] = _client_key(request)
+        yield db
+
+def read_session_factory(request: Request) -> async_sessionmaker:
+    """Replica kế tiếp (vòng tròn), hoặc primary nếu client vừa ghi"""
+    if config.DB_READ_YOUR_WRITES_SECONDS > 0 and _client_key(request) in _recent_writers:
+        return AsyncSessionLocal
+    return _next_read_session()
+
+# Session đọc - phân phối vòng tròn qua các replica
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with read_session_factory(request)() as db:
+        yield db
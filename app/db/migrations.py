@@ -0,0 +1,234 @@
+"""
+Migration schema có đánh số phiên bản.
+
+- Bảng schema_version lưu các phiên bản đã chạy; mỗi migration chạy trong transaction riêng
+  và ghi phiên bản ngay trong transaction đó.
+- Mỗi bước đều idempotent (kiểm tra bảng/cột/index trước khi tạo) nên chạy được trên database
+  cũ chưa có schema_version (vd: fast_api.db đã sửa tay theo Schema.sql).
+- Thêm migration mới: viết hàm nhận `conn` và thêm vào cuối MIGRATIONS, không sửa migration cũ.
+- Nhiều worker cùng khởi động (uvicorn --workers N) chạy upgrade() tuần tự nhờ khóa giữa các process:
+  SQLite dùng file khóa `<database>.migrate.lock`, PostgreSQL pg_advisory_lock, MySQL GET_LOCK.
+  Worker vào sau thấy các phiên bản đã chạy và bỏ qua.
+
+CLI:
+    python -m app.db.migrations upgrade   # chạy các migration còn thiếu
+    python -m app.db.migrations status    # xem phiên bản hiện tại
+"""
+import argparse
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect, select, insert, func, text
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+def _has_table(conn, table: str) -> bool:
+    return inspect(conn).has_table(table)
+
+def _has_column(conn, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(conn).get_columns(table)}
+
+def _has_index(conn, table: str, name: str) -> bool:
+    return name in {i["name"] for i in inspect(conn).get_indexes(table)}
+
+def create_index(conn, name: str, table: str, columns: list, kind: str = ""):
+    """CREATE [kind] INDEX nếu chưa có (MySQL không hỗ trợ IF NOT EXISTS nên kiểm tra bằng inspector)"""
+    if _has_index(conn, table, name):
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    create = f"CREATE {kind} INDEX" if kind else "CREATE INDEX"
+    conn.execute(text(f"{create} {quote(name)} ON {quote(table)} ({', '.join(quote(c) for c in columns)})"))
+
+# ----- Các migration -----
+
+def _initial_schema(conn):
+    from app.db.database import Base
+    from app.models import user, department, job, recruitment_proposal, recruitment_proposal_history, candidates
+    tables = [Base.metadata.tables[name] for name in (
+        "users", "department", "job", "recruitment_proposal", "recruitment_proposal_history", "candidates",
+    )]
+    Base.metadata.create_all(conn, tables=tables, checkfirst=True)
+
+def _users_token_version(conn):
+    if not _has_column(conn, "users", "token_version"):
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+def _cv_blob(conn):
+    from app.models.cv_blob import CvBlob
+    CvBlob.__table__.create(conn, checkfirst=True)
+
+def _query_indexes(conn):
+    # Cột lọc đứng trước, khóa chính đứng sau: vừa seek theo điều kiện lọc,
+    # vừa đọc sẵn theo thứ tự keyset pagination (ORDER BY khóa chính)
+    create_index(conn, "ix_candidates_proposal", "candidates", ["recruitment_proposal_id", "candidate_id"])
+    create_index(conn, "ix_recruitment_proposal_status", "recruitment_proposal", ["status", "recruitment_proposal_id"])
+    create_index(conn, "ix_recruitment_proposal_user", "recruitment_proposal", ["user_id", "recruitment_proposal_id"])
+    create_index(conn, "ix_recruitment_proposal_history_proposal", "recruitment_proposal_history", ["recruitment_proposal_id", "change_at"])
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("ANALYZE"))  # Cập nhật thống kê cho query planner
+
+def _fulltext_search(conn):
+    from app.utils import search
+    search.install(conn, ["recruitment_proposal", "candidate"])
+
+def _cv_text(conn):
+    from app.models.cv_text import CvText
+    from app.utils import search
+    CvText.__table__.create(conn, checkfirst=True)
+    search.install(conn, ["cv"])
+
+def _table_version(conn):
+    from app.models.table_version import TableVersion
+    from app.utils.table_versions import TRACKED
+    TableVersion.__table__.create(conn, checkfirst=True)
+    existing = set(conn.execute(select(TableVersion.name)).scalars())
+    # Bắt đầu từ thời điểm tạo (không phải 0): database tạo lại không trùng ETag client đã cache
+    start = int(time.time())
+    rows = [{"name": name, "version": start} for name in TRACKED if name not in existing]
+    if rows:
+        conn.execute(insert(TableVersion), rows)
+
+def _summary_tables(conn):
+    from app.models.proposal_summary import ProposalSummary
+    from app.models.candidate_summary import CandidateSummary
+    from app.utils import summary
+    ProposalSummary.__table__.create(conn, checkfirst=True)
+    CandidateSummary.__table__.create(conn, checkfirst=True)
+    summary.rebuild(conn)
+
+def _history_change_at_index(conn):
+    # Báo cáo theo kỳ lọc lịch sử theo change_at trước khi chạy window function theo từng đề xuất
+    create_index(conn, "ix_recruitment_proposal_history_change_at", "recruitment_proposal_history", ["change_at"])
+
+def _candidate_import(conn):
+    from app.models.candidate_import import CandidateImport, CandidateImportError
+    CandidateImport.__table__.create(conn, checkfirst=True)
+    CandidateImportError.__table__.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    (1, "initial_schema", _initial_schema),
+    (2, "users_token_version", _users_token_version),
+    (3, "cv_blob", _cv_blob),
+    (4, "query_indexes", _query_indexes),
+    (5, "fulltext_search", _fulltext_search),
+    (6, "cv_text", _cv_text),
+    (7, "table_version", _table_version),
+    (8, "summary_tables", _summary_tables),
+    (9, "history_change_at_index", _history_change_at_index),
+    (10, "candidate_import", _candidate_import),
+]
+
+# ----- Runner -----
+
+# Khóa giữa các process (PostgreSQL: khóa số nguyên 64 bit, MySQL: khóa theo tên)
+LOCK_KEY = 7_263_401_118
+LOCK_NAME = "app_schema_migration"
+
+def _lock_file(f):
+    if os.name == "nt":
+        import msvcrt
+        # LK_LOCK chỉ thử lại 10 lần: tự chờ tới khi lấy được khóa
+        while True:
+            try:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+@contextmanager
+def migration_lock(engine):
+    """
+    Khóa độc quyền giữa các process trong suốt quá trình upgrade.
+    SQLite không dùng BEGIN EXCLUSIVE: các bước migration chạy trên connection khác sẽ bị chính khóa đó chặn.
+    """
+    dialect = engine.dialect.name
+    if dialect == "sqlite":
+        database = engine.url.database
+        if not database or database == ":memory:":
+            yield  # Database trong bộ nhớ chỉ thuộc về 1 process
+            return
+        with open(f"{database}.migrate.lock", "a+b") as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+    elif dialect == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+    elif dialect in ("mysql", "mariadb"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT GET_LOCK(:name, -1)"), {"name": LOCK_NAME})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+    else:
+        yield
+
+def applied_versions(conn) -> set:
+    if not _has_table(conn, "schema_version"):
+        return set()
+    return set(conn.execute(select(schema_version.c.version)).scalars())
+
+def current_version(engine) -> int:
+    with engine.connect() as conn:
+        return max(applied_versions(conn), default=0)
+
+def upgrade(engine, target: int = None) -> list:
+    """Chạy các migration chưa áp dụng (tới `target` nếu truyền vào). Trả về danh sách đã chạy"""
+    applied = []
+    with migration_lock(engine):
+        with engine.begin() as conn:
+            schema_version.create(conn, checkfirst=True)
+        with engine.connect() as conn:
+            done = applied_versions(conn)
+        for version, name, step in MIGRATIONS:
+            if target is not None and version > target:
+                break
+            if version in done:
+                continue
+            with engine.begin() as conn:
+                step(conn)
+                conn.execute(insert(schema_version).values(version=version, name=name))
+            applied.append(f"{version}_{name}")
+    return applied
+
+def main():
+    from app.db.database import engine
+
+    parser = argparse.ArgumentParser(description="Migration schema database")
+    parser.add_argument("command", choices=["upgrade", "status"])
+    parser.add_argument("--target", type=int, default=None, help="Chỉ chạy tới phiên bản này")
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        print({"applied": upgrade(engine, args.target), "version": current_version(engine)})
+    else:
+        print({"version": current_version(engine), "latest": MIGRATIONS[-1][0]})
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
+import time
 from fastapi import FastAPI, Depends, HTTPException
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db.database import get_db
-from app.api.v1 import user_routes, auth_routes, job_routes, department_routes, recruitment_proposal_routes, recruitment_proposal_history_routes, candidates_routes
+from app import config
+from app.db import migrations
+from app.db.database import get_async_db, engine, async_engine, read_engines
+from app.utils import cv_text, reference_cache, table_versions, analytics, passwords, metrics
+from app.utils.responses import ORJSONResponse
+from app.api.v1 import user_routes, auth_routes, job_routes, department_routes, recruitment_proposal_routes, recruitment_proposal_history_routes, candidates_routes, search_routes, stats_routes
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.DB_AUTO_MIGRATE:
+        await run_in_threadpool(migrations.upgrade, engine)
+    await passwords.prepare_dummy_hash()
+    yield
+    cv_text.shutdown()
+    passwords.shutdown()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# Đếm số câu SQL/thời gian database; read_engines trùng primary (không có replica) chỉ được tính 1 lần
+metrics.instrument({"primary": async_engine, **{f"read{i}": e for i, e in enumerate(read_engines)}, "sync": engine})
+app.add_middleware(metrics.MetricsMiddleware)
 app.include_router(user_routes.router, prefix="/v1", tags=["Users"])
 app.include_router(auth_routes.router, prefix="/v1", tags=["Auth"])
 app.include_router(job_routes.router, prefix="/v1", tags=["Job"])
@@ -14,9 +33,10 @@ app.include_router(department_routes.router, prefix="/v1", tags=["Department"])
 app.include_router(recruitment_proposal_routes.router, prefix="/v1", tags=["Recruitment Proposal"])
 app.include_router(recruitment_proposal_history_routes.router, prefix="/v1", tags=["Recruitment Proposal History"])
 app.include_router(candidates_routes.router, prefix="/v1", tags=["Candidates"])
+app.include_router(search_routes.router, prefix="/v1", tags=["Search"])
+app.include_router(stats_routes.router, prefix="/v1", tags=["Stats"])
 
-# Mount thư mục chứa file upload
-app.mount("/static", StaticFiles(directory="/uploads"), name="static")
+# File CV không còn mount public qua /static: tải qua GET /v1/candidate/{candidate_id}/cv (cần đăng nhập)
 
 # (Tùy chọn) Cho phép CORS nếu bạn cần
 # app.add_middleware(
@@ -32,9 +52,36 @@ async def root():
     return {"status": "ok"}
 
 @app.get("/health/db", tags=["Health"])
-def health_check_db(db: Session = Depends(get_db)):
+async def health_check_db(db: AsyncSession = Depends(get_async_db)):
     try:
-        db.execute(text("SELECT 1"))
-        return {"status": "success", "message": "Kết nối cơ sở dữ liệu thành công"}
+        started = time.perf_counter()
+        await db.execute(text("SELECT 1"))
+        return {
+            "status": "success",
+            "message": "Kết nối cơ sở dữ liệu thành công",
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "pools": metrics.pool_stats(),
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Không thể kết nối cơ sở dữ liệu")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Không thể kết nối cơ sở dữ liệu")
+
+@app.get("/health/cache", tags=["Health"])
+async def health_check_cache():
+    """Thống kê các cache (hit/miss) trong worker hiện tại"""
+    return {"reference": reference_cache.stats(), "table_versions": table_versions.stats(), "analytics": analytics.stats()}
+
+@app.get("/health/passwords", tags=["Health"])
+async def health_check_passwords():
+    """Process pool hash mật khẩu: số job đang chạy/đang chờ, số lần từ chối vì quá tải"""
+    return passwords.stats()
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics của worker hiện tại theo định dạng text của Prometheus"""
+    extra = {
+        "passwords": passwords.stats(),
+        "reference_cache": reference_cache.stats(),
+        "analytics_cache": analytics.stats(),
+        "table_versions": table_versions.stats(),
+    }
+    return PlainTextResponse(metrics.render(extra), media_type=metrics.CONTENT_TYPE)
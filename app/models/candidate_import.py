@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, DateTime, PrimaryKeyConstraint, func
+from app.db.database import Base
+
+class CandidateImport(Base):
+    """Một lần import ứng viên từ file CSV/XLSX; tiến độ cập nhật sau mỗi batch (cùng transaction với dữ liệu)"""
+    __tablename__ = "candidate_import"
+
+    import_id = Column(String(36), primary_key=True)
+    filename = Column(String(255))
+    file_format = Column(String(10), nullable=False)  # csv | xlsx
+    status = Column(String(20), nullable=False)  # pending | running | done | failed
+    total_rows = Column(Integer)  # Ước lượng từ file (XLSX), None nếu chưa biết
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_rows = Column(Integer, nullable=False, default=0)
+    failed_rows = Column(Integer, nullable=False, default=0)
+    progress = Column(Integer, nullable=False, default=0)  # %
+    message = Column(String(500))
+    created_by = Column(String(36))
+    created_at = Column(DateTime, default=func.now())
+    finished_at = Column(DateTime)
+
+class CandidateImportError(Base):
+    """Lỗi theo từng dòng của file import (row_number là số dòng trong file, dòng tiêu đề = 1)"""
+    __tablename__ = "candidate_import_error"
+    __table_args__ = (PrimaryKeyConstraint("import_id", "row_number"),)
+
+    import_id = Column(String(36), nullable=False)
+    row_number = Column(Integer, nullable=False)
+    code = Column(String(10), nullable=False)
+    message = Column(String(500), nullable=False)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Integer
+from app.db.database import Base
+
+class CandidateSummary(Base):
+    """Số ứng viên của từng đề xuất tuyển dụng, cập nhật cùng transaction với các API ghi ứng viên"""
+    __tablename__ = "candidate_summary"
+
+    recruitment_proposal_id = Column(String(36), primary_key=True)
+    candidate_count = Column(Integer, nullable=False, default=0, server_default="0")
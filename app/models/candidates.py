@@ -1,8 +1,11 @@
-from sqlalchemy import Column, String, Date, ForeignKey
+from sqlalchemy import Column, String, Date, ForeignKey, Index
 from app.db.database import Base
 
 class Candidate(Base):
     __tablename__ = "candidates"
+    __table_args__ = (
+        Index("ix_candidates_proposal", "recruitment_proposal_id", "candidate_id"),
+    )
 
     candidate_id = Column(String(36), primary_key=True, index=True)
     full_name = Column(String(255), nullable=False)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Integer, DateTime, func
+from app.db.database import Base
+
+class CvBlob(Base):
+    """File CV lưu theo nội dung (sha256), dùng chung giữa các ứng viên"""
+    __tablename__ = "cv_blob"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Số ứng viên đang tham chiếu, = 0 thì được dọn
+    created_at = Column(DateTime, default=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, Text, DateTime, func
+from sqlalchemy.orm import deferred
+from app.db.database import Base
+
+class CvText(Base):
+    """Nội dung text trích từ file CV (theo sha256 của blob), dùng cho tìm kiếm"""
+    __tablename__ = "cv_text"
+
+    sha256 = Column(String(64), primary_key=True)
+    status = Column(String(20), nullable=False)  # done | empty | failed
+    # Text có thể rất dài: chỉ nạp khi truy cập thuộc tính
+    content = deferred(Column(Text))
+    error = Column(String(500))
+    extracted_at = Column(DateTime, default=func.now())
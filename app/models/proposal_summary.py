@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Integer, Float
+from app.db.database import Base
+
+class ProposalSummary(Base):
+    """
+    Số đề xuất tuyển dụng theo nhóm (status, department_id, job_id, khung lương), cập nhật cùng transaction
+    với các API ghi đề xuất (xem app.utils.summary). Dashboard chỉ đọc bảng này, không quét recruitment_proposal.
+    """
+    __tablename__ = "proposal_summary"
+
+    status = Column(String(50), primary_key=True)  # status NULL được tính là status mặc định (pending)
+    department_id = Column(String(36), primary_key=True)
+    job_id = Column(String(36), primary_key=True)
+    salary_band = Column(Integer, primary_key=True)  # chỉ số khung theo SALARY_BAND_EDGES (salary_start)
+    proposal_count = Column(Integer, nullable=False, default=0, server_default="0")
+    quantity_total = Column(Integer, nullable=False, default=0, server_default="0")
+    salary_start_total = Column(Float, nullable=False, default=0, server_default="0")
+    salary_end_total = Column(Float, nullable=False, default=0, server_default="0")
@@ -1,5 +1,5 @@
 # app/models/recruitment_proposal_model.py
-from sqlalchemy import Column, String, Date, Integer, Text, Float, Enum, ForeignKey
+from sqlalchemy import Column, String, Date, Integer, Text, Float, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 import uuid
@@ -7,6 +7,10 @@ from datetime import date
 
 class RecruitmentProposal(Base):
     __tablename__ = "recruitment_proposal"
+    __table_args__ = (
+        Index("ix_recruitment_proposal_status", "status", "recruitment_proposal_id"),
+        Index("ix_recruitment_proposal_user", "user_id", "recruitment_proposal_id"),
+    )
 
     recruitment_proposal_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     code = Column(String(50), unique=True, nullable=False)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
 class RecruitmentProposalHistory(Base):
     __tablename__ = "recruitment_proposal_history"
+    __table_args__ = (
+        Index("ix_recruitment_proposal_history_proposal", "recruitment_proposal_id", "change_at"),
+        Index("ix_recruitment_proposal_history_change_at", "change_at"),
+    )
 
     recruitment_proposal_history_id = Column(Integer, primary_key=True, autoincrement=True)
     recruitment_proposal_id = Column(String(36), nullable=False)
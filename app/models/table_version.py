@@ -0,0 +1,9 @@
+from sqlalchemy import Column, String, Integer
+from app.db.database import Base
+
+class TableVersion(Base):
+    """Bộ đếm phiên bản dữ liệu của từng bảng, tăng mỗi lần ghi; dùng làm ETag cho API GET"""
+    __tablename__ = "table_version"
+
+    name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -24,5 +24,8 @@ class User(Base):
     # Cột role_code
     role_code = Column(String(50), nullable=False, default="HR")
 
+    # Cột token_version: tăng lên khi đổi mật khẩu/quyền để vô hiệu hóa các token đã cấp
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Cột created_at: Thời gian tạo
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
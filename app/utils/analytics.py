@@ -0,0 +1,148 @@
+"""
+Phân tích thời gian xử lý đề xuất tuyển dụng từ recruitment_proposal_history.
+
+- Mỗi dòng lịch sử là 1 lần chuyển trạng thái. LAG(status, change_at) theo từng đề xuất cho biết trạng thái
+  trước đó và thời điểm vào trạng thái đó: hiệu 2 mốc thời gian = thời gian nằm ở trạng thái trước.
+- Chỉ đọc lịch sử của các đề xuất có thay đổi trong kỳ (index theo change_at), window function chạy trên
+  index (recruitment_proposal_id, change_at) nên không quét cả bảng lịch sử nhiều năm. Số đề xuất hoàn thành
+  theo phòng ban/tháng chỉ cần các dòng done trong kỳ, không qua window.
+- Percentile (nearest-rank) tính ngay trong SQL bằng ROW_NUMBER/COUNT OVER, không kéo dữ liệu thô về Python.
+- Kết quả được cache theo kỳ. Kỳ đã kết thúc không còn dòng lịch sử mới (change_at luôn là thời điểm ghi)
+  nên cache tới hết TTL; kỳ còn mở gắn thêm phiên bản bảng recruitment_proposal (tăng ở mọi API ghi
+  lịch sử) để số liệu mới được tính lại ngay.
+"""
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import select, func, case, literal, literal_column, null, and_, union_all, Date
+from app import config
+from app.models.recruitment_proposal import RecruitmentProposal
+from app.models.recruitment_proposal_history import RecruitmentProposalHistory
+from app.utils import table_versions
+from app.utils.cache import TTLCache
+
+PERCENTILES = (0.5, 0.9, 0.95)
+# change_at theo đồng hồ của database (SQLite: UTC): kỳ kết thúc trong khoảng này trước "bây giờ" vẫn coi là còn mở
+CLOCK_SKEW = timedelta(days=1)
+
+_cache = TTLCache(maxsize=config.ANALYTICS_CACHE_SIZE, ttl=config.ANALYTICS_CACHE_TTL)
+
+def _seconds(dialect: str, later, earlier):
+    """Số giây giữa 2 cột thời gian"""
+    if dialect == "sqlite":
+        return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+    if dialect == "postgresql":
+        return func.extract("epoch", later - earlier)
+    if dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), earlier, later)
+    raise ValueError(f"Database {dialect} chưa hỗ trợ thống kê thời gian")
+
+def _month(dialect: str, column):
+    """'YYYY-MM' của cột thời gian"""
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m", column)
+    if dialect == "postgresql":
+        return func.to_char(column, "YYYY-MM")
+    if dialect == "mysql":
+        return func.date_format(column, "%Y-%m")
+    raise ValueError(f"Database {dialect} chưa hỗ trợ thống kê thời gian")
+
+def _percentiles(durations, group_by: list):
+    """
+    count, avg, p.. của cột `duration` theo nhóm. Nearest-rank: giá trị nhỏ nhất có thứ hạng >= p * n,
+    tức MIN(duration) trong các dòng có ROW_NUMBER >= p * COUNT.
+    """
+    partition = [durations.c[name] for name in group_by]
+    ranked = select(
+        *partition,
+        durations.c.duration,
+        func.row_number().over(partition_by=partition, order_by=durations.c.duration).label("rn"),
+        func.count().over(partition_by=partition).label("n"),
+    ).subquery()
+    keys = [ranked.c[name] for name in group_by]
+    return select(
+        *keys,
+        func.count().label("count"),
+        func.avg(ranked.c.duration).label("avg"),
+        *[
+            func.min(case((ranked.c.rn >= p * ranked.c.n, ranked.c.duration))).label(f"p{round(p * 100)}")
+            for p in PERCENTILES
+        ],
+    ).group_by(*keys)
+
+def _stats(row) -> dict:
+    result = {"count": row.count if row else 0, "avg_seconds": row.avg if row else None}
+    for p in PERCENTILES:
+        name = f"p{round(p * 100)}"
+        result[f"{name}_seconds"] = getattr(row, name) if row else None
+    return result
+
+async def _compute(db, start: date, end: date) -> dict:
+    dialect = db.bind.dialect.name
+    h = RecruitmentProposalHistory
+    # Bind kiểu Date ('YYYY-MM-DD'): với SQLite, so sánh chuỗi vẫn đúng cho change_at lúc 00:00:00 của ngày start
+    start, end = literal(start, Date), literal(end, Date)
+    window = {
+        "partition_by": h.recruitment_proposal_id,
+        "order_by": (h.change_at, h.recruitment_proposal_history_id),
+    }
+    # Đề xuất có chuyển trạng thái trong kỳ; window chạy trên toàn bộ lịch sử của chúng (cần mốc trước kỳ).
+    # CTE được dùng 2 lần nên chỉ tính 1 lần (SQLite/PostgreSQL materialize CTE dùng nhiều lần)
+    active = select(h.recruitment_proposal_id).where(h.change_at >= start, h.change_at < end).distinct()
+    steps = select(
+        h.status,
+        h.change_at,
+        func.lag(h.status).over(**window).label("prev_status"),
+        func.lag(h.change_at).over(**window).label("prev_at"),
+        func.min(h.change_at).over(partition_by=h.recruitment_proposal_id).label("created_at"),
+    ).where(h.recruitment_proposal_id.in_(active)).cte("steps")
+    in_period = and_(steps.c.change_at >= start, steps.c.change_at < end)
+
+    durations = union_all(
+        # Thời gian ở mỗi trạng thái, tính cho các lần rời trạng thái trong kỳ
+        select(
+            literal("status").label("kind"),
+            steps.c.prev_status.label("status"),
+            _seconds(dialect, steps.c.change_at, steps.c.prev_at).label("duration"),
+        ).where(in_period, steps.c.prev_status.isnot(None)),
+        # Từ lúc tạo (dòng lịch sử đầu tiên) tới khi chuyển sang done trong kỳ
+        select(
+            literal("done").label("kind"),
+            null().label("status"),
+            _seconds(dialect, steps.c.change_at, steps.c.created_at).label("duration"),
+        ).where(in_period, steps.c.status == "done"),
+    ).subquery()
+    rows = (await db.execute(_percentiles(durations, ["kind", "status"]))).all()
+
+    # Số đề xuất hoàn thành theo phòng ban và tháng: chỉ cần đọc theo index change_at, không cần window
+    # (đề xuất đã xóa: department_id = None)
+    done = select(
+        h.recruitment_proposal_id,
+        _month(dialect, h.change_at).label("month"),
+    ).where(h.change_at >= start, h.change_at < end, h.status == "done").subquery()
+    throughput = (await db.execute(
+        select(RecruitmentProposal.department_id, done.c.month, func.count().label("done"))
+        .select_from(done)
+        .outerjoin(RecruitmentProposal, RecruitmentProposal.recruitment_proposal_id == done.c.recruitment_proposal_id)
+        .group_by(RecruitmentProposal.department_id, done.c.month)
+        .order_by(done.c.month, RecruitmentProposal.department_id)
+    )).all()
+
+    return {
+        "time_in_status": [{"status": row.status, **_stats(row)} for row in rows if row.kind == "status"],
+        "time_to_done": _stats(next((row for row in rows if row.kind == "done"), None)),
+        "throughput": [{"department_id": row.department_id, "month": row.month, "done": row.done} for row in throughput],
+    }
+
+async def proposal_report(db, start: date, end: date) -> dict:
+    """Báo cáo cho các lần chuyển trạng thái có change_at trong [start, end) (end: ngày đầu tiên không tính)"""
+    key = (start, end)
+    if end > (datetime.now(timezone.utc) - CLOCK_SKEW).date():
+        # Kỳ chưa kết thúc: lịch sử còn được ghi thêm
+        key += (await table_versions.current(db, "recruitment_proposal"),)
+    report = _cache.get(key)
+    if report is None:
+        report = await _compute(db, start, end)
+        _cache.set(key, report)
+    return report
+
+def stats() -> dict:
+    return _cache.stats()
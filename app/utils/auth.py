@@ -1,18 +1,48 @@
+from dataclasses import dataclass
+from typing import Optional
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from app.models.user import User
-from app.db.database import get_db
-from sqlalchemy.orm import Session
+from app.db.database import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.utils import helpers
+from app.utils.cache import TTLCache
+from app import config
 
-SECRET_KEY = "your-secret-key__12345678@ABC_NDTHIEN"  
+SECRET_KEY = "your-secret-key__12345678@ABC_NDTHIEN"
 ALGORITHM = "HS256"  # Thuật toán mã hóa
-ACCESS_TOKEN_EXPIRE_MINUTES = 60*24  # Thời gian hết hạn của token 
+ACCESS_TOKEN_EXPIRE_MINUTES = 60*24  # Thời gian hết hạn của token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="v1/login")  # Dùng để lấy token trong header
 
+# user_id -> token_version hiện tại (None nếu user không còn tồn tại)
+_user_state_cache = TTLCache(maxsize=config.AUTH_USER_CACHE_SIZE, ttl=config.AUTH_USER_CACHE_TTL)
+_NOT_CACHED = object()
+
+@dataclass
+class CurrentUser:
+    """User đã xác thực, dựng từ claims của JWT (không cần truy vấn bảng users)"""
+    user_id: str
+    username: Optional[str] = None
+    email: Optional[str] = None
+    fullname: Optional[str] = None
+    role_code: Optional[str] = None
+    token_version: int = 0
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "CurrentUser":
+        return cls(
+            user_id=payload["user_id"],
+            username=payload.get("username"),
+            email=payload.get("email"),
+            fullname=payload.get("fullname"),
+            role_code=payload.get("role_code"),
+            token_version=payload.get("ver", 0),
+        )
+
 # Hàm tạo token
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
@@ -28,24 +58,44 @@ def verify_token(token: str):
     except JWTError:
         return None
 
+def invalidate_user(user_id: str):
+    """Gọi sau khi đổi mật khẩu/quyền hoặc xóa user để worker hiện tại không dùng trạng thái cũ trong cache"""
+    _user_state_cache.delete(user_id)
+
+async def get_token_version(db: AsyncSession, user_id: str) -> Optional[int]:
+    """Lấy token_version của user, ưu tiên từ cache; None nếu user không tồn tại"""
+    version = _user_state_cache.get(user_id, _NOT_CACHED)
+    if version is _NOT_CACHED:
+        result = await db.execute(select(User.token_version).where(User.user_id == user_id))
+        version = result.scalar_one_or_none()
+        _user_state_cache.set(user_id, version)
+    return version
+
+def _unauthorized():
+    return HTTPException(
+        status_code=401,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
 # Hàm để lấy user từ token
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     payload = verify_token(token)
     if payload is None:
-        raise HTTPException(
-            status_code=401,
-            message="Not authenticated"
-        )
+        raise _unauthorized()
     user_id = payload.get("user_id")
     if user_id is None:
-        raise HTTPException(
-            status_code=401,
-            message="Not authenticated"
-        )
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if user is None:
-        raise HTTPException(
-            status_code=401,
-            message="Not authenticated"
-        )
-    return user
+        raise _unauthorized()
+
+    if config.AUTH_MODE == "db":
+        result = await db.execute(select(User).where(User.user_id == user_id))
+        user = result.scalars().first()
+        if user is None or payload.get("ver", 0) != user.token_version:
+            raise _unauthorized()
+        return user
+
+    # Chế độ claims: token hết hiệu lực khi token_version của user đã tăng (đổi mật khẩu, xóa user...)
+    version = await get_token_version(db, user_id)
+    if version is None or payload.get("ver", 0) != version:
+        raise _unauthorized()
+    return CurrentUser.from_claims(payload)
@@ -0,0 +1,175 @@
+"""
+Import ứng viên từ file CSV/XLSX (POST /v1/candidate/import).
+
+- File upload được ghi ra file tạm theo từng chunk; việc import chạy ở background sau khi trả import_id.
+- File được đọc dạng stream (csv.reader trên file, openpyxl read_only cho XLSX), mỗi lần lấy
+  CANDIDATE_IMPORT_BATCH_SIZE dòng trong threadpool: bộ nhớ chỉ phụ thuộc kích thước batch, không phụ thuộc file.
+- Mỗi batch là một transaction: ghi ứng viên, lỗi theo dòng và tiến độ cùng lúc, nên tiến độ đọc được
+  luôn khớp với dữ liệu đã commit. Import lỗi giữa chừng thì các batch đã commit vẫn giữ nguyên.
+- Trạng thái lưu trong database (bảng candidate_import) nên worker nào cũng trả lời được tiến độ.
+  Worker bị tắt khi đang import thì bản ghi dừng ở "running".
+"""
+import csv
+import io
+import os
+from datetime import date, datetime
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update, func
+from app import config
+from app.db import bulk
+from app.db.database import AsyncSessionLocal
+from app.models.candidate_import import CandidateImport, CandidateImportError
+from app.utils import uploads
+
+FORMATS = {".csv": "csv", ".xlsx": "xlsx"}
+# XLSX là file zip; CSV không có chữ ký
+MAGIC = {"csv": b"", "xlsx": b"PK\x03\x04"}
+CSV_DELIMITERS = ",;\t"
+ERROR_MESSAGE_LENGTH = 500
+
+class ImportFileError(Exception):
+    """File đọc được nhưng không đúng định dạng import (thiếu cột, không có dòng tiêu đề...)"""
+
+def file_format(filename: str):
+    """csv | xlsx theo đuôi file, None nếu không hỗ trợ"""
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+def _column(name) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+def _cell(value):
+    """Chuẩn hóa giá trị ô: ngày giữ kiểu date, số nguyên (số điện thoại trong Excel) không có '.0', ô trống là None"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip() or None
+
+class _CsvSource:
+    def __init__(self, path: str):
+        self._raw = open(path, "rb")
+        self._size = os.fstat(self._raw.fileno()).st_size
+        # utf-8-sig: bỏ BOM của file CSV xuất từ Excel
+        self._text = io.TextIOWrapper(self._raw, encoding="utf-8-sig", newline="")
+        first = self._text.readline()
+        delimiter = max(CSV_DELIMITERS, key=first.count)
+        self._reader = csv.reader(self._text, delimiter=delimiter)
+        self.header = next(csv.reader([first], delimiter=delimiter), [])
+        self.total_rows = None
+
+    def rows(self):
+        return enumerate(self._reader, start=2)
+
+    def progress(self, processed_rows: int) -> int:
+        return self._raw.tell() * 100 // self._size if self._size else 0
+
+    def close(self):
+        self._text.close()
+
+class _XlsxSource:
+    def __init__(self, path: str):
+        import openpyxl
+        # Truyền file object: openpyxl kiểm tra đuôi file nếu nhận đường dẫn (file tạm là .part).
+        # read_only: đọc sheet theo luồng XML thay vì dựng toàn bộ workbook trong bộ nhớ
+        self._file = open(path, "rb")
+        self._workbook = openpyxl.load_workbook(self._file, read_only=True, data_only=True)
+        sheet = self._workbook.active
+        self._rows = sheet.iter_rows(values_only=True)
+        self.header = list(next(self._rows, None) or [])
+        # Lấy từ thẻ dimension của sheet, có thể thiếu
+        self.total_rows = sheet.max_row - 1 if sheet.max_row and sheet.max_row > 1 else None
+
+    def rows(self):
+        return enumerate(self._rows, start=2)
+
+    def progress(self, processed_rows: int) -> int:
+        return min(processed_rows * 100 // self.total_rows, 99) if self.total_rows else 0
+
+    def close(self):
+        self._workbook.close()
+        self._file.close()
+
+def _open(path: str, fmt: str):
+    return _XlsxSource(path) if fmt == "xlsx" else _CsvSource(path)
+
+def _take(rows, header: list, size: int) -> list:
+    """Đọc tiếp tối đa `size` dòng không rỗng: [(số dòng, {cột: giá trị})]"""
+    batch = []
+    for row_number, values in rows:
+        item = {}
+        for column, value in zip(header, values):
+            value = _cell(value)
+            if column and value is not None:
+                item[column] = value
+        if item:
+            batch.append((row_number, item))
+            if len(batch) >= size:
+                break
+    return batch
+
+def add(db, import_id: str, filename: str, fmt: str, user_id: str = None):
+    """Tạo bản ghi import (status pending); commit do nơi gọi"""
+    db.add(CandidateImport(
+        import_id=import_id, filename=(filename or "")[:255], file_format=fmt, status="pending",
+        processed_rows=0, created_rows=0, failed_rows=0, progress=0, created_by=user_id,
+    ))
+
+async def _set(import_id: str, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(CandidateImport).where(CandidateImport.import_id == import_id).values(**values))
+        await db.commit()
+
+async def _import_batch(import_id: str, batch: list, source, insert_batch):
+    """Một transaction: ghi ứng viên, lỗi theo dòng và tiến độ"""
+    async with AsyncSessionLocal() as db:
+        results = await insert_batch(db, [item for _, item in batch])
+        errors = sorted((r for r in results if r["status"] == "Error"), key=lambda r: r["index"])
+        job = await db.get(CandidateImport, import_id)
+        # Giới hạn số dòng lỗi lưu lại (file sai cột có thể lỗi ở mọi dòng); failed_rows vẫn đếm đủ
+        room = max(config.CANDIDATE_IMPORT_MAX_ERRORS - job.failed_rows, 0)
+        await bulk.insert_many(db, CandidateImportError, [
+            {
+                "import_id": import_id,
+                "row_number": batch[error["index"]][0],
+                "code": error["code"],
+                "message": error["message"][:ERROR_MESSAGE_LENGTH],
+            }
+            for error in errors[:room]
+        ])
+        job.processed_rows += len(batch)
+        job.created_rows += len(results) - len(errors)
+        job.failed_rows += len(errors)
+        job.progress = source.progress(job.processed_rows)
+        await db.commit()
+
+async def run(import_id: str, path: str, fmt: str, schema, insert_batch):
+    """
+    Background task: đọc file và import theo batch.
+    insert_batch(db, items) -> kết quả dạng bulk.item_created/item_error theo index trong batch, không commit.
+    """
+    try:
+        source = await run_in_threadpool(_open, path, fmt)
+        try:
+            header = [_column(name) for name in source.header]
+            missing = [name for name, field in schema.model_fields.items() if field.is_required() and name not in header]
+            if missing:
+                raise ImportFileError(f"File thiếu cột: {', '.join(missing)}")
+            await _set(import_id, status="running", total_rows=source.total_rows)
+            rows = source.rows()
+            while True:
+                batch = await run_in_threadpool(_take, rows, header, config.CANDIDATE_IMPORT_BATCH_SIZE)
+                if not batch:
+                    break
+                await _import_batch(import_id, batch, source, insert_batch)
+        finally:
+            await run_in_threadpool(source.close)
+        await _set(import_id, status="done", progress=100, finished_at=func.now())
+    except Exception as e:
+        message = str(e) if isinstance(e, ImportFileError) else f"Lỗi: {str(e)}"
+        await _set(import_id, status="failed", message=message[:ERROR_MESSAGE_LENGTH], finished_at=func.now())
+    finally:
+        await run_in_threadpool(uploads.remove_file, path)
@@ -0,0 +1,257 @@
+"""
+Lưu trữ CV theo nội dung (content-addressed).
+
+- Mỗi file được đặt tên theo sha256 của nội dung: <sha256>.pdf, nằm trong thư mục con
+  uploads/cv/ab/cd/ (2 cấp, theo 4 ký tự đầu của hash) để mỗi thư mục không có quá nhiều file.
+- Cùng một PDF nộp cho nhiều đề xuất chỉ được lưu một lần; bảng cv_blob đếm số tham chiếu.
+- Blob không còn tham chiếu được dọn ở background (collect_garbage).
+
+CLI:
+    python -m app.utils.cv_storage migrate   # chuyển file cũ (uuid.pdf, thư mục phẳng) sang cấu trúc mới
+    python -m app.utils.cv_storage gc        # dọn blob không còn tham chiếu + file mồ côi
+"""
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update, delete, bindparam
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+from app import config
+from app.db import bulk
+from app.db.database import AsyncSessionLocal
+from app.models.candidates import Candidate
+from app.models.cv_blob import CvBlob
+from app.models.cv_text import CvText
+from app.utils import uploads
+from app.utils.responses import LargeFileResponse, etag_matches
+
+UPLOAD_DIR = config.CV_UPLOAD_DIR
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.pdf$")
+
+def blob_name(sha256: str) -> str:
+    return f"{sha256}.pdf"
+
+def blob_hash(name: str):
+    """sha256 của blob, None nếu là file kiểu cũ (uuid.pdf)"""
+    match = _BLOB_NAME.match(name or "")
+    return match.group(1) if match else None
+
+def blob_path(name: str) -> str:
+    """Đường dẫn file trên đĩa từ giá trị cột candidates.cv_file"""
+    sha256 = blob_hash(name)
+    if sha256 is None:
+        return os.path.join(UPLOAD_DIR, name)  # file cũ, thư mục phẳng
+    return os.path.join(UPLOAD_DIR, sha256[:2], sha256[2:4], name)
+
+def _upsert_ref(dialect_name: str, rows: list):
+    """INSERT ... ON CONFLICT tăng ref_count, tránh lỗi trùng khóa khi 2 request cùng lưu một file"""
+    if dialect_name == "mysql":
+        stmt = mysql.insert(CvBlob).values(rows)
+        return stmt.on_duplicate_key_update(ref_count=CvBlob.ref_count + stmt.inserted.ref_count)
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert(CvBlob).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[CvBlob.sha256],
+        set_={"ref_count": CvBlob.ref_count + stmt.excluded.ref_count},
+    )
+
+async def add_refs(db, blobs: dict):
+    """blobs: {sha256: (size, số tham chiếu thêm)}. Chạy trong transaction của request, chưa commit"""
+    if not blobs:
+        return
+    rows = [{"sha256": sha, "size": size, "ref_count": count} for sha, (size, count) in blobs.items()]
+    await db.execute(_upsert_ref(db.bind.dialect.name, rows))
+
+async def store(db, stored: uploads.StoredUpload) -> str:
+    """
+    Lưu file tạm đã upload thành blob và tăng ref_count (chưa commit). Trả về giá trị cho cột cv_file.
+    Tăng ref_count TRƯỚC khi kiểm tra file: nếu GC đang xóa blob này thì câu lệnh sẽ chờ GC commit,
+    sau đó file bị thiếu sẽ được đặt lại từ file tạm.
+    """
+    name = blob_name(stored.sha256)
+    await add_refs(db, {stored.sha256: (stored.size, 1)})
+    path = blob_path(name)
+    if await run_in_threadpool(os.path.exists, path):
+        await uploads.discard_upload(stored)  # Đã có file cùng nội dung
+    else:
+        await uploads.commit_upload(stored, path)
+    return name
+
+async def release(db, names: list) -> list:
+    """
+    Giảm ref_count của các blob (chưa commit). Trả về danh sách file cần đưa cho collect_garbage
+    sau khi commit (file kiểu cũ không có trong cv_blob nên sẽ được xóa trực tiếp).
+    """
+    counts = Counter(n for n in names if n)
+    params = [{"b_sha256": blob_hash(name), "b_count": count} for name, count in counts.items() if blob_hash(name)]
+    if params:
+        # Một câu UPDATE chạy executemany cho cả batch
+        table = CvBlob.__table__
+        stmt = (
+            update(table)
+            .where(table.c.sha256 == bindparam("b_sha256"))
+            .values(ref_count=table.c.ref_count - bindparam("b_count"))
+        )
+        await db.execute(stmt, params)
+    return list(counts)
+
+def _remove_files(paths: list):
+    for path in paths:
+        uploads.remove_file(path)
+
+async def _delete_unreferenced(db, condition) -> list:
+    if db.bind.dialect.delete_returning:
+        result = await db.execute(delete(CvBlob).where(condition).returning(CvBlob.sha256))
+        return result.scalars().all()
+    deleted = (await db.execute(select(CvBlob.sha256).where(condition).with_for_update())).scalars().all()
+    if deleted:
+        await db.execute(delete(CvBlob).where(CvBlob.sha256.in_(deleted)))
+    return deleted
+
+async def collect_garbage(names: list = None) -> int:
+    """
+    Xóa các blob có ref_count <= 0 (giới hạn trong `names` nếu truyền vào). Dùng làm background task.
+    File được xóa trước khi commit, lúc transaction còn giữ lock, nên upload đồng thời không bị mất file.
+    """
+    async with AsyncSessionLocal() as db:
+        condition = CvBlob.ref_count <= 0
+        hashes = None
+        if names is not None:
+            legacy = [n for n in names if blob_hash(n) is None]
+            if legacy:
+                await run_in_threadpool(_remove_files, [blob_path(n) for n in legacy])
+            hashes = [blob_hash(n) for n in names if blob_hash(n) is not None]
+            if not hashes:
+                return len(legacy)
+        if hashes is None:
+            deleted = await _delete_unreferenced(db, condition)
+        else:
+            deleted = []
+            for chunk in bulk.chunked(hashes):
+                deleted += await _delete_unreferenced(db, condition & CvBlob.sha256.in_(chunk))
+        for chunk in bulk.chunked(deleted):
+            await db.execute(delete(CvText).where(CvText.sha256.in_(chunk)))
+        await run_in_threadpool(_remove_files, [blob_path(blob_name(sha)) for sha in deleted])
+        await db.commit()
+        return len(deleted)
+
+
+async def file_response(name: str, request: Request, download_name: str = None) -> Response:
+    """
+    Response trả file CV: ETag mạnh = sha256 nội dung, 304 khi If-None-Match khớp,
+    hỗ trợ Range (trình xem PDF tải từng phần). Blob theo hash không bao giờ đổi nội dung
+    nên được cache vĩnh viễn (immutable). Raise FileNotFoundError nếu file không còn trên đĩa.
+    """
+    path = os.path.abspath(blob_path(name))
+    stat_result = await run_in_threadpool(os.stat, path)
+    sha256 = blob_hash(name)
+    if sha256 is not None:
+        headers = {"ETag": f'"{sha256}"', "Cache-Control": "private, max-age=31536000, immutable"}
+    else:
+        headers = {"Cache-Control": "private, no-cache"}  # File cũ: ETag theo mtime/size, luôn kiểm tra lại
+    response = LargeFileResponse(
+        path,
+        headers=headers,
+        media_type="application/pdf",
+        stat_result=stat_result,
+        filename=download_name or name,
+        content_disposition_type="inline",
+    )
+    etag = response.headers["etag"]
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": response.headers["cache-control"]})
+    return response
+
+
+# ----- CLI (sync session) -----
+
+def _hash_file(path: str):
+    hasher = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(config.UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+def migrate(session) -> dict:
+    """Chuyển CV cũ (uuid.pdf trong thư mục phẳng) sang blob theo hash, cập nhật candidates.cv_file"""
+    stats = {"migrated": 0, "missing": 0}
+    refs = {}
+    legacy = session.execute(
+        select(Candidate.candidate_id, Candidate.cv_file).where(Candidate.cv_file.isnot(None))
+    ).all()
+    moved = {}  # file cũ -> tên blob (nhiều ứng viên có thể dùng chung 1 file cũ)
+    for candidate_id, cv_file in legacy:
+        if blob_hash(cv_file) is not None:
+            continue
+        if cv_file not in moved:
+            old_path = blob_path(cv_file)
+            if not os.path.exists(old_path):
+                stats["missing"] += 1
+                continue
+            sha256, size = _hash_file(old_path)
+            new_path = blob_path(blob_name(sha256))
+            if not os.path.exists(new_path):
+                # Giữ file cũ tới khi commit xong để chạy lại được nếu bị ngắt giữa chừng
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                try:
+                    os.link(old_path, new_path)
+                except OSError:
+                    shutil.copy2(old_path, new_path)
+            moved[cv_file] = (sha256, size)
+        sha256, size = moved[cv_file]
+        refs.setdefault(sha256, [size, 0])[1] += 1
+        session.execute(
+            update(Candidate).where(Candidate.candidate_id == candidate_id).values(cv_file=blob_name(sha256))
+        )
+        stats["migrated"] += 1
+
+    if refs:
+        rows = [{"sha256": sha, "size": size, "ref_count": count} for sha, (size, count) in refs.items()]
+        session.execute(_upsert_ref(session.bind.dialect.name, rows))
+    session.commit()
+    _remove_files([blob_path(old) for old in moved])
+    return stats
+
+def remove_orphans(session, min_age_seconds: int = 3600) -> int:
+    """
+    Xóa file blob trên đĩa không có bản ghi trong cv_blob (vd: request lỗi sau khi đã đặt file).
+    Bỏ qua file mới hơn min_age_seconds vì có thể thuộc request đang chạy, chưa commit.
+    """
+    known = set(session.execute(select(CvBlob.sha256)).scalars())
+    cutoff = time.time() - min_age_seconds
+    removed = 0
+    for root, _, files in os.walk(UPLOAD_DIR):
+        for name in files:
+            sha256 = blob_hash(name)
+            path = os.path.join(root, name)
+            if sha256 is not None and sha256 not in known and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def main():
+    from app.db.database import SessionLocal, engine
+    from app.db import migrations
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Quản lý kho lưu trữ CV")
+    parser.add_argument("command", choices=["migrate", "gc"])
+    args = parser.parse_args()
+
+    migrations.upgrade(engine)
+    with SessionLocal() as session:
+        if args.command == "migrate":
+            print(migrate(session))
+        else:
+            collected = asyncio.run(collect_garbage())
+            print({"collected": collected, "orphans_removed": remove_orphans(session)})
+
+if __name__ == "__main__":
+    main()
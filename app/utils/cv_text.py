@@ -0,0 +1,117 @@
+"""
+Trích xuất text từ CV để tìm kiếm theo nội dung.
+
+- Sau khi tạo ứng viên có CV, index_blob chạy ở background: đọc PDF trong process pool
+  (không chặn event loop hay threadpool của request), lưu text đã chuẩn hóa vào bảng cv_text.
+- Mỗi blob (sha256) chỉ trích xuất một lần, dù nhiều ứng viên dùng chung file.
+
+CLI:
+    python -m app.utils.cv_text backfill [--workers 4] [--batch 100] [--retry-failed]
+Tiến độ lưu sau mỗi batch (chính là bảng cv_text) nên dừng giữa chừng rồi chạy lại sẽ làm tiếp phần còn thiếu.
+File CV kiểu cũ (uuid.pdf) cần chạy `python -m app.utils.cv_storage migrate` trước.
+"""
+import argparse
+import asyncio
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from sqlalchemy import select, or_
+from sqlalchemy.exc import IntegrityError
+from app import config
+from app.db.database import AsyncSessionLocal
+from app.models.cv_blob import CvBlob
+from app.models.cv_text import CvText
+from app.utils import cv_storage
+from app.utils.text_extract import extract_pdf_text
+
+_pool = None
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: tiến trình con không kế thừa event loop/connection của process cha (fork không an toàn)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = _new_pool(config.CV_EXTRACT_WORKERS)
+    return _pool
+
+def shutdown():
+    """Gọi khi tắt app"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def _extract_args(sha256: str) -> tuple:
+    return cv_storage.blob_path(cv_storage.blob_name(sha256)), config.CV_TEXT_MAX_PAGES, config.CV_TEXT_MAX_CHARS
+
+def _row(sha256: str, result: tuple) -> CvText:
+    status, content, error = result
+    return CvText(sha256=sha256, status=status, content=content or None, error=error)
+
+async def index_blob(name: str):
+    """Background task sau khi lưu CV: trích xuất text nếu blob chưa được xử lý"""
+    sha256 = cv_storage.blob_hash(name)
+    if sha256 is None:
+        return
+    async with AsyncSessionLocal() as db:
+        if await db.get(CvText, sha256) is not None:
+            return
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(get_pool(), extract_pdf_text, *_extract_args(sha256))
+    async with AsyncSessionLocal() as db:
+        db.add(_row(sha256, result))
+        try:
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()  # Request khác vừa lưu cùng blob
+
+# ----- CLI (sync session) -----
+
+def backfill(session, workers: int, batch_size: int, retry_failed: bool = False) -> dict:
+    """Trích xuất text cho các blob chưa có trong cv_text, song song tối đa `workers` file một lúc"""
+    stats = Counter()
+    pending = CvText.sha256.is_(None)
+    if retry_failed:
+        pending = or_(pending, CvText.status == "failed")
+    last = ""
+    with _new_pool(workers) as pool:
+        while True:
+            batch = session.execute(
+                select(CvBlob.sha256)
+                .outerjoin(CvText, CvText.sha256 == CvBlob.sha256)
+                .where(pending, CvBlob.sha256 > last)
+                .order_by(CvBlob.sha256)
+                .limit(batch_size)
+            ).scalars().all()
+            if not batch:
+                break
+            paths = [cv_storage.blob_path(cv_storage.blob_name(sha)) for sha in batch]
+            results = pool.map(extract_pdf_text, paths, repeat(config.CV_TEXT_MAX_PAGES), repeat(config.CV_TEXT_MAX_CHARS))
+            for sha256, result in zip(batch, results):
+                session.merge(_row(sha256, result))
+                stats[result[0]] += 1
+            session.commit()
+            last = batch[-1]
+            print({"processed": sum(stats.values()), **stats}, flush=True)
+    return dict(stats)
+
+def main():
+    from app.db.database import SessionLocal, engine
+    from app.db import migrations
+
+    parser = argparse.ArgumentParser(description="Trích xuất text từ CV")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--workers", type=int, default=config.CV_EXTRACT_WORKERS)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--retry-failed", action="store_true", help="Xử lý lại các file đã lỗi")
+    args = parser.parse_args()
+
+    migrations.upgrade(engine)
+    with SessionLocal() as session:
+        print(backfill(session, max(args.workers, 1), max(args.batch, 1), args.retry_failed))
+
+if __name__ == "__main__":
+    main()
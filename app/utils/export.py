@@ -0,0 +1,63 @@
+"""
+Export bảng lớn dạng stream (GET /v1/<entity>/export?format=csv|ndjson).
+
+- Chỉ SELECT các cột cần cho schema (không dựng object ORM), đọc bằng server-side cursor
+  (AsyncSession.stream + yield_per) và ghi ra StreamingResponse theo từng batch EXPORT_BATCH_SIZE dòng:
+  bộ nhớ không phụ thuộc số dòng export.
+- Session được mở trong generator: dependency get_read_db đóng session trước khi response bắt đầu stream.
+- CSV có BOM UTF-8 (Excel đọc đúng tiếng Việt), tên cột trùng tên trường nên dùng lại được cho
+  POST /v1/candidate/import. NDJSON: mỗi dòng một object JSON.
+- Lỗi giữa chừng không đổi được status code nữa: response bị cắt ngang (client thấy kết nối đóng sớm).
+"""
+import csv
+import io
+from datetime import datetime
+from sqlalchemy import select
+from starlette.responses import StreamingResponse
+from app import config
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+CSV_BOM = "﻿"
+
+def query(model, columns: list, sort_columns: list):
+    """SELECT các cột (tên trường của schema) có trong bảng, sắp theo khóa chính để kết quả ổn định"""
+    table_columns = model.__table__.columns
+    return select(*[getattr(model, name) for name in columns if name in table_columns]).order_by(*sort_columns)
+
+def _csv_columns(schema) -> list:
+    # Trường chỉ nạp để tính computed_field (exclude) không xuất ra
+    return [name for name, info in schema.model_fields.items() if not info.exclude] + list(schema.model_computed_fields)
+
+def _encode_csv(schema, rows, columns: list) -> bytes:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for row in rows:
+        data = schema.model_validate(row, from_attributes=True).model_dump(mode="json")
+        writer.writerow(["" if data[name] is None else data[name] for name in columns])
+    return out.getvalue().encode()
+
+def _encode_ndjson(schema, rows) -> bytes:
+    return b"".join(schema.model_validate(row, from_attributes=True).model_dump_json().encode() + b"\n" for row in rows)
+
+async def _stream(session_factory, statement, schema, fmt: str):
+    columns = _csv_columns(schema)
+    if fmt == "csv":
+        out = io.StringIO()
+        csv.writer(out).writerow(columns)
+        yield (CSV_BOM + out.getvalue()).encode()
+    async with session_factory() as db:
+        result = await db.stream(statement.execution_options(yield_per=config.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            yield _encode_csv(schema, rows, columns) if fmt == "csv" else _encode_ndjson(schema, rows)
+
+def response(session_factory, statement, schema, fmt: str, name: str) -> StreamingResponse:
+    """StreamingResponse tải về file <name>_<thời gian>.<fmt>"""
+    filename = f"{name}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}"
+    return StreamingResponse(
+        _stream(session_factory, statement, schema, fmt),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
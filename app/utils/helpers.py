@@ -1,16 +1,130 @@
-import hashlib
+import base64
+import json
+import copy
+from functools import lru_cache
+from typing import List
+import orjson
+from pydantic import BaseModel, ConfigDict, TypeAdapter, computed_field
+from sqlalchemy import inspect, tuple_
+from sqlalchemy.orm import load_only
+from app.utils.responses import ORJSONResponse
 
-def hash_password(password: str) -> str:
-    """Hash password dùng SHA-256 (không dùng salt)"""
-    return hashlib.sha256(password.encode()).hexdigest()
+# Phân trang kiểu keyset (cursor)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return hash_password(plain_password) == hashed_password
+FIELDS_DESCRIPTION = "Các trường cần lấy, phân cách bằng dấu phẩy (vd: job_id,code,name). Bỏ trống: tất cả"
 
-def response(data=None, message="Thành công", code=200, status="Success"):
+def _envelope(data, message, code, status) -> dict:
     return {
         "Code": code,
         "Status": status,
         "Message": message,
         "Data": data,
-    }
\ No newline at end of file
+    }
+
+def response(data=None, message="Thành công", code=200, status="Success", headers: dict = None):
+    # Trả thẳng Response: FastAPI không chạy jsonable_encoder trên kết quả nữa
+    return ORJSONResponse(_envelope(data, message, code, status), headers=headers)
+
+def page_response(data, next_cursor, message="Thành công", headers: dict = None):
+    """Envelope cho danh sách có phân trang, NextCursor = None khi đã hết dữ liệu"""
+    return ORJSONResponse({**_envelope(data, message, 200, "Success"), "NextCursor": next_cursor}, headers=headers)
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+def serialize(schema, data):
+    """
+    Object ORM (hoặc list) -> JSON theo schema Pydantic (from_attributes), dùng làm `data` của response.
+    pydantic-core mã hóa sẵn thành bytes, orjson nhúng nguyên đoạn đó vào envelope (không encode lại).
+    """
+    if data is None:
+        return None
+    if isinstance(data, (list, tuple)):
+        adapter = _list_adapter(schema)
+        return orjson.Fragment(adapter.dump_json(adapter.validate_python(data, from_attributes=True)))
+    return orjson.Fragment(schema.model_validate(data, from_attributes=True).model_dump_json())
+
+def encode_cursor(values: list) -> str:
+    """Mã hóa giá trị sort key của bản ghi cuối trang thành cursor (opaque với client)"""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor không hợp lệ")
+    if not isinstance(values, list):
+        raise ValueError("Cursor không hợp lệ")
+    return values
+
+# ----- Sparse fieldsets (?fields=) -----
+
+@lru_cache(maxsize=256)
+def _partial_schema(schema, fields: tuple):
+    """
+    Schema chỉ gồm các trường trong `fields`. Trường tính toán (computed_field) kéo theo các trường nó
+    cần (khai báo trong `field_dependencies` của schema): được nạp nhưng không xuất ra.
+    """
+    dependencies = getattr(schema, "field_dependencies", {})
+    needed = set(fields)
+    for name in fields:
+        needed.update(dependencies.get(name, []))
+    namespace = {"__annotations__": {}, "__module__": schema.__module__, "model_config": ConfigDict(from_attributes=True)}
+    for name, info in schema.model_fields.items():
+        if name in needed:
+            info = copy.copy(info)
+            info.exclude = name not in fields
+            namespace["__annotations__"][name] = info.annotation
+            namespace[name] = info
+    for name, info in schema.model_computed_fields.items():
+        if name in fields:
+            namespace[name] = computed_field(property(info.wrapped_property.fget), return_type=info.return_type)
+    return type(f"{schema.__name__}[{','.join(fields)}]", (BaseModel,), namespace)
+
+def fieldset(schema, fields: str = None) -> tuple:
+    """
+    Tham số `fields` -> (schema để serialize, tên các trường cần nạp từ DB).
+    Bỏ trống thì dùng cả schema, nhưng vẫn chỉ nạp các cột có trong schema. Raise ValueError nếu có trường lạ.
+    """
+    if fields:
+        requested = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in requested if f not in schema.model_fields and f not in schema.model_computed_fields]
+        if unknown or not requested:
+            raise ValueError(f"Trường không hợp lệ: {', '.join(unknown)}")
+        schema = _partial_schema(schema, requested)
+    return schema, list(schema.model_fields)
+
+def load_columns(model, names: list):
+    """Option load_only: chỉ SELECT các cột trong `names` (khóa chính luôn được nạp)"""
+    columns = inspect(model).column_attrs.keys()
+    return load_only(*[getattr(model, name) for name in names if name in columns])
+
+async def paginate(db, query, sort_columns: list, limit: int, after: str = None):
+    """
+    Keyset pagination: lọc theo sort key > cursor thay vì OFFSET, nên trang sâu vẫn là index seek.
+    sort_columns phải là cột có index và tổ hợp của chúng là duy nhất (vd: khóa chính).
+    Trả về (items, next_cursor).
+    """
+    if after:
+        values = decode_cursor(after)
+        if len(values) != len(sort_columns):
+            raise ValueError("Cursor không hợp lệ")
+        if len(sort_columns) == 1:
+            query = query.where(sort_columns[0] > values[0])
+        else:
+            query = query.where(tuple_(*sort_columns) > tuple_(*values))
+
+    # Lấy thừa 1 bản ghi để biết còn trang sau hay không
+    query = query.order_by(*sort_columns).limit(limit + 1)
+    items = (await db.execute(query)).scalars().all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], col.key) for col in sort_columns])
+    return items, next_cursor
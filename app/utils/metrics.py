@@ -0,0 +1,210 @@
+"""
+Metrics cho Prometheus (GET /metrics, text format 0.0.4), không cần thư viện ngoài.
+
+- MetricsMiddleware (ASGI thuần, không bọc response như BaseHTTPMiddleware): số request theo status code,
+  histogram thời gian xử lý, số request đang xử lý. Nhãn route là path template (/v1/job/{job_id}) chứ không
+  phải URL thật, để số chuỗi metric không tăng theo ID.
+- Hook before/after_cursor_execute trên các engine: số câu SQL và thời gian chờ database của từng request,
+  gom qua contextvar (hook chạy trong greenlet của AsyncSession vẫn thấy context của request), ghi thành
+  histogram theo route. Câu SQL ngoài request (background task, migration) chỉ tính vào tổng theo engine.
+- Số liệu nằm trong bộ nhớ của từng worker: chạy nhiều worker thì mỗi lần scrape chỉ thấy 1 worker
+  (chạy 1 worker/port hoặc gom ở phía Prometheus).
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"  # 404 không khớp route nào: gom chung 1 nhãn
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Phần tử cuối: +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        # bucket le là cận trên tính cả bằng
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+# [số câu SQL, số giây, đã xong] của request đang xử lý. Background task chạy sau response kế thừa
+# contextvar này: khi response đã gửi xong (đã xong = True), câu SQL chỉ tính vào tổng theo engine
+_request_db = ContextVar("metrics_request_db", default=None)
+
+_requests = {}      # (method, route, status) -> số request
+_latency = {}       # (method, route) -> Histogram
+_queries = {}       # (method, route) -> Histogram số câu SQL/request
+_db_seconds = {}    # (method, route) -> Histogram thời gian database/request
+_engine_totals = {}  # tên engine -> [số câu SQL, số giây]
+_engines = {}       # tên engine -> Engine (sync)
+_engine_names = {}  # Engine (sync) -> tên
+_in_flight = 0
+
+# ----- SQLAlchemy -----
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    totals = _engine_totals[_engine_names[conn.engine]]
+    totals[0] += 1
+    totals[1] += elapsed
+    current = _request_db.get()
+    if current is not None and not current[2]:
+        current[0] += 1
+        current[1] += elapsed
+
+def instrument(engines: dict):
+    """Gắn hook đếm SQL. engines: {tên: Engine hoặc AsyncEngine}; engine trùng nhau chỉ gắn 1 lần"""
+    for name, engine in engines.items():
+        sync_engine = getattr(engine, "sync_engine", engine)
+        if sync_engine in _engine_names:
+            continue
+        _engine_names[sync_engine] = name
+        _engines[name] = sync_engine
+        _engine_totals[name] = [0, 0.0]
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+def pool_stats() -> dict:
+    """Trạng thái connection pool của từng engine (pool không có hàm tương ứng thì bỏ qua)"""
+    result = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        result[name] = {
+            key: getattr(pool, fn)()
+            for key, fn in (("size", "size"), ("checked_in", "checkedin"), ("checked_out", "checkedout"), ("overflow", "overflow"))
+            if hasattr(pool, fn)
+        }
+    return result
+
+# ----- ASGI -----
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500  # App lỗi trước khi gửi response: ServerErrorMiddleware sẽ trả 500
+        db = [0, 0.0, False]
+        started = time.perf_counter()
+
+        def finish():
+            # Chốt số liệu đúng 1 lần: khi gửi xong body, hoặc ở finally nếu không có response
+            global _in_flight
+            if db[2]:
+                return
+            db[2] = True
+            elapsed = time.perf_counter() - started
+            _in_flight -= 1
+            # Router ghi route đã khớp vào scope (cùng dict với scope của middleware)
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE))
+            _requests[key + (status,)] = _requests.get(key + (status,), 0) + 1
+            _observe(_latency, key, LATENCY_BUCKETS, elapsed)
+            _observe(_queries, key, QUERY_BUCKETS, db[0])
+            _observe(_db_seconds, key, LATENCY_BUCKETS, db[1])
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            # Starlette chạy BackgroundTasks sau khi gửi body, vẫn trong self.app(...): không tính vào request
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        token = _request_db.set(db)
+        _in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db.reset(token)
+            finish()
+
+def _observe(histograms: dict, key: tuple, buckets: tuple, value: float):
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = Histogram(buckets)
+    histogram.observe(value)
+
+# ----- Text format -----
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+def _header(lines: list, name: str, kind: str, help_text: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+def _histograms(lines: list, name: str, help_text: str, histograms: dict):
+    _header(lines, name, "histogram", help_text)
+    for (method, route), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for le, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=_number(le))} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {_number(histogram.sum)}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {cumulative}")
+
+_POOL_HELP = {
+    "size": "Số connection cố định của pool",
+    "checked_in": "Số connection rảnh trong pool",
+    "checked_out": "Số connection đang được dùng",
+    "overflow": "Số connection vượt pool_size (âm: pool chưa mở đủ)",
+}
+
+def render(extra: dict = None) -> str:
+    """
+    Toàn bộ metrics dạng text. extra: {nhóm: dict stats()} của các module khác, các giá trị số được xuất
+    thành gauge app_<nhóm>_<tên> (vd: app_passwords_queued).
+    """
+    lines = []
+    _header(lines, "http_requests_total", "counter", "Số request HTTP theo route và status code")
+    for (method, route, status), count in sorted(_requests.items()):
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+    _header(lines, "http_requests_in_flight", "gauge", "Số request HTTP đang xử lý")
+    lines.append(f"http_requests_in_flight {_in_flight}")
+    _histograms(lines, "http_request_duration_seconds", "Thời gian xử lý request HTTP", _latency)
+    _histograms(lines, "http_request_db_queries", "Số câu SQL mỗi request", _queries)
+    _histograms(lines, "http_request_db_seconds", "Thời gian chờ database mỗi request", _db_seconds)
+
+    _header(lines, "db_queries_total", "counter", "Số câu SQL theo engine (cả ngoài request)")
+    for name, (count, _) in sorted(_engine_totals.items()):
+        lines.append(f"db_queries_total{_labels(engine=name)} {count}")
+    _header(lines, "db_query_seconds_total", "counter", "Tổng thời gian chạy SQL theo engine")
+    for name, (_, seconds) in sorted(_engine_totals.items()):
+        lines.append(f"db_query_seconds_total{_labels(engine=name)} {_number(seconds)}")
+    pools = pool_stats()
+    for key, help_text in _POOL_HELP.items():
+        _header(lines, f"db_pool_{key}", "gauge", help_text)
+        for name, stats in sorted(pools.items()):
+            if key in stats:
+                lines.append(f"db_pool_{key}{_labels(engine=name)} {stats[key]}")
+
+    for group, stats in sorted((extra or {}).items()):
+        for key, value in stats.items():
+            if isinstance(value, (int, float)):
+                name = f"app_{group}_{key}"
+                _header(lines, name, "gauge", f"{group}.{key}")
+                lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,111 @@
+"""
+Các thuật toán hash mật khẩu (chạy trong process pool, xem app.utils.passwords).
+Module này không import app.db/app.models để tiến trình con khởi động nhanh và không mở kết nối database.
+
+Mỗi scheme nhận diện được hash của mình qua tiền tố/định dạng, nên bảng users có thể chứa lẫn nhiều loại:
+hash cũ được nâng cấp dần khi user đăng nhập (needs_update).
+Thêm scheme mới: viết class con của Scheme rồi gọi register().
+"""
+import hashlib
+import hmac
+import re
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from app import config
+
+class Scheme:
+    name = ""
+    slow = True  # False: đủ nhanh để chạy ngay trên event loop (không qua process pool)
+
+    def identify(self, hashed: str) -> bool:
+        raise NotImplementedError
+
+    def hash(self, password: str) -> str:
+        raise NotImplementedError
+
+    def verify(self, password: str, hashed: str) -> bool:
+        raise NotImplementedError
+
+    def needs_update(self, hashed: str) -> bool:
+        """Hash đúng scheme nhưng tham số (cost) đã cũ"""
+        return False
+
+class Bcrypt(Scheme):
+    name = "bcrypt"
+    _PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+    def identify(self, hashed: str) -> bool:
+        return hashed.startswith(self._PREFIXES)
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=config.BCRYPT_ROUNDS)).decode()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return bcrypt.checkpw(password.encode(), hashed.encode())
+        except ValueError:
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        return int(hashed[4:6]) != config.BCRYPT_ROUNDS
+
+class Argon2(Scheme):
+    name = "argon2"
+
+    def __init__(self):
+        self._hasher = PasswordHasher(
+            time_cost=config.ARGON2_TIME_COST,
+            memory_cost=config.ARGON2_MEMORY_COST,
+            parallelism=config.ARGON2_PARALLELISM,
+        )
+
+    def identify(self, hashed: str) -> bool:
+        return hashed.startswith("$argon2")
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            return self._hasher.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        return self._hasher.check_needs_rehash(hashed)
+
+class LegacySha256(Scheme):
+    """SHA-256 không salt (cách lưu cũ): chỉ còn để kiểm tra, hash được nâng cấp khi đăng nhập"""
+    name = "sha256"
+    slow = False
+    _FORMAT = re.compile(r"^[0-9a-f]{64}$")
+
+    def identify(self, hashed: str) -> bool:
+        return bool(self._FORMAT.match(hashed))
+
+    def hash(self, password: str) -> str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return hmac.compare_digest(self.hash(password), hashed)
+
+SCHEMES = {}
+
+def register(scheme: Scheme):
+    SCHEMES[scheme.name] = scheme
+
+for _scheme in (Bcrypt(), Argon2(), LegacySha256()):
+    register(_scheme)
+
+def identify(hashed: str):
+    """Scheme của hash đã lưu, None nếu không nhận ra"""
+    return next((s for s in SCHEMES.values() if hashed and s.identify(hashed)), None)
+
+# ----- Hàm chạy trong process pool (nhận tên scheme, picklable) -----
+
+def hash_with(name: str, password: str) -> str:
+    return SCHEMES[name].hash(password)
+
+def verify_with(name: str, password: str, hashed: str) -> bool:
+    return SCHEMES[name].verify(password, hashed)
@@ -0,0 +1,131 @@
+"""
+Hash/kiểm tra mật khẩu.
+
+- Hash mới dùng PASSWORD_SCHEME (bcrypt/argon2); hash cũ (SHA-256 không salt, cost cũ) vẫn đăng nhập được
+  và được hash lại bằng scheme hiện tại ngay sau khi đăng nhập thành công (rehash).
+- KDF chậm chạy trong process pool riêng (PASSWORD_HASH_WORKERS): không chiếm event loop, threadpool
+  hay CPU của các request khác. Số job đang chạy giới hạn bởi semaphore (= số worker), job còn lại chờ
+  trong hàng đợi; hàng đợi dài quá PASSWORD_HASH_MAX_QUEUE thì từ chối ngay (PasswordQueueFull) thay vì
+  để các request đăng nhập dồn lại tới timeout.
+- stats(): số job đang chạy/đang chờ, số lần từ chối, thời gian chờ/xử lý cộng dồn.
+"""
+import asyncio
+import multiprocessing
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import update
+from app import config
+from app.utils import password_schemes
+
+class PasswordQueueFull(Exception):
+    def __init__(self):
+        super().__init__("Hệ thống đang bận xử lý mật khẩu, vui lòng thử lại sau")
+
+_pool = None
+_dummy_hash = None  # Hash mật khẩu ngẫu nhiên theo PASSWORD_SCHEME, dùng khi username không tồn tại
+_semaphore = asyncio.Semaphore(config.PASSWORD_HASH_WORKERS)
+_stats = {
+    "running": 0, "queued": 0, "max_queued": 0, "completed": 0, "rejected": 0, "rehashed": 0,
+    "wait_seconds": 0.0, "work_seconds": 0.0,
+}
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: tiến trình con không kế thừa event loop/connection của process cha (giống cv_text)
+        _pool = ProcessPoolExecutor(
+            max_workers=config.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+def shutdown():
+    """Gọi khi tắt app"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def _run(fn, *args):
+    """Chạy fn trong process pool, tối đa PASSWORD_HASH_WORKERS job cùng lúc"""
+    if _stats["queued"] >= config.PASSWORD_HASH_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise PasswordQueueFull()
+    queued_at = time.perf_counter()
+    _stats["queued"] += 1
+    _stats["max_queued"] = max(_stats["max_queued"], _stats["queued"])
+    try:
+        await _semaphore.acquire()
+    finally:
+        _stats["queued"] -= 1
+    started_at = time.perf_counter()
+    _stats["wait_seconds"] += started_at - queued_at
+    _stats["running"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(get_pool(), fn, *args)
+    finally:
+        _stats["running"] -= 1
+        _stats["completed"] += 1
+        _stats["work_seconds"] += time.perf_counter() - started_at
+        _semaphore.release()
+
+async def hash_password(password: str) -> str:
+    """Hash bằng PASSWORD_SCHEME hiện tại"""
+    scheme = password_schemes.SCHEMES[config.PASSWORD_SCHEME]
+    if not scheme.slow:
+        return scheme.hash(password)
+    return await _run(password_schemes.hash_with, scheme.name, password)
+
+def uses_kdf(hashed: str) -> bool:
+    """Hash thuộc scheme chậm (bcrypt/argon2); False với hash cũ SHA-256 hoặc không nhận diện được"""
+    scheme = password_schemes.identify(hashed)
+    return scheme is not None and scheme.slow
+
+async def verify_password(password: str, hashed: str) -> tuple:
+    """(đúng mật khẩu?, cần hash lại bằng scheme/cost hiện tại?)"""
+    scheme = password_schemes.identify(hashed)
+    if scheme is None:
+        return False, False
+    if scheme.slow:
+        ok = await _run(password_schemes.verify_with, scheme.name, password, hashed)
+    else:
+        ok = scheme.verify(password, hashed)
+    if not ok:
+        return False, False
+    return True, scheme.name != config.PASSWORD_SCHEME or scheme.needs_update(hashed)
+
+async def prepare_dummy_hash():
+    """Gọi khi khởi động app: tính trước hash giả (1 lần cho mỗi worker)"""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password(secrets.token_urlsafe(16))
+
+async def verify_dummy(password: str):
+    """
+    Username không tồn tại hoặc user còn hash cũ (không có KDF): vẫn chạy KDF với hash giả để thời gian
+    phản hồi giống user có hash bcrypt/argon2 (không dò được username qua thời gian). Có thể raise PasswordQueueFull như verify_password.
+    """
+    await prepare_dummy_hash()
+    await verify_password(password, _dummy_hash)
+
+async def rehash(user_id: str, password: str, old_hash: str):
+    """
+    Background task sau khi đăng nhập bằng hash cũ: lưu hash mới. Chỉ ghi nếu hash trong DB vẫn là
+    old_hash (user có thể vừa đổi mật khẩu); không tăng token_version vì mật khẩu không đổi.
+    """
+    from app.db.database import AsyncSessionLocal
+    from app.models.user import User
+
+    try:
+        new_hash = await hash_password(password)
+    except PasswordQueueFull:
+        return  # Đang quá tải: để lần đăng nhập sau
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(User).where(User.user_id == user_id, User.password == old_hash).values(password=new_hash)
+        )
+        await db.commit()
+    _stats["rehashed"] += result.rowcount
+
+def stats() -> dict:
+    return {"scheme": config.PASSWORD_SCHEME, "workers": config.PASSWORD_HASH_WORKERS, **_stats}
@@ -0,0 +1,226 @@
+"""
+Xếp hạng ứng viên theo mức độ phù hợp với đề xuất tuyển dụng (TF-IDF + cosine similarity).
+
+- Văn bản của ứng viên là nội dung CV đã trích xuất (bảng cv_text).
+- Mỗi văn bản được băm thành vector thưa N_FEATURES chiều (hashing trick: không cần lưu từ điển),
+  TF dạng 1 + log(tf), IDF tính từ các ứng viên đang có trong index.
+- Ma trận TF lưu dạng CSC theo từng block: chấm điểm cả pool chỉ đọc các cột (từ) có trong
+  truy vấn rồi chia cho norm từng dòng, không duyệt từng ứng viên bằng Python.
+- Thêm ứng viên = thêm block nhỏ, các block liền kề được gộp dần (kích thước tăng theo cấp số nhân)
+  nên không phải dựng lại cả ma trận. Xóa ứng viên chỉ đánh dấu dòng; IDF/norm chỉ tính lại khi
+  số văn bản thay đổi quá IDF_REFRESH_RATIO.
+- Index nằm trong bộ nhớ từng worker, được dựng lại ở background sau RANKING_REFRESH_SECONDS
+  để nhận thay đổi từ worker/CLI khác.
+"""
+import asyncio
+import threading
+import time
+import numpy as np
+import scipy.sparse as sp
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, func
+from app import config
+from app.db.database import AsyncSessionLocal
+from app.models.candidates import Candidate
+from app.models.cv_text import CvText
+from app.utils import cv_text
+from app.utils.text_extract import N_FEATURES, hashed_features, hashed_features_batch
+
+IDF_REFRESH_RATIO = 0.1
+COMPACT_RATIO = 0.3  # Tỷ lệ dòng đã xóa thì gom lại khi tính lại IDF
+BUILD_BATCH = 5000
+POOL_BATCH = 500  # Số văn bản mỗi lần gửi sang process pool
+
+def _to_csc(features: list) -> sp.csc_matrix:
+    lengths = np.fromiter((len(idx) for idx, _ in features), dtype=np.int64, count=len(features))
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+    indices = np.concatenate([idx for idx, _ in features])
+    data = np.concatenate([tf for _, tf in features])
+    return sp.csr_matrix((data, indices, indptr), shape=(len(features), N_FEATURES)).tocsc()
+
+def _norms(block: sp.csc_matrix, idf: np.ndarray) -> np.ndarray:
+    """||tf * idf|| của từng dòng"""
+    norms = np.sqrt(block.multiply(block) @ (idf * idf)).astype(np.float32)
+    norms[norms == 0] = 1.0
+    return norms
+
+class SkillIndex:
+    """
+    Index TF-IDF trong bộ nhớ. Block, ids, rows, alive không bao giờ bị sửa tại chỗ mà được thay bằng
+    object mới, nên truy vấn chỉ cần lấy tham chiếu trong lock rồi tính toán ngoài lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ids = []
+        self.rows = {}  # candidate_id -> chỉ số dòng
+        self.alive = np.zeros(0, dtype=bool)
+        self.df = np.zeros(N_FEATURES, dtype=np.int64)
+        self.n_docs = 0
+        self._blocks = []  # [(ma trận TF dạng CSC, norm từng dòng)], nối tiếp nhau theo thứ tự dòng
+        self._idf = None
+        self._idf_docs = 0
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return self.n_docs
+
+    def _refresh_idf(self):
+        """Tính lại IDF và norm; bỏ các dòng đã xóa nếu nhiều"""
+        if (~self.alive).sum() > COMPACT_RATIO * len(self.ids):
+            keep = np.flatnonzero(self.alive)
+            merged = sp.vstack([block for block, _ in self._blocks], format="csr")[keep].tocsc()
+            self.ids = [self.ids[i] for i in keep]
+            self.rows = {cid: i for i, cid in enumerate(self.ids)}
+            self.alive = np.ones(len(self.ids), dtype=bool)
+            self._blocks = [(merged, None)]
+        self._idf = (np.log((1.0 + self.n_docs) / (1.0 + self.df)) + 1.0).astype(np.float32)
+        self._idf_docs = self.n_docs
+        self._blocks = [(block, _norms(block, self._idf)) for block, _ in self._blocks]
+
+    def _merge_tail(self):
+        """Gộp 2 block cuối khi kích thước tương đương (giống LSM tree): mỗi dòng chỉ bị gộp O(log n) lần"""
+        while len(self._blocks) >= 2 and self._blocks[-2][0].shape[0] <= 2 * self._blocks[-1][0].shape[0]:
+            (a, norms_a), (b, norms_b) = self._blocks[-2:]
+            merged = (sp.vstack([a, b], format="csc"), np.concatenate((norms_a, norms_b)))
+            self._blocks = self._blocks[:-2] + [merged]
+
+    def _remove_locked(self, candidate_ids) -> int:
+        rows = [self.rows[cid] for cid in candidate_ids if cid in self.rows]
+        rows = [row for row in rows if self.alive[row]]
+        if rows:
+            self.alive = self.alive.copy()
+            self.alive[rows] = False
+            self.n_docs -= len(rows)  # df giữ nguyên tới lần dựng lại: IDF lệch không đáng kể
+        return len(rows)
+
+    def add(self, docs: list, features: list = None):
+        """
+        docs: [(candidate_id, text)]; features: vector đã tính sẵn (vd: trong process pool) theo thứ tự docs.
+        Ứng viên đã có trong index sẽ được thay bằng văn bản mới.
+        """
+        if features is None:
+            features = [hashed_features(text) for _, text in docs]
+        pairs = [(cid, f) for (cid, _), f in zip(docs, features) if len(f[0])]
+        if not pairs:
+            return
+        block = _to_csc([f for _, f in pairs])
+        with self._lock:
+            self._remove_locked([cid for cid, _ in pairs])
+            for _, (idx, _) in pairs:
+                self.df[idx] += 1
+            self.n_docs += len(pairs)
+            start = len(self.ids)
+            self.ids = self.ids + [cid for cid, _ in pairs]
+            self.rows = {**self.rows, **{cid: start + i for i, (cid, _) in enumerate(pairs)}}
+            self.alive = np.concatenate((self.alive, np.ones(len(pairs), dtype=bool)))
+            if self._idf is None or abs(self.n_docs - self._idf_docs) > IDF_REFRESH_RATIO * self._idf_docs:
+                self._blocks = self._blocks + [(block, None)]
+                self._refresh_idf()
+            else:
+                self._blocks = self._blocks + [(block, _norms(block, self._idf))]
+            self._merge_tail()
+
+    def remove(self, candidate_ids: list) -> int:
+        with self._lock:
+            return self._remove_locked(candidate_ids)
+
+    def scores(self, text: str) -> tuple:
+        """(điểm cosine của mọi dòng, ids, rows); dòng đã xóa có điểm 0"""
+        with self._lock:
+            blocks, idf, alive, ids, rows = self._blocks, self._idf, self.alive, self.ids, self.rows
+        if idf is None:
+            return np.zeros(0, dtype=np.float32), ids, rows
+        q_idx, q_tf = hashed_features(text)
+        q_weight = q_tf * idf[q_idx]
+        norm = np.linalg.norm(q_weight)
+        if norm == 0:
+            return np.zeros(len(alive), dtype=np.float32), ids, rows
+        # cosine = sum(tf * idf * q) / norm(dòng): nhân thêm idf vào truy vấn thay vì vào cả ma trận
+        q_weight = q_weight * idf[q_idx] / norm
+        scores = np.concatenate([(block[:, q_idx] @ q_weight) / norms for block, norms in blocks])
+        scores[~alive] = 0.0
+        return scores, ids, rows
+
+    def rank(self, text: str, candidate_ids: list = None, limit: int = 50) -> list:
+        """
+        [(candidate_id, score)] giảm dần theo score. candidate_ids=None: xếp hạng cả pool
+        (chỉ trả ứng viên có score > 0); ngược lại chỉ trong danh sách, ứng viên chưa có CV text được 0 điểm.
+        """
+        scores, ids, rows = self.scores(text)
+        if candidate_ids is not None:
+            n_rows = len(scores)
+            ranked = [(cid, float(scores[rows[cid]]) if rows.get(cid, n_rows) < n_rows else 0.0) for cid in candidate_ids]
+            return sorted(ranked, key=lambda x: -x[1])[:limit]
+        top = np.flatnonzero(scores > 0)
+        if len(top) > limit:
+            top = top[np.argpartition(-scores[top], limit - 1)[:limit]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(ids[i], float(scores[i])) for i in top]
+
+# ----- Index dùng chung trong process -----
+
+_index = None
+_build_lock = asyncio.Lock()
+_refreshing = False
+
+async def _load(index: SkillIndex, candidate_ids: list = None):
+    """Nạp văn bản CV của ứng viên (tất cả hoặc theo danh sách) vào index, vector hóa trong process pool"""
+    query = (
+        select(Candidate.candidate_id, CvText.content)
+        .join(CvText, CvText.sha256 == func.substr(Candidate.cv_file, 1, 64))
+        .where(CvText.status == "done")
+    )
+    if candidate_ids is not None:
+        query = query.where(Candidate.candidate_id.in_(candidate_ids))
+    loop = asyncio.get_running_loop()
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=BUILD_BATCH))
+        async for rows in result.partitions(BUILD_BATCH):
+            docs = [(cid, content) for cid, content in rows]
+            if len(docs) <= POOL_BATCH:
+                await run_in_threadpool(index.add, docs)  # Vài ứng viên vừa tạo: không cần qua process pool
+                continue
+            batches = await asyncio.gather(*[
+                loop.run_in_executor(cv_text.get_pool(), hashed_features_batch, [text for _, text in docs[i:i + POOL_BATCH]])
+                for i in range(0, len(docs), POOL_BATCH)
+            ])
+            await run_in_threadpool(index.add, docs, [f for batch in batches for f in batch])
+
+async def _build() -> SkillIndex:
+    index = SkillIndex()
+    await _load(index)
+    return index
+
+async def _refresh():
+    global _index, _refreshing
+    try:
+        _index = await _build()
+    finally:
+        _refreshing = False
+
+async def get_index() -> SkillIndex:
+    """Index hiện tại; dựng lần đầu khi cần, dựng lại ở background khi đã quá RANKING_REFRESH_SECONDS"""
+    global _index, _refreshing
+    if _index is None:
+        async with _build_lock:
+            if _index is None:
+                _index = await _build()
+    elif not _refreshing and time.monotonic() - _index.built_at > config.RANKING_REFRESH_SECONDS:
+        _refreshing = True
+        asyncio.get_running_loop().create_task(_refresh())
+    return _index
+
+async def add_candidates(candidate_ids: list):
+    """Background task sau khi tạo ứng viên có CV (chạy sau khi CV đã được trích xuất text)"""
+    if _index is not None:
+        await _load(_index, candidate_ids)
+
+def remove_candidates(candidate_ids: list):
+    """Gọi sau khi xóa ứng viên"""
+    if _index is not None:
+        _index.remove(candidate_ids)
+
+def proposal_text(proposal) -> str:
+    # Kỹ năng là tiêu chí chính nên được lặp lại để tăng trọng số
+    return " ".join(filter(None, [proposal.title, proposal.skills, proposal.skills, proposal.desc]))
@@ -0,0 +1,29 @@
+"""
+Cache đọc (read-through) trong process cho dữ liệu danh mục: job, department.
+
+- Key gồm ETag của bảng (tên bảng + phiên bản dữ liệu, xem table_versions) nên khi bất kỳ worker nào
+  ghi vào bảng, phiên bản tăng và mọi worker tự bỏ qua entry cũ: không cần broker/pub-sub giữa các process.
+  Entry cũ không còn được đọc tới, bị đẩy ra dần theo LRU/TTL.
+- Giá trị là kết quả đã serialize (orjson.Fragment) nên cache hit không truy vấn và không serialize lại.
+- Giới hạn số entry (REFERENCE_CACHE_SIZE) và thời gian sống (REFERENCE_CACHE_TTL).
+"""
+from app import config
+from app.utils.cache import TTLCache
+
+_MISSING = object()
+_cache = TTLCache(maxsize=config.REFERENCE_CACHE_SIZE, ttl=config.REFERENCE_CACHE_TTL)
+
+async def get(tag: str, key: tuple, loader):
+    """Giá trị của key ở phiên bản `tag`; chưa có thì gọi `await loader()` rồi lưu lại (kể cả None)"""
+    full_key = (tag, *key)
+    value = _cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        value = await loader()
+        _cache.set(full_key, value)
+    return value
+
+def clear():
+    _cache.clear()
+
+def stats() -> dict:
+    return _cache.stats()
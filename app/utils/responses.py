@@ -0,0 +1,34 @@
+from decimal import Decimal
+import orjson
+from pydantic import BaseModel
+from starlette.responses import FileResponse, JSONResponse
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """So sánh If-None-Match với ETag (so sánh yếu: bỏ qua tiền tố W/, hỗ trợ '*' và danh sách)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+class LargeFileResponse(FileResponse):
+    """
+    FileResponse đọc và gửi file theo chunk 256 KiB (mặc định 64 KiB): ít lượt đọc đĩa/gửi hơn với file CV.
+    Range/If-Range và HEAD do FileResponse xử lý.
+    """
+    chunk_size = 256 * 1024
+
+def _orjson_default(value):
+    """Kiểu orjson không tự mã hóa được (datetime, date, UUID, dataclass, numpy đã hỗ trợ sẵn)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Không serialize được kiểu {type(value).__name__}")
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse mã hóa bằng orjson; object ORM phải được chuyển qua schema (helpers.serialize) trước"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
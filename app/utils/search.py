@@ -0,0 +1,176 @@
+"""
+Tìm kiếm toàn văn (full-text) trên đề xuất tuyển dụng và ứng viên.
+
+- SQLite: bảng ảo FTS5 dạng external content (không lưu lại nội dung, chỉ lưu index),
+  đồng bộ bằng trigger, xếp hạng BM25, tìm theo tiền tố, bỏ dấu tiếng Việt khi so khớp.
+- PostgreSQL: GIN index trên to_tsvector('simple', ...), xếp hạng ts_rank_cd.
+- MySQL: FULLTEXT index, MATCH ... AGAINST (BOOLEAN MODE).
+- "cv": nội dung text trích từ file CV (bảng cv_text, xem app/utils/cv_text.py).
+
+FTS5 external content ánh xạ theo rowid của bảng gốc; VACUUM có thể đánh lại rowid
+(bảng dùng khóa chính VARCHAR) nên sau khi VACUUM cần chạy lại:
+    python -m app.utils.search rebuild
+"""
+import argparse
+import re
+from sqlalchemy import select, func, text, literal_column, tuple_, table, column
+from sqlalchemy.dialects import mysql
+from app.models.candidates import Candidate
+from app.models.cv_text import CvText
+from app.models.recruitment_proposal import RecruitmentProposal
+from app.utils import helpers
+
+MAX_TERMS = 10
+
+# Thực thể -> (model, khóa chính, các cột được index, trọng số BM25 theo thứ tự cột)
+SEARCHABLE = {
+    "recruitment_proposal": (
+        RecruitmentProposal, RecruitmentProposal.recruitment_proposal_id,
+        ["title", "desc", "skills", "benefits"], [10.0, 1.0, 5.0, 1.0],
+    ),
+    "candidate": (
+        Candidate, Candidate.candidate_id,
+        ["full_name", "email", "phone"], [10.0, 5.0, 5.0],
+    ),
+    "cv": (CvText, CvText.sha256, ["content"], [1.0]),
+}
+
+def _fts_table(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+def _index_name(model) -> str:
+    return f"ix_{model.__tablename__}_fulltext"
+
+def _document(columns: list) -> str:
+    """Biểu thức ghép các cột text (PostgreSQL), phải khớp giữa index và câu truy vấn"""
+    return " || ' ' || ".join(f'coalesce("{c}", \'\')' for c in columns)
+
+# ----- DDL (dùng trong migration) -----
+
+def _install_sqlite(conn, model, columns):
+    fts, table = _fts_table(model), model.__tablename__
+    cols = ", ".join(f'"{c}"' for c in columns)
+    new_values = ", ".join(f'new."{c}"' for c in columns)
+    old_values = ", ".join(f'old."{c}"' for c in columns)
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_values}); END"
+    ))
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def install(conn, entities: list):
+    """Tạo index full-text cho các thực thể theo loại database (idempotent)"""
+    from app.db.migrations import create_index
+    dialect = conn.dialect.name
+    quote = conn.dialect.identifier_preparer.quote
+    for model, _, columns, _ in (SEARCHABLE[entity] for entity in entities):
+        table = model.__tablename__
+        if dialect == "sqlite":
+            _install_sqlite(conn, model, columns)
+        elif dialect == "postgresql":
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {_index_name(model)} ON {quote(table)} "
+                f"USING GIN (to_tsvector('simple', {_document(columns)}))"
+            ))
+        elif dialect == "mysql":
+            create_index(conn, _index_name(model), table, columns, kind="FULLTEXT")
+
+def rebuild(conn):
+    """Dựng lại index FTS5 từ bảng gốc (sau VACUUM hoặc khi nghi index lệch). DB khác tự đồng bộ"""
+    if conn.dialect.name != "sqlite":
+        return
+    for model, *_ in SEARCHABLE.values():
+        fts = _fts_table(model)
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('optimize')"))
+
+# ----- Truy vấn -----
+
+def parse_terms(q: str) -> list:
+    """Tách từ khóa người dùng nhập thành các từ (bỏ ký tự đặc biệt của cú pháp truy vấn)"""
+    return re.findall(r"\w+", q or "", re.UNICODE)[:MAX_TERMS]
+
+def _ranked(dialect: str, entity: str, terms: list):
+    """
+    Subquery (key, score) các bản ghi khớp mọi từ khóa (theo tiền tố). score nhỏ hơn = liên quan hơn.
+    key là rowid với SQLite, khóa chính với database khác.
+    """
+    model, pk, columns, weights = SEARCHABLE[entity]
+    if dialect == "sqlite":
+        fts = table(_fts_table(model), column("rowid"))
+        fts_name = literal_column(fts.name)  # MATCH và bm25() nhận chính tên bảng FTS làm tham số
+        match = " ".join(f'"{t}"*' for t in terms)
+        return (
+            select(fts.c.rowid.label("key"), func.bm25(fts_name, *weights).label("score"))
+            .where(fts_name.op("MATCH")(match))
+            .subquery()
+        )
+    if dialect == "postgresql":
+        vector = func.to_tsvector("simple", literal_column(_document(columns)))
+        query = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        return (
+            select(pk.label("key"), (-func.ts_rank_cd(vector, query)).label("score"))
+            .where(vector.op("@@")(query))
+            .subquery()
+        )
+    if dialect == "mysql":
+        match = mysql.match(
+            *[getattr(model, c) for c in columns], against=" ".join(f"+{t}*" for t in terms)
+        ).in_boolean_mode()
+        return select(pk.label("key"), (-match).label("score")).where(match > 0).subquery()
+    raise ValueError(f"Database {dialect} chưa hỗ trợ tìm kiếm toàn văn")
+
+async def search(db, entity: str, q: str, limit: int, after: str = None, options: list = ()):
+    """
+    Tìm kiếm và phân trang theo keyset (score, khóa chính). Trả về ([(object, score)], next_cursor).
+    options: loader option cho model (vd: load_only các cột cần trả về).
+    Raise ValueError nếu từ khóa hoặc cursor không hợp lệ.
+    """
+    terms = parse_terms(q)
+    if not terms:
+        raise ValueError("Từ khóa tìm kiếm không hợp lệ")
+    model, pk, _, _ = SEARCHABLE[entity]
+    dialect = db.bind.dialect.name
+    ranked = _ranked(dialect, entity, terms)
+    key = literal_column(f"{model.__tablename__}.rowid") if dialect == "sqlite" else pk
+    query = select(model, ranked.c.score).join(ranked, key == ranked.c.key).options(*options)
+
+    if after:
+        values = helpers.decode_cursor(after)
+        if len(values) != 2:
+            raise ValueError("Cursor không hợp lệ")
+        query = query.where(tuple_(ranked.c.score, pk) > tuple_(*values))
+
+    rows = (await db.execute(query.order_by(ranked.c.score, pk).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, score = rows[-1]
+        next_cursor = helpers.encode_cursor([score, getattr(last, pk.key)])
+    return [(item, score) for item, score in rows], next_cursor
+
+def main():
+    from app.db.database import engine
+
+    parser = argparse.ArgumentParser(description="Quản lý index tìm kiếm toàn văn")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    with engine.begin() as conn:
+        rebuild(conn)
+    print({"rebuilt": list(SEARCHABLE)})
+
+if __name__ == "__main__":
+    main()
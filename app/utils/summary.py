@@ -0,0 +1,159 @@
+"""
+Bảng tổng hợp cho dashboard (GET /v1/stats), cập nhật tăng dần.
+
+- proposal_summary: số đề xuất, tổng quantity, tổng lương theo (status, department_id, job_id, khung lương).
+- candidate_summary: số ứng viên của từng đề xuất.
+- Các API ghi gọi proposals_changed / candidates_changed trước khi commit: phần chênh lệch được cộng dồn
+  bằng INSERT ... ON CONFLICT DO UPDATE trong cùng transaction, nên số liệu luôn khớp với dữ liệu gốc
+  mà không phải quét lại bảng. Nhóm đã về 0 bị xóa, bảng chỉ chứa các nhóm đang có dữ liệu.
+- Dựng lại từ đầu bằng GROUP BY trên bảng gốc (sau khi đổi SALARY_BAND_EDGES, sửa dữ liệu bằng tay, ...).
+
+CLI:
+    python -m app.utils.summary rebuild
+"""
+import argparse
+from bisect import bisect_right
+from sqlalchemy import select, insert, delete, func, case, literal, tuple_
+from sqlalchemy.dialects import sqlite, postgresql, mysql
+from app import config
+from app.db import bulk
+from app.models.candidate_summary import CandidateSummary
+from app.models.candidates import Candidate
+from app.models.proposal_summary import ProposalSummary
+from app.models.recruitment_proposal import RecruitmentProposal
+
+OPEN_STATUSES = ("pending", "approve")  # Đề xuất còn đang tuyển: tính vào open_headcount
+PROPOSAL_FIELDS = ("status", "department_id", "job_id", "quantity", "salary_start", "salary_end")
+# Các cột cần lấy khi xóa đề xuất (DELETE ... RETURNING) để trừ khỏi bảng tổng hợp
+PROPOSAL_COLUMNS = [getattr(RecruitmentProposal, name) for name in PROPOSAL_FIELDS]
+# INSERT với status=None nhận default của cột; dòng cũ có status NULL cũng được tính vào nhóm này
+DEFAULT_STATUS = RecruitmentProposal.__table__.c.status.default.arg
+
+_PROPOSAL_KEYS = ("status", "department_id", "job_id", "salary_band")
+_PROPOSAL_COUNTERS = ("proposal_count", "quantity_total", "salary_start_total", "salary_end_total")
+_CANDIDATE_KEYS = ("recruitment_proposal_id",)
+_CANDIDATE_COUNTERS = ("candidate_count",)
+
+def salary_band(salary) -> int:
+    """Chỉ số khung lương: số mốc trong SALARY_BAND_EDGES nhỏ hơn hoặc bằng salary"""
+    return bisect_right(config.SALARY_BAND_EDGES, salary or 0)
+
+def band_range(band: int) -> tuple:
+    """(min, max) của khung lương, None = không giới hạn"""
+    edges = config.SALARY_BAND_EDGES
+    return (edges[band - 1] if band > 0 else None, edges[band] if band < len(edges) else None)
+
+def _value(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+def snapshot(proposal) -> dict:
+    """Giá trị các cột ảnh hưởng tới thống kê; lấy trước khi sửa đề xuất để trừ nhóm cũ"""
+    return {name: _value(proposal, name) for name in PROPOSAL_FIELDS}
+
+def _upsert_add(dialect_name: str, model, rows: list, counters: tuple):
+    """INSERT ... ON CONFLICT cộng dồn các cột đếm (giống cv_storage._upsert_ref)"""
+    if dialect_name == "mysql":
+        stmt = mysql.insert(model).values(rows)
+        return stmt.on_duplicate_key_update({c: getattr(model, c) + stmt.inserted[c] for c in counters})
+    insert_ = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    stmt = insert_(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=list(model.__table__.primary_key.columns),
+        set_={c: getattr(model, c) + stmt.excluded[c] for c in counters},
+    )
+
+async def _apply(db, model, keys: tuple, counters: tuple, deltas: dict):
+    """deltas: {khóa nhóm: [chênh lệch từng cột đếm]}. Chạy trong transaction của request, chưa commit"""
+    rows = [{**dict(zip(keys, key)), **dict(zip(counters, values))} for key, values in deltas.items() if any(values)]
+    if not rows:
+        return
+    # Mỗi dòng VALUES tốn len(keys) + len(counters) tham số
+    for chunk in bulk.chunked(rows, bulk.SQL_CHUNK_SIZE // (len(keys) + len(counters))):
+        await db.execute(_upsert_add(db.bind.dialect.name, model, chunk, counters))
+    shrunk = [key for key, values in deltas.items() if values[0] < 0]
+    key_columns = tuple_(*[getattr(model, k) for k in keys])
+    for chunk in bulk.chunked(shrunk):
+        await db.execute(delete(model).where(getattr(model, counters[0]) <= 0, key_columns.in_(chunk)))
+
+async def proposals_changed(db, added=(), removed=()):
+    """
+    Cập nhật proposal_summary. added/removed: object ORM, dict, dòng RETURNING hoặc snapshot(), đọc các cột
+    PROPOSAL_FIELDS. Sửa đề xuất = removed=[snapshot trước khi sửa], added=[đề xuất sau khi sửa].
+    """
+    deltas = {}
+    for sign, items in ((1, added), (-1, removed)):
+        for item in items:
+            v = snapshot(item)
+            key = (v["status"] or DEFAULT_STATUS, v["department_id"], v["job_id"], salary_band(v["salary_start"]))
+            delta = deltas.setdefault(key, [0, 0, 0.0, 0.0])
+            delta[0] += sign
+            delta[1] += sign * (v["quantity"] or 0)
+            delta[2] += sign * (v["salary_start"] or 0)
+            delta[3] += sign * (v["salary_end"] or 0)
+    await _apply(db, ProposalSummary, _PROPOSAL_KEYS, _PROPOSAL_COUNTERS, deltas)
+
+async def candidates_changed(db, added=(), removed=()):
+    """Cập nhật candidate_summary. added/removed: recruitment_proposal_id của từng ứng viên thêm/xóa"""
+    deltas = {}
+    for sign, proposal_ids in ((1, added), (-1, removed)):
+        for proposal_id in proposal_ids:
+            deltas.setdefault((proposal_id,), [0])[0] += sign
+    await _apply(db, CandidateSummary, _CANDIDATE_KEYS, _CANDIDATE_COUNTERS, deltas)
+
+
+# ----- Dựng lại từ dữ liệu gốc (sync) -----
+
+def _band_expr(column):
+    edges = config.SALARY_BAND_EDGES
+    if not edges:
+        return literal(0)
+    # Cùng kết quả với salary_band(): mốc đầu tiên lớn hơn giá trị
+    return case(*[(func.coalesce(column, 0) < edge, index) for index, edge in enumerate(edges)], else_=len(edges))
+
+def rebuild(conn) -> dict:
+    """Tính lại toàn bộ bảng tổng hợp (conn: Connection hoặc Session đồng bộ; chưa commit)"""
+    p = RecruitmentProposal
+    grouped = select(
+        func.coalesce(p.status, DEFAULT_STATUS).label("status"),
+        p.department_id,
+        p.job_id,
+        _band_expr(p.salary_start).label("salary_band"),
+        p.quantity,
+        p.salary_start,
+        p.salary_end,
+    ).subquery()
+    keys = [grouped.c.status, grouped.c.department_id, grouped.c.job_id, grouped.c.salary_band]
+    proposals = select(
+        *keys,
+        func.count(),
+        func.coalesce(func.sum(grouped.c.quantity), 0),
+        func.coalesce(func.sum(grouped.c.salary_start), 0),
+        func.coalesce(func.sum(grouped.c.salary_end), 0),
+    ).group_by(*keys)
+    candidates = select(Candidate.recruitment_proposal_id, func.count()).group_by(Candidate.recruitment_proposal_id)
+
+    conn.execute(delete(ProposalSummary))
+    conn.execute(insert(ProposalSummary).from_select(_PROPOSAL_KEYS + _PROPOSAL_COUNTERS, proposals))
+    conn.execute(delete(CandidateSummary))
+    conn.execute(insert(CandidateSummary).from_select(_CANDIDATE_KEYS + _CANDIDATE_COUNTERS, candidates))
+    return {
+        "proposal_groups": conn.execute(select(func.count()).select_from(ProposalSummary)).scalar(),
+        "proposals_with_candidates": conn.execute(select(func.count()).select_from(CandidateSummary)).scalar(),
+    }
+
+def main():
+    from app.db.database import SessionLocal, engine
+    from app.db import migrations
+
+    parser = argparse.ArgumentParser(description="Bảng tổng hợp thống kê dashboard")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    migrations.upgrade(engine)
+    with SessionLocal() as session:
+        result = rebuild(session)
+        session.commit()
+    print(result)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Phiên bản dữ liệu theo bảng, dùng cho conditional GET (ETag / If-None-Match -> 304).
+
+- Mỗi bảng trong TRACKED có 1 dòng trong table_version; các API ghi gọi bump() trong cùng
+  transaction nên phiên bản tăng đúng khi dữ liệu commit (mọi worker đều thấy ngay).
+- API GET đọc phiên bản TRƯỚC khi truy vấn dữ liệu: nếu có ghi xen giữa thì response mang ETag cũ
+  với dữ liệu mới, lần sau client vẫn nhận 200 - không bao giờ trả 304 cho dữ liệu đã cũ.
+- ETag yếu (W/): cùng phiên bản nhưng khác tham số (limit, fields, ...) vẫn là URL khác nên cache
+  của client/proxy không lẫn với nhau.
+- SQLite (file): mỗi process giữ 1 connection chỉ đọc để hỏi `PRAGMA data_version` (đổi khi connection
+  khác, kể cả ở process khác, commit vào file). Chưa đổi thì dùng lại phiên bản đã đọc, không truy vấn.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.engine import make_url
+from app import config
+from app.models.table_version import TableVersion
+from app.utils.responses import etag_matches
+
+TRACKED = ("job", "department", "recruitment_proposal")
+
+# Client luôn hỏi lại server (có If-None-Match) trước khi dùng bản cache
+CACHE_CONTROL = "private, no-cache"
+
+async def bump(db, *names: str):
+    """Tăng phiên bản các bảng (chưa commit, chạy trong transaction của request)"""
+    unknown = set(names) - set(TRACKED)
+    if unknown:
+        raise ValueError(f"Bảng không có bộ đếm phiên bản: {', '.join(sorted(unknown))}")
+    await db.execute(
+        update(TableVersion).where(TableVersion.name.in_(names)).values(version=TableVersion.version + 1)
+    )
+
+class _DataVersion:
+    """Theo dõi PRAGMA data_version của file SQLite qua 1 connection riêng (stdlib, chỉ đọc)"""
+
+    def __init__(self, path: str):
+        uri = f"file:{Path(os.path.abspath(path)).as_posix()}?mode=ro"
+        # timeout=0: file đang bị khóa (journal mode không phải WAL) thì bỏ qua, truy vấn như bình thường
+        self._conn = sqlite3.connect(uri, uri=True, timeout=0, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+
+    def read(self):
+        try:
+            with self._lock:
+                return self._conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+_watcher = None
+_known = {}  # tên bảng -> (data_version lúc đọc, phiên bản)
+_stats = {"skipped": 0, "queried": 0}
+
+def _data_version():
+    global _watcher
+    if _watcher is None:
+        url = make_url(config.DATABASE_URL)
+        if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:") or config.DATABASE_READ_URLS:
+            _watcher = False
+        else:
+            try:
+                _watcher = _DataVersion(url.database)
+            except sqlite3.Error:
+                _watcher = False
+    return _watcher.read() if _watcher else None
+
+async def current(db, name: str) -> int:
+    # Đọc data_version TRƯỚC khi truy vấn: commit xen giữa sẽ làm lần sau phải đọc lại
+    stamp = _data_version()
+    known = _known.get(name)
+    if stamp is not None and known is not None and known[0] == stamp:
+        _stats["skipped"] += 1
+        return known[1]
+    version = (await db.execute(select(TableVersion.version).where(TableVersion.name == name))).scalar_one_or_none() or 0
+    _stats["queried"] += 1
+    if stamp is not None:
+        _known[name] = (stamp, version)
+    return version
+
+def stats() -> dict:
+    """Số lần đọc phiên bản bỏ qua được truy vấn (nhờ data_version) / phải truy vấn"""
+    return {"data_version": bool(_watcher), **_stats}
+
+def etag(name: str, version: int) -> str:
+    return f'W/"{name}-{version}"'
+
+async def check(request: Request, db, name: str) -> tuple:
+    """
+    (ETag hiện tại, response 304 nếu If-None-Match khớp, ngược lại None).
+    Gọi đầu handler GET, trước mọi truy vấn dữ liệu/serialize.
+    """
+    tag = etag(name, await current(db, name))
+    if etag_matches(request.headers.get("if-none-match"), tag):
+        return tag, Response(status_code=304, headers=headers(tag))
+    return tag, None
+
+def headers(tag: str) -> dict:
+    return {"ETag": tag, "Cache-Control": CACHE_CONTROL}
@@ -0,0 +1,66 @@
+"""
+Trích xuất text từ file PDF và vector hóa văn bản (chạy trong process pool).
+Module này không import app.db/app.models để tiến trình con khởi động nhanh và không mở kết nối database.
+"""
+import re
+import unicodedata
+import zlib
+from collections import Counter
+
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_text(text: str, max_chars: int) -> str:
+    """Chuẩn hóa Unicode (NFC, tiếng Việt dựng sẵn), bỏ ký tự điều khiển, gộp khoảng trắng"""
+    text = unicodedata.normalize("NFC", text)
+    text = _CONTROL_CHARS.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()[:max_chars]
+
+def extract_pdf_text(path: str, max_pages: int, max_chars: int) -> tuple:
+    """
+    Trả về (status, text, error): status là "done", "empty" (PDF scan, không có lớp text) hoặc "failed".
+    Không raise exception để kết quả luôn trả về được qua process pool.
+    """
+    from pypdf import PdfReader
+
+    try:
+        reader = PdfReader(path)
+        parts, total = [], 0
+        for page in reader.pages[:max_pages]:
+            page_text = page.extract_text() or ""
+            parts.append(page_text)
+            total += len(page_text)
+            if total >= max_chars:
+                break
+        text = normalize_text(" ".join(parts), max_chars)
+        return ("done" if text else "empty"), text, None
+    except Exception as e:
+        return "failed", "", f"{type(e).__name__}: {e}"[:500]
+
+# ----- Vector hóa văn bản (hashing trick) dùng cho xếp hạng ứng viên -----
+
+N_FEATURES = 1 << 18
+MAX_DOC_FEATURES = 512  # CV rất dài: chỉ giữ các từ xuất hiện nhiều nhất
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+def terms(text: str) -> list:
+    """Tách từ, không phân biệt hoa thường/dấu tiếng Việt (python, C++, C# giữ nguyên)"""
+    text = unicodedata.normalize("NFKD", (text or "").lower().replace("đ", "d"))
+    return _TOKEN.findall(text.encode("ascii", "ignore").decode())
+
+def hashed_features(text: str) -> tuple:
+    """(chỉ số feature tăng dần kiểu int32, TF dạng 1 + log(tf) kiểu float32)"""
+    import numpy as np
+
+    counts = Counter(terms(text))
+    if len(counts) > MAX_DOC_FEATURES:
+        counts = dict(counts.most_common(MAX_DOC_FEATURES))
+    keys = np.fromiter((zlib.crc32(t.encode()) for t in counts), dtype=np.int64, count=len(counts)) & (N_FEATURES - 1)
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    indices, inverse = np.unique(keys, return_inverse=True)  # Gộp các từ trùng hash
+    tf = np.bincount(inverse, weights=values, minlength=len(indices))
+    return indices.astype(np.int32), (1.0 + np.log(tf)).astype(np.float32)
+
+def hashed_features_batch(texts: list) -> list:
+    """Dùng với process pool: gửi cả batch để giảm chi phí truyền dữ liệu giữa các process"""
+    return [hashed_features(text) for text in texts]
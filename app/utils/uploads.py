@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app import config
+
+PDF_MAGIC = b"%PDF-"
+PDF_TYPE_MESSAGE = "Vui lòng chọn file PDF."
+
+class UploadError(Exception):
+    """File upload không hợp lệ; code là mã lỗi trả về trong helpers.response"""
+
+    def __init__(self, message: str, code: str = "G601"):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+@dataclass
+class StoredUpload:
+    temp_path: str  # file tạm, nằm cùng thư mục đích để rename nguyên tử
+    size: int
+    sha256: str
+
+def _too_large(max_bytes: int) -> UploadError:
+    return UploadError(f"File vượt quá dung lượng cho phép ({round(max_bytes / (1024 * 1024), 1):g} MB).", code="G602")
+
+def _copy_to_temp(source, directory: str, max_bytes: int, magic: bytes, chunk_size: int, type_message: str) -> StoredUpload:
+    """Đọc từng chunk, kiểm tra magic bytes, giới hạn dung lượng và tính hash trong cùng một lượt"""
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            header = b""
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                if len(header) < len(magic):
+                    header += chunk[:len(magic) - len(header)]
+                    if not magic.startswith(header):
+                        raise UploadError(type_message)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                hasher.update(chunk)
+                out.write(chunk)
+            if not header.startswith(magic):
+                raise UploadError(type_message)
+        return StoredUpload(temp_path=temp_path, size=size, sha256=hasher.hexdigest())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+async def save_upload(upload: UploadFile, directory: str, max_bytes: int = None, magic: bytes = PDF_MAGIC,
+                      type_message: str = PDF_TYPE_MESSAGE) -> StoredUpload:
+    """
+    Ghi file upload ra file tạm theo từng chunk (không giữ cả file trong RAM).
+    Toàn bộ vòng copy chạy trong một lần vào threadpool để không chặn event loop.
+    """
+    max_bytes = max_bytes or config.CV_MAX_BYTES
+    # Starlette đã biết dung lượng sau khi parse multipart: từ chối sớm nếu quá lớn
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+    await upload.seek(0)
+    return await run_in_threadpool(_copy_to_temp, upload.file, directory, max_bytes, magic, config.UPLOAD_CHUNK_SIZE, type_message)
+
+def _commit(temp_path: str, dest_path: str):
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    os.replace(temp_path, dest_path)
+
+async def commit_upload(stored: StoredUpload, dest_path: str):
+    """Đổi tên file tạm thành file chính thức (nguyên tử trên cùng filesystem)"""
+    await run_in_threadpool(_commit, stored.temp_path, dest_path)
+
+async def discard_upload(stored: StoredUpload):
+    await run_in_threadpool(remove_file, stored.temp_path)
+
+def remove_file(path: str):
+    if os.path.exists(path):
+        os.remove(path)
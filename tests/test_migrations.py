@@ -0,0 +1,37 @@
+"""upgrade() chạy đồng thời từ nhiều process (uvicorn --workers N cùng khởi động)"""
+import multiprocessing
+import shutil
+import pytest
+from sqlalchemy import create_engine, text
+
+WORKERS = 2
+
+def _upgrade(url: str):
+    from app.db import migrations
+    migrations.upgrade(create_engine(url))
+
+def _run_concurrently(url: str) -> list:
+    # spawn: mỗi process tự import app như một worker uvicorn
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_upgrade, args=(url,)) for _ in range(WORKERS)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(timeout=120)
+    return [p.exitcode for p in processes]
+
+@pytest.mark.parametrize("source", [None, "fast_api.db"], ids=["fresh", "repo_db"])
+def test_concurrent_upgrade(tmp_path, source):
+    from app.db import migrations
+
+    path = tmp_path / "test.db"
+    if source:
+        shutil.copy(source, path)
+    url = f"sqlite:///{path}"
+
+    assert _run_concurrently(url) == [0] * WORKERS
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        versions = conn.execute(text("SELECT version FROM schema_version ORDER BY version")).scalars().all()
+    assert versions == [version for version, _, _ in migrations.MIGRATIONS]